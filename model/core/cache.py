@@ -0,0 +1,114 @@
+import gc
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import time
+from typing import Callable
+
+from core.topology import *
+
+TOPOLOGY_CACHE_VERSION = 1
+CORE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def compute_content_hash(file_paths: list[str], parameters: dict, build_source: str = '') -> str:
+    """
+    Computes the cache key of a topology.
+
+    The key covers the content of the input files, the build parameters, the source of the build function
+    and the source of the core package (so changing a loader or a route generator also invalidates the
+    cached topologies).
+
+    Returns
+    -------
+
+    The SHA-256 hex digest of every input.
+    """
+    content_hash = hashlib.sha256()
+    content_hash.update(str(TOPOLOGY_CACHE_VERSION).encode())
+
+    for file_path in file_paths:
+        content_hash.update(os.path.basename(file_path).encode())
+        with open(file_path, 'rb') as input_file:
+            for chunk in iter(lambda: input_file.read(1 << 20), b''):
+                content_hash.update(chunk)
+
+    content_hash.update(repr(sorted(parameters.items())).encode())
+    content_hash.update(build_source.encode())
+
+    for module_name in sorted(os.listdir(CORE_DIRECTORY)):
+        if module_name.endswith('.py'):
+            with open(os.path.join(CORE_DIRECTORY, module_name), 'rb') as module_file:
+                content_hash.update(module_name.encode())
+                content_hash.update(module_file.read())
+
+    return content_hash.hexdigest()
+
+
+class TopologyCache:
+    """
+    On-disk cache of fully loaded topologies (nodes, links, hardware and base station tables and routes).
+
+    Entries are keyed by a content hash of their inputs (see compute_content_hash()), so an entry is never
+    reused once a source file, a build parameter or the core package changes.
+    """
+
+    def __init__(self, cache_dir: str = 'cache') -> None:
+        self.cache_dir = cache_dir
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, 'topology_{}.pickle'.format(key))
+
+    def get_or_build(self, file_paths: list[str], parameters: dict, build_topology: Callable[[], Topology]) -> Topology:
+        """
+        Loads the cached topology of the given inputs, building (and caching) it when there is none.
+
+        Parameters
+        ----------
+
+        file_paths : list
+            The files read by build_topology (usage CSV, nodes and links JSON).
+        parameters : dict
+            Every other value build_topology depends on (e.g. multipliers, origin node and k of the routes).
+        build_topology : Callable
+            Builds the topology from scratch. Its source is part of the key, so inline constants (e.g. the
+            hardware and base station definitions) are covered too.
+        """
+        try:
+            build_source = inspect.getsource(build_topology)
+        except (OSError, TypeError):
+            build_source = build_topology.__qualname__
+
+        key = compute_content_hash(file_paths, parameters, build_source)
+        path = self.get_path(key)
+
+        if os.path.exists(path):
+            cache_load_start = time.time()
+            # the collector would repeatedly scan the (acyclic) route objects while they are created
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                with open(path, 'rb') as cache_file:
+                    topo = pickle.load(cache_file)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+            cache_load_end = time.time()
+            logging.info('Topology Loaded from Cache: {}s'.format(cache_load_end - cache_load_start))
+            return topo
+
+        topo = build_topology()
+
+        cache_save_start = time.time()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write to a temporary file first, so an interrupted run never leaves a truncated entry
+        temporary_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temporary_path, 'wb') as cache_file:
+            pickle.dump(topo, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+        cache_save_end = time.time()
+        logging.info('Topology Cached: {}s'.format(cache_save_end - cache_save_start))
+
+        return topo
@@ -0,0 +1,121 @@
+from collections import namedtuple
+
+import numpy
+
+from core.drc import *
+from core.route import *
+
+DecisionVariableKey = namedtuple('DecisionVariableKey', ['route_id', 'drc_id', 'bs_key'])
+
+
+class CandidateIndex:
+    """
+    Index used to enumerate the (route, drc, bs) candidates of the decision variable X.
+
+    Routes are indexed by target base station and by amount of CRs (qty_nodes) and DRCs are
+    indexed by the amount of nodes they need, so only the valid combinations are visited
+    instead of the full routes x DRCs x base stations product.
+    """
+
+    def __init__(self, routes: list[Route], drcs: list[Drc], base_station_keys: list[str]) -> None:
+        self.routes = routes
+        self.drcs = list(drcs)
+        self.base_station_keys = list(base_station_keys)
+
+        # bs_key -> qty_nodes -> route positions
+        routes_by_target: dict[str, dict[int, list]] = {bs_key: {} for bs_key in self.base_station_keys}
+        for position, route in enumerate(routes):
+            routes_by_qty = routes_by_target.get(route.get_target_base_station())
+            if routes_by_qty is None:
+                continue
+            routes_by_qty.setdefault(route.qty_nodes(), []).append(position)
+
+        self.routes_by_target: dict[str, dict[int, numpy.ndarray]] = {
+            bs_key: {qty_nodes: numpy.array(positions, dtype=numpy.int64)
+                     for qty_nodes, positions in routes_by_qty.items()}
+            for bs_key, routes_by_qty in routes_by_target.items()
+        }
+
+        # num_needed_nodes -> [(drc position, drc)]
+        self.drcs_by_nodes: dict[int, list] = {}
+        for position, drc in enumerate(drcs):
+            self.drcs_by_nodes.setdefault(drc.num_needed_nodes(), []).append((position, drc))
+
+    def generate_candidates(self, feasible_routes: dict[int, numpy.ndarray] = None) -> tuple:
+        """
+        Generates the route, DRC and base station positions of every valid candidate.
+
+        Parameters
+        ----------
+
+        feasible_routes : dict
+            Optional boolean arrays indexed by route position, one per DRC identifier, used to
+            discard candidates (e.g. delay requirements, see CrosshaulDelayTable.feasible_routes).
+
+        Returns
+        -------
+
+        Three NumPy arrays (route positions, DRC positions, base station positions) in the same order
+        as the route -> drc -> bs enumeration.
+        """
+        route_positions = []
+        drc_positions = []
+        bs_positions = []
+        for bs_position, bs_key in enumerate(self.base_station_keys):
+            for qty_nodes, positions in self.routes_by_target[bs_key].items():
+                for drc_position, drc in self.drcs_by_nodes.get(qty_nodes, []):
+                    candidate_positions = positions
+                    if feasible_routes is not None:
+                        candidate_positions = positions[feasible_routes[drc.identifier][positions]]
+                    route_positions.append(candidate_positions)
+                    drc_positions.append(numpy.full(len(candidate_positions), drc_position, dtype=numpy.int64))
+                    bs_positions.append(numpy.full(len(candidate_positions), bs_position, dtype=numpy.int64))
+
+        if len(route_positions) == 0:
+            empty = numpy.empty(0, dtype=numpy.int64)
+            return empty, empty.copy(), empty.copy()
+
+        route_positions = numpy.concatenate(route_positions)
+        drc_positions = numpy.concatenate(drc_positions)
+        bs_positions = numpy.concatenate(bs_positions)
+
+        # a route targets a single base station, so (route, drc) identifies the candidate
+        order = numpy.lexsort((drc_positions, route_positions))
+        return route_positions[order], drc_positions[order], bs_positions[order]
+
+    def generate_keys(self, feasible_routes: dict[int, numpy.ndarray] = None) -> list:
+        """
+        Generates the decision variable keys of every valid candidate.
+
+        Parameters
+        ----------
+
+        feasible_routes : dict
+            Optional boolean arrays indexed by route position, one per DRC identifier, used to
+            discard candidates (e.g. delay requirements, see CrosshaulDelayTable.feasible_routes).
+
+        Returns
+        -------
+
+        The keys in the same order as the route -> drc -> bs enumeration.
+        """
+        route_positions, drc_positions, bs_positions = self.generate_candidates(feasible_routes)
+        return self.keys_from_candidates(route_positions, drc_positions, bs_positions)
+
+    def keys_from_candidates(self, route_positions: numpy.ndarray, drc_positions: numpy.ndarray,
+                             bs_positions: numpy.ndarray) -> list:
+        """ :returns: The decision variable keys of the candidates given by generate_candidates() """
+        route_ids = [route.identifier for route in self.routes]
+        drc_ids = [drc.identifier for drc in self.drcs]
+        return [DecisionVariableKey(route_ids[route_position], drc_ids[drc_position],
+                                    self.base_station_keys[bs_position])
+                for route_position, drc_position, bs_position in
+                zip(route_positions.tolist(), drc_positions.tolist(), bs_positions.tolist())]
+
+
+def group_keys_by_base_station(decision_var_keys: list, base_station_keys: list[str]) -> dict[str, list]:
+    """ :returns: A dict with the decision variable keys of each base station """
+    keys_by_bs = {bs_key: [] for bs_key in base_station_keys}
+    for key in decision_var_keys:
+        keys_by_bs[key.bs_key].append(key)
+    return keys_by_bs
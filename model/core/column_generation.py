@@ -0,0 +1,454 @@
+import heapq
+import itertools
+import logging
+import time
+
+from core.model import *
+
+# maximum amount of pricing rounds of ColumnGeneration.solve()
+COLUMN_GENERATION_ROUNDS = 30
+# new routes of each base station per pricing round (the best ones among its DRCs)
+COLUMN_GENERATION_ROUTES_PER_BS = 2
+# pricing rounds without improvement of the LP bound before the search stops (the centralization master is
+# highly degenerate, routes with positive reduced costs often leave the LP bound unchanged)
+COLUMN_GENERATION_STALL_ROUNDS = 3
+# reduced costs below this value do not improve the LP master
+COLUMN_GENERATION_TOLERANCE = 10 ** (-6)
+
+CROSSHAULS = ['backhaul', 'midhaul', 'fronthaul']
+
+# dual prices of an LP master: per GOPS of each hardware, per bandwidth unit of each link, per VNF placed in each
+# (node, function), of a VNF placed without ceil variable and of the single route constraint of each base station
+DualPrices = namedtuple('DualPrices', ['hw_prices', 'link_prices', 'pair_gains', 'centralization_gain', 'bs_duals'])
+# one pricing round: elapsed time, LP bound of the master, its Lagrangian bound over every priced route (the LP
+# bound plus the best reduced cost of each base station), candidates and routes of the master and new routes
+ColumnGenerationStep = namedtuple('ColumnGenerationStep', ['time', 'lp_bound', 'lagrangian_bound', 'candidates',
+                                                           'routes', 'new_routes'])
+# final model (solved as a MIP over the generated routes), its solution (None if not solved), LP bound of the
+# last master and every pricing round of the search
+ColumnGenerationResult = namedtuple('ColumnGenerationResult', ['eepran_model', 'solution', 'lp_bound', 'steps'])
+
+
+class ColumnGeneration:
+    """
+    Column generation over the routes of a topology.
+
+    Instead of enumerating every route upfront (e.g. Topology.generate_routes_nx(k=50)), the search starts from
+    the actual routes of the topology (e.g. Topology.generate_routes_dag(k=1)) and alternates:
+
+    - the LP relaxation of the EEPRAN model over the actual routes (the master),
+    - the pricing of new routes from its dual values: for each base station and DRC, a resource-constrained
+      shortest path from the origin node to the base station node, whose resources are the delay budgets of
+      the crosshauls. A crosshaul ends by choosing a hardware of its endpoint node, where its VNFs are placed.
+      Links are priced by the duals of their capacity constraints, hardwares by the duals of their processing
+      and ceil constraints and VNF placements by the duals of the centralization and its ceil constraints.
+
+    Routes whose candidates have a positive reduced cost are added to the topology (Topology.add_route()) and
+    the master is rebuilt, until no route improves it or its LP bound stalls. The model of the last master is
+    then solved as a MIP, so the model size depends on the generated routes instead of k.
+
+    Labels are only compared at the same node and crosshaul, regardless of the nodes they visited, so the
+    pricing is a heuristic and the last LP bound is the bound of the generated routes.
+    """
+
+    def __init__(self, topo: Topology, service: str = SERVICE_URLLC, cr_mode: str = CR_MODE_CALC,
+                 origin_node: str = 'node0') -> None:
+        self.topo = topo
+        self.service = service
+        self.crMode = cr_mode
+        self.originNode = origin_node
+
+        splits, drc_dict, drc_dict_embb, throughput, _ = get_service_data(service)
+        self.splits = splits
+        self.drcDictEmbb = drc_dict_embb
+        self.throughput = throughput
+        self.delayBound = CrosshaulDelayBound(splits, topo.get_link)
+
+        index = topo.get_index()
+        self.nodeHardwares = {node_key: list(index.node_hardware_keys[node_id])
+                              for node_key, node_id in index.nodes.ids.items()}
+        self.bsNodes = {bs_key: index.nodes.get_key(int(index.base_station_nodes[bs_id]))
+                        for bs_key, bs_id in index.base_stations.ids.items()}
+
+        # network nodes adjacent to each node (hardware and base station links are not part of the paths)
+        endpoints = set(index.hardwares.keys) | set(index.base_stations.keys)
+        self.neighbors: dict[str, list[str]] = {}
+        for link_key in topo.get_links():
+            link = topo.get_link(link_key)
+            if link.node1 in endpoints or link.node2 in endpoints:
+                continue
+            for source, target in [(link.node1, link.node2), (link.node2, link.node1)]:
+                neighbors = self.neighbors.setdefault(source, [])
+                if target not in neighbors:
+                    neighbors.append(target)
+
+        # crosshauls of each DRC, in route order: (crosshaul position, bandwidth attribute, delay budget, VNFs)
+        self.drcCrosshauls: dict[int, list[tuple[int, str, float, list[str]]]] = {}
+        for drc in splits:
+            positions = list(range(3 - drc.num_needed_nodes(), 3))
+            functions = {position: [] for position in positions}
+            for function in VIRTUAL_NETWORK_FUNCTIONS:
+                if 0 in positions and function in drc.fs_cu:
+                    functions[0].append(function)
+                elif 1 in positions and function in drc.fs_du:
+                    functions[1].append(function)
+                elif function in drc.fs_ru:
+                    functions[2].append(function)
+            budgets = [drc.delay_bh, drc.delay_mh, drc.delay_fh]
+            attributes = ['bandwidth_bh', 'bandwidth_mh', 'bandwidth_fh']
+            self.drcCrosshauls[drc.identifier] = [(position, attributes[position], budgets[position],
+                                                   functions[position]) for position in positions]
+
+    def solve(self, timestamp: int = -1, centralization_cap: int = 0, actual_deployment: Deployment = None,
+              max_rounds: int = COLUMN_GENERATION_ROUNDS, routes_per_bs: int = COLUMN_GENERATION_ROUTES_PER_BS,
+              stall_rounds: int = COLUMN_GENERATION_STALL_ROUNDS, time_limit: float = None) -> ColumnGenerationResult:
+        """
+        Generates routes until the LP master converges and solves the final model as a MIP.
+
+        Parameters
+        ----------
+
+        timestamp : int
+            The timestamp of the base station usage, -1 means one user per base station.
+        centralization_cap : int
+            The minimum centralization, as build_eepran_model().
+        actual_deployment : Deployment
+            The current deployment, used to define the migration costs.
+        max_rounds : int
+            The maximum amount of pricing rounds.
+        routes_per_bs : int
+            The maximum amount of routes added to each base station per pricing round.
+        stall_rounds : int
+            The amount of pricing rounds without improvement of the LP bound before the search stops.
+        time_limit : float
+            The time limit of the final MIP, in seconds (the model default if None).
+        """
+        generation_start = time.time()
+
+        topo = self.topo
+        signatures = {self.__get_signature(route.target, [route.backhaul, route.midhaul, route.fronthaul])
+                      for route in topo.get_routes()}
+
+        # base stations without candidates get a route meeting the delays, so the first master has a column
+        # for each of them
+        delay_table = topo.get_crosshaul_delay_table(self.splits)
+        feasible_routes = {drc.identifier: delay_table.feasible_routes(drc) for drc in self.splits}
+        candidate_index = CandidateIndex(topo.get_routes(), self.splits, topo.get_base_station_keys())
+        routed = {key.bs_key for key in candidate_index.generate_keys(feasible_routes)}
+        gops_table = topo.get_gops_table(self.crMode)
+        node_vnf_gops = gops_table.get_node_vnf_gops(timestamp)
+        bs_users = dict(zip(gops_table.base_station_keys, gops_table.get_users(timestamp).tolist()))
+        empty_prices = DualPrices({}, {}, {}, 0.0, {})
+        origin_labels = {drc.identifier: self.__get_origin_labels(drc, empty_prices) for drc in self.splits}
+        for bs_key in topo.get_base_station_keys():
+            if bs_key not in routed:
+                self.__add_routes(bs_key, self.__price_base_station(bs_key, empty_prices, origin_labels,
+                                                                    node_vnf_gops[bs_key], bs_users[bs_key], 1,
+                                                                    signatures), signatures)
+
+        steps = []
+        lp_bound = None
+        last_round = max_rounds
+        while True:
+            eepran_model = build_eepran_model(topo, timestamp, centralization_cap, self.service, self.crMode,
+                                              actual_deployment, export_lp=False)
+            model = eepran_model.model
+            relaxation = eepran_model.solve_relaxation()
+            lp_solution = relaxation.solution
+
+            if lp_solution is None:
+                logging.info('Column Generation: master not solved ({})'.format(
+                    relaxation.model.solve_details.status))
+                break
+            lp_bound = lp_solution.get_objective_value()
+            prices = self.__get_prices(eepran_model, relaxation)
+            if len(steps) == last_round:
+                break
+
+            new_routes = 0
+            lagrangian_bound = lp_bound
+            origin_labels = {drc.identifier: self.__get_origin_labels(drc, prices) for drc in self.splits}
+            for bs_key in topo.get_base_station_keys():
+                priced_routes = self.__price_base_station(bs_key, prices, origin_labels,
+                                                          eepran_model.nodeVnfGops[bs_key],
+                                                          eepran_model.bsUsers[bs_key], routes_per_bs, signatures)
+                new_routes += self.__add_routes(bs_key, priced_routes, signatures)
+                lagrangian_bound += max([0.0] + [reduced_cost for reduced_cost, _ in priced_routes])
+
+            steps.append(ColumnGenerationStep(time.time() - generation_start, lp_bound, lagrangian_bound,
+                                              len(model.x), len(topo.get_routes()) - new_routes, new_routes))
+            stalled = (len(steps) > stall_rounds and
+                       lp_bound <= steps[-1 - stall_rounds].lp_bound + COLUMN_GENERATION_TOLERANCE)
+            if new_routes == 0:
+                break
+            if stalled:
+                # the master of the last routes is still built and solved
+                last_round = len(steps)
+
+        solution = None
+        if lp_solution is not None:
+            if time_limit is not None:
+                model.parameters.timelimit = time_limit
+            solution = model.solve(clean_before_solve=True)
+
+        generation_end = time.time()
+        logging.info('Column Generation: {}s ({} rounds, {} routes, LP bound {})'.format(
+            generation_end - generation_start, len(steps), len(topo.get_routes()), lp_bound))
+        return ColumnGenerationResult(eepran_model, solution, lp_bound, steps)
+
+    def __get_prices(self, eepran_model: EEPRANModel, relaxation: LPRelaxation) -> DualPrices:
+        """ :returns: The dual prices of the solved LP master """
+        structure = eepran_model.structure
+        topo = self.topo
+
+        def dual_values(constraints: list) -> list[float]:
+            return relaxation.model.dual_values([relaxation.model.get_constraint_by_index(constraint.index)
+                                                 for constraint in constraints])
+
+        hw_keys = list(structure.processingConstraints.keys())
+        processing = dual_values([structure.processingConstraints[hw_key] for hw_key in hw_keys])
+        low_ceils = dual_values([structure.lowCeilConstraints[hw_key] for hw_key in hw_keys])
+        high_ceils = dual_values([structure.highCeilConstraints[hw_key] for hw_key in hw_keys])
+        hw_prices = {hw_key: processing_dual - (low_dual + high_dual) / eepran_model.hwCapacities[hw_key]
+                     for hw_key, processing_dual, low_dual, high_dual in zip(hw_keys, processing, low_ceils,
+                                                                              high_ceils)}
+
+        link_keys = list(structure.linkCapacityConstraints.keys())
+        link_duals = dual_values([structure.linkCapacityConstraints[link_key] for link_key in link_keys])
+        link_prices = {link_key: dual / topo.get_link(link_key).port_capacity
+                       for link_key, dual in zip(link_keys, link_duals)}
+
+        centralization_gain = 1 - dual_values([eepran_model.centralizationContraint])[0]
+        ceil_keys = list(structure.vnfLowCeilConstraints.keys())
+        low_ceils = dual_values([structure.vnfLowCeilConstraints[key] for key in ceil_keys])
+        high_ceils = dual_values([structure.vnfHighCeilConstraints[key] for key in ceil_keys])
+        pair_gains = {(key.node_key, key.function_key): centralization_gain + (low_dual + high_dual) /
+                      structure.maximumCentralization
+                      for key, low_dual, high_dual in zip(ceil_keys, low_ceils, high_ceils)}
+
+        bs_keys = list(structure.singleRouteConstraints.keys())
+        bs_duals = dict(zip(bs_keys, dual_values([structure.singleRouteConstraints[bs_key] for bs_key in bs_keys])))
+
+        return DualPrices(hw_prices, link_prices, pair_gains, centralization_gain, bs_duals)
+
+    def __price_base_station(self, bs_key: str, prices: DualPrices, origin_labels: dict[int, dict],
+                             vnf_gops: dict[str, float], users: float, routes_per_bs: int,
+                             signatures: set) -> list[tuple[float, list]]:
+        """ :returns: The (reduced cost, crosshaul links) of the best new routes of the base station """
+        priced_routes = []
+        for drc in self.splits:
+            priced_route = self.__find_route(bs_key, drc, prices, origin_labels[drc.identifier], vnf_gops, users)
+            if priced_route is None and len(self.drcCrosshauls[drc.identifier]) > 1:
+                # the shared labels of the first crosshaul may all pass through the base station node
+                priced_route = self.__find_route(bs_key, drc, prices,
+                                                 self.__get_origin_labels(drc, prices, self.bsNodes[bs_key]),
+                                                 vnf_gops, users)
+            if priced_route is None:
+                continue
+            cost, crosshauls = priced_route
+            reduced_cost = -cost - prices.bs_duals.get(bs_key, 0.0)
+            if reduced_cost > COLUMN_GENERATION_TOLERANCE or len(prices.bs_duals) == 0:
+                priced_routes.append((reduced_cost, crosshauls))
+
+        priced_routes.sort(key=lambda priced: -priced[0])
+        new_routes = []
+        new_signatures = set()
+        for reduced_cost, crosshauls in priced_routes:
+            signature = self.__get_signature(bs_key, crosshauls)
+            if signature in signatures or signature in new_signatures:
+                continue
+            new_signatures.add(signature)
+            new_routes.append((reduced_cost, crosshauls))
+            if len(new_routes) == routes_per_bs:
+                break
+        return new_routes
+
+    def __get_origin_labels(self, drc: Drc, prices: DualPrices, excluded_node: str = None) -> dict[str, list[tuple]]:
+        """
+        Returns the labels of the first crosshaul of a DRC at each node it reaches from the origin node.
+
+        The first crosshaul does not depend on the base station (its link costs scale with the bandwidth of
+        the base station), so its labels are found once per DRC and pricing round and shared by every base
+        station. Labels are (link price, delay, tie breaker, visited nodes, links), without dominated ones, and
+        never visit the excluded node.
+        """
+        _, _, budget, _ = self.drcCrosshauls[drc.identifier][0]
+        buffer_size = get_buffer_size(drc)
+
+        counter = itertools.count()
+        start = (0.0, 0.0, next(counter), (self.originNode,), ())
+        fronts = {self.originNode: [start]}
+        labels = [start]
+        while len(labels) > 0:
+            label = heapq.heappop(labels)
+            price, delay, _, visited, links = label
+            if label not in fronts[visited[-1]]:
+                continue
+            for neighbor in self.neighbors.get(visited[-1], []):
+                if neighbor in visited or neighbor == excluded_node:
+                    continue
+                link = (visited[-1], neighbor)
+                link_delay = delay + self.delayBound.link_delay(link, buffer_size)
+                if link_delay > budget:
+                    continue
+                new_label = (price + prices.link_prices.get(str(link), 0.0), link_delay, next(counter),
+                             visited + (neighbor,), links + (link,))
+                if _add_label(fronts.setdefault(neighbor, []), new_label):
+                    heapq.heappush(labels, new_label)
+        return fronts
+
+    def __get_reach(self, bs_key: str, drc: Drc) -> list[dict[str, float]]:
+        """
+        Returns, for each crosshaul of a DRC after the first one, the minimum delay from each node to the end of
+        the crosshaul (its hardware link included) on a way to the base station node, for the nodes within the
+        delay budget of the crosshaul.
+        """
+        crosshauls = self.drcCrosshauls[drc.identifier]
+        buffer_size = get_buffer_size(drc)
+
+        reach = [{} for _ in crosshauls]
+        ends = [self.bsNodes[bs_key]]
+        for crosshaul in range(len(crosshauls) - 1, 0, -1):
+            _, _, budget, _ = crosshauls[crosshaul]
+            distances = {}
+            labels = []
+            for node in ends:
+                hw_delays = [self.delayBound.link_delay((node, hw_key), buffer_size)
+                             for hw_key in self.nodeHardwares.get(node, [])]
+                if len(hw_delays) > 0 and min(hw_delays) <= budget:
+                    distances[node] = min(hw_delays)
+                    heapq.heappush(labels, (distances[node], node))
+
+            while len(labels) > 0:
+                distance, node = heapq.heappop(labels)
+                if distance > distances[node]:
+                    continue
+                for neighbor in self.neighbors.get(node, []):
+                    neighbor_distance = distance + self.delayBound.link_delay((neighbor, node), buffer_size)
+                    if neighbor_distance <= budget and neighbor_distance < distances.get(neighbor, math.inf):
+                        distances[neighbor] = neighbor_distance
+                        heapq.heappush(labels, (neighbor_distance, neighbor))
+
+            reach[crosshaul] = distances
+            ends = list(distances.keys())
+        return reach
+
+    def __find_route(self, bs_key: str, drc: Drc, prices: DualPrices, origin_labels: dict[str, list[tuple]],
+                     vnf_gops: dict[str, float], users: float) -> tuple[float, list]:
+        """
+        Finds the cheapest route of a DRC from the origin node to the base station node.
+
+        The labels of the first crosshaul (see __get_origin_labels()) end in a hardware of their node, then
+        labels (cost, delay of the actual crosshaul) are extended link by link and a non-empty crosshaul ends
+        in a hardware of its endpoint node, the fronthaul in the base station node. Labels dominated in cost
+        and delay by a label at the same node and crosshaul are discarded, as well as labels that cannot end
+        their crosshaul within its delay budget (see __get_reach()).
+
+        Returns
+        -------
+
+        The cost (the reduced cost of the route, with opposite sign, without the single route dual) and the
+        [backhaul, midhaul, fronthaul] links of the route, or None if no route meets the DRC delays.
+        """
+        crosshauls = self.drcCrosshauls[drc.identifier]
+        drc_embb = self.drcDictEmbb[drc.identifier]
+        buffer_size = get_buffer_size(drc)
+        bandwidths = [getattr(drc_embb, attribute) * self.throughput * users * 10 ** (-9)
+                      for _, attribute, _, _ in crosshauls]
+        bs_node = self.bsNodes[bs_key]
+        reach = self.__get_reach(bs_key, drc)
+        tolerance = CrosshaulDelayBound.TOLERANCE
+
+        best = None
+        fronts: dict[tuple, list[tuple]] = {}
+        counter = itertools.count()
+        # (cost, delay, tie breaker, node, crosshaul, visited nodes, links of each crosshaul)
+        labels = []
+
+        def end_crosshaul(cost, delay, node, crosshaul, visited, links) -> None:
+            """ Ends the crosshaul in each hardware of the node, placing its VNFs there """
+            nonlocal best
+            _, _, budget, functions = crosshauls[crosshaul]
+            is_last = crosshaul == len(crosshauls) - 1
+            if (node != bs_node) if is_last else (node == bs_node or node not in reach[crosshaul + 1]):
+                return
+
+            for hw_key in self.nodeHardwares.get(node, []):
+                hw_link = (node, hw_key)
+                if delay + self.delayBound.link_delay(hw_link, buffer_size) > budget:
+                    continue
+                hw_cost = cost + bandwidths[crosshaul] * prices.link_prices.get(str(hw_link), 0.0)
+                for function in functions:
+                    hw_cost += (vnf_gops[function] * prices.hw_prices.get(hw_key, 0.0) -
+                                prices.pair_gains.get((node, function), prices.centralization_gain))
+                ended_links = links[:-1] + (links[-1] + (hw_link,),)
+                if is_last:
+                    if best is None or hw_cost < best[0]:
+                        best = (hw_cost, ended_links)
+                else:
+                    label = (hw_cost, 0.0, next(counter), node, crosshaul + 1, visited, ended_links + ((),))
+                    if _add_label(fronts.setdefault((node, crosshaul + 1, False), []), label):
+                        heapq.heappush(labels, label)
+
+        for node, node_labels in origin_labels.items():
+            for price, delay, _, visited, links in node_labels:
+                # the base station node only ends the fronthaul
+                if len(links) > 0 and (len(crosshauls) == 1 or bs_node not in visited):
+                    end_crosshaul(bandwidths[0] * price, delay, node, 0, visited, (links,))
+
+        while len(labels) > 0:
+            label = heapq.heappop(labels)
+            cost, delay, _, node, crosshaul, visited, links = label
+            if label not in fronts[(node, crosshaul, len(links[-1]) > 0)]:
+                continue
+            if len(links[-1]) > 0:
+                end_crosshaul(cost, delay, node, crosshaul, visited, links)
+
+            _, _, budget, _ = crosshauls[crosshaul]
+            for neighbor in self.neighbors.get(node, []):
+                if (neighbor in visited or neighbor not in reach[crosshaul] or
+                        (neighbor == bs_node and crosshaul < len(crosshauls) - 1)):
+                    continue
+                link = (node, neighbor)
+                link_delay = delay + self.delayBound.link_delay(link, buffer_size)
+                if link_delay + reach[crosshaul][neighbor] > budget + tolerance:
+                    continue
+                new_label = (cost + bandwidths[crosshaul] * prices.link_prices.get(str(link), 0.0), link_delay,
+                             next(counter), neighbor, crosshaul, visited + (neighbor,),
+                             links[:-1] + (links[-1] + (link,),))
+                if _add_label(fronts.setdefault((neighbor, crosshaul, True), []), new_label):
+                    heapq.heappush(labels, new_label)
+
+        if best is None:
+            return None
+
+        cost, route_links = best
+        route = [[] for _ in CROSSHAULS]
+        for (position, _, _, _), crosshaul_links in zip(crosshauls, route_links):
+            route[position] = list(crosshaul_links)
+        return cost, route
+
+    def __add_routes(self, bs_key: str, priced_routes: list[tuple[float, list]], signatures: set) -> int:
+        """ :returns: The amount of priced routes added to the topology """
+        for _, route in priced_routes:
+            self.topo.add_route(self.originNode, bs_key, route)
+            signatures.add(self.__get_signature(bs_key, route))
+        return len(priced_routes)
+
+    @staticmethod
+    def __get_signature(bs_key: str, route: list) -> tuple:
+        """ :returns: A key identifying the route of a base station by its crosshaul links """
+        return (bs_key,) + tuple(tuple(str(tuple(link)) for link in crosshaul) for crosshaul in route)
+
+
+def _add_label(front: list[tuple], label: tuple) -> bool:
+    """
+    Adds a (cost, delay, ...) label to the Pareto front of its node, removing the labels it dominates.
+
+    :returns: False if a label of the front dominates it (the front is left unchanged)
+    """
+    if any(other[0] <= label[0] and other[1] <= label[1] for other in front):
+        return False
+    front[:] = [other for other in front if other[0] < label[0] or other[1] < label[1]]
+    front.append(label)
+    return True
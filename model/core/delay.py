@@ -0,0 +1,151 @@
+import numpy
+
+from core.drc import *
+from core.route import *
+
+PACKET_SIZE = 12368.0
+SWITCH_PROCESSING_DELAY = 0.005  # Switch Electrical Processing Delay (0.005 ms)
+SPLITS7_2 = [1, 2, 4, 6, 9]
+SPLITS6 = [62]
+
+
+def get_buffer_size(drc: Drc) -> int:
+    """ :returns: The amount of packets buffered on each switch of the crosshaul for the given DRC """
+    buffer_size = 0
+    if drc.identifier in SPLITS6:
+        buffer_size = 2
+    elif drc.identifier in SPLITS7_2:
+        buffer_size = 2
+    return buffer_size
+
+
+def get_crosshaul_delay(propagation_delay: float, crosshaul: list, get_link, buffer_size: int) -> float:
+    """ :returns: The delay of a crosshaul, its propagation delay plus the switching delays of each link """
+    delay = propagation_delay
+    for link_key in crosshaul:
+        # a logical link (see LogicalLink) switches on each of its physical links
+        for link in get_link(str(link_key)).get_physical_links():
+            delay += SWITCH_PROCESSING_DELAY
+            delay += PACKET_SIZE / (link.port_capacity * 10 ** 9) * 10**3  # Transmission Delay
+            delay += buffer_size * PACKET_SIZE / (link.port_capacity * 10 ** 9) * 10**3  # Buffer Delay
+    return delay
+
+
+class CrosshaulDelayTable:
+    """
+    Fronthaul, midhaul and backhaul delays of every route, computed once for each distinct buffer size.
+
+    The delays are stored in NumPy arrays indexed by the route position in the topology route list,
+    so the DRC delay requirements can be checked for all routes with a single vectorized comparison.
+    """
+
+    def __init__(self, routes: list[Route], get_link, buffer_sizes: list[int]) -> None:
+        self.route_positions = {route.identifier: position for position, route in enumerate(routes)}
+        self.fronthaul: dict[int, numpy.ndarray] = {}
+        self.midhaul: dict[int, numpy.ndarray] = {}
+        self.backhaul: dict[int, numpy.ndarray] = {}
+
+        for buffer_size in sorted(set(buffer_sizes)):
+            fronthaul = numpy.empty(len(routes))
+            midhaul = numpy.empty(len(routes))
+            backhaul = numpy.empty(len(routes))
+            for position, route in enumerate(routes):
+                # Optical Propagation Delay (5 us/km) plus the switching delays of each crosshaul link
+                fronthaul[position] = get_crosshaul_delay(route.delay_fronthaul, route.fronthaul,
+                                                          get_link, buffer_size)
+                midhaul[position] = get_crosshaul_delay(route.delay_midhaul, route.midhaul,
+                                                        get_link, buffer_size)
+                backhaul[position] = get_crosshaul_delay(route.delay_backhaul, route.backhaul,
+                                                         get_link, buffer_size)
+
+            self.fronthaul[buffer_size] = fronthaul
+            self.midhaul[buffer_size] = midhaul
+            self.backhaul[buffer_size] = backhaul
+
+    def has_buffer_size(self, buffer_size: int) -> bool:
+        return buffer_size in self.fronthaul
+
+    def feasible_routes(self, drc: Drc) -> numpy.ndarray:
+        """ :returns: A boolean array indexed by route position, True where the route meets the DRC delays """
+        buffer_size = get_buffer_size(drc)
+        return ((self.fronthaul[buffer_size] <= drc.delay_fh) &
+                (self.midhaul[buffer_size] <= drc.delay_mh) &
+                (self.backhaul[buffer_size] <= drc.delay_bh))
+
+
+class CrosshaulDelayBound:
+    """
+    Delay-aware pruning of paths and routes before they reach the model.
+
+    Paths are checked while they are enumerated from the base station towards the origin: for each DRC,
+    the links of the partial path are greedily packed into its fronthaul, midhaul and backhaul delay
+    budgets. The hardware links and the non-empty crosshaul requirement are ignored, so a path is only
+    discarded when none of its routes could meet the delays of any DRC. Routes are then checked exactly,
+    as CrosshaulDelayTable.feasible_routes().
+    """
+
+    # slack for the different float accumulation order of the path bound
+    TOLERANCE = 1e-9
+
+    def __init__(self, drcs: list[Drc], get_link) -> None:
+        # (amount of crosshauls, fronthaul/midhaul/backhaul budgets, buffer size) of each distinct DRC requirement
+        requirements = set()
+        for drc in drcs:
+            requirements.add((drc.num_needed_nodes(), (drc.delay_fh, drc.delay_mh, drc.delay_bh),
+                              get_buffer_size(drc)))
+        self.requirements = sorted(requirements)
+        self.get_link = get_link
+        self.__link_delays = {}
+
+    def link_delay(self, link_key: tuple, buffer_size: int) -> float:
+        """ :returns: The propagation and switching delays added by the link to its crosshaul """
+        link_delay = self.__link_delays.get((link_key, buffer_size))
+        if link_delay is None:
+            link = self.get_link(str(link_key))
+            link_delay = link.delay
+            for physical_link in link.get_physical_links():
+                link_delay += (SWITCH_PROCESSING_DELAY +
+                               (1 + buffer_size) * PACKET_SIZE / (physical_link.port_capacity * 10 ** 9) * 10 ** 3)
+            self.__link_delays[(link_key, buffer_size)] = link_delay
+        return link_delay
+
+    def start(self) -> tuple:
+        """ :returns: The state of an empty path, one (crosshaul, accumulated delay) pair per requirement """
+        return tuple((0, 0.0) for _ in self.requirements)
+
+    def extend(self, state: tuple, link_key: tuple) -> tuple:
+        """ :returns: The state after adding the link towards the origin, or None if no DRC can be met anymore """
+        new_state = []
+        feasible = False
+        for (num_crosshauls, budgets, buffer_size), requirement_state in zip(self.requirements, state):
+            if requirement_state is None:
+                new_state.append(None)
+                continue
+
+            crosshaul, delay = requirement_state
+            link_delay = self.link_delay(link_key, buffer_size)
+            delay += link_delay
+            while crosshaul < num_crosshauls and delay > budgets[crosshaul] + self.TOLERANCE:
+                crosshaul += 1
+                delay = link_delay
+
+            if crosshaul == num_crosshauls:
+                new_state.append(None)
+            else:
+                new_state.append((crosshaul, delay))
+                feasible = True
+
+        return tuple(new_state) if feasible else None
+
+    def meets_delays(self, route: Route) -> bool:
+        """ :returns: True if the route meets the delay requirements of some DRC placed on it """
+        qty_nodes = route.qty_nodes()
+        for num_crosshauls, (delay_fh, delay_mh, delay_bh), buffer_size in self.requirements:
+            if num_crosshauls != qty_nodes:
+                continue
+            fronthaul = get_crosshaul_delay(route.delay_fronthaul, route.fronthaul, self.get_link, buffer_size)
+            midhaul = get_crosshaul_delay(route.delay_midhaul, route.midhaul, self.get_link, buffer_size)
+            backhaul = get_crosshaul_delay(route.delay_backhaul, route.backhaul, self.get_link, buffer_size)
+            if fronthaul <= delay_fh and midhaul <= delay_mh and backhaul <= delay_bh:
+                return True
+        return False
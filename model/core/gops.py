@@ -0,0 +1,156 @@
+import math
+
+import numpy
+
+from core.node import *
+
+CR_MODE_CALC = "calc"
+CR_MODE_HP = "hp"
+CR_MODE_HL = "hl"
+
+VIRTUAL_NETWORK_FUNCTIONS = ['f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8']
+GOPS_COMPONENTS = ['c_modulation', 'c_mapping', 'c_channel_coding', 'c_control', 'c_network',
+                   'high_phy', 'high_layer']
+
+
+def compute_vnf_gops_array(bs: BaseStation, users: numpy.ndarray, cr_mode: str = CR_MODE_CALC) -> dict:
+    """
+    Evaluates the massive-MIMO GOPS model for any amount of base station loads at once.
+
+    Parameters
+    ----------
+
+    bs : BaseStation
+        The base station profile.
+    users : numpy.ndarray
+        The amount of users of each load, of any shape.
+    cr_mode : str
+        How the high PHY and high layer GOPS are related (CR_MODE_CALC, CR_MODE_HP or CR_MODE_HL).
+
+    Returns
+    -------
+
+    A dict with one array (shaped as users) per VNF (f2...f8) and per GOPS component.
+    """
+    users = numpy.asarray(users, dtype=float)
+
+    # c_filter = 40 * bs.num_antennas * bs.sampling_frequency / 10**9
+    # c_dft = (8 * bs.num_antennas * bs.num_subcarriers * math.log2(bs.num_subcarriers)) / (bs.ofdm_symbol_duration * 10**9)
+
+    c_precoding = (bs.num_used_subcarriers / (bs.ofdm_symbol_duration * bs.tau_c * 10 ** 9)) * \
+                  (8 * bs.num_antennas * bs.tau_p ** 2 + 8 * bs.num_antennas ** 2 * (
+                          bs.tau_p + users)) + \
+                  (bs.num_used_subcarriers * bs.tau_d / (bs.ofdm_symbol_duration * bs.tau_c * 10 ** 9)) * \
+                  (8 * bs.num_antennas * users) + \
+                  (bs.num_used_subcarriers / (bs.ofdm_symbol_duration * bs.tau_c * 10 ** 9)) * \
+                  (8 * bs.num_antennas * users) + \
+                  (bs.num_used_subcarriers / (bs.ofdm_symbol_duration * bs.tau_c * 10 ** 9)) * \
+                  ((4 * bs.num_antennas ** 2 + 4 * bs.num_antennas) * bs.tau_p + 8 * bs.num_antennas ** 2 *
+                   users + 8 * (bs.num_antennas ** 3 - bs.num_antennas) / 3)
+
+    c_modulation = numpy.full(users.shape, 1.3 * (bs.bit_quantization / 16) ** 1.2 * bs.num_antennas)
+    c_mapping = 1.3 * (bs.bit_quantization / 16) ** 1.2 * (bs.spectral_efficiency / 6) ** 1.5 * users
+    c_channel_coding = 1.3 * (bs.bit_quantization / 16) ** 1.2 * (bs.spectral_efficiency / 6) * users
+
+    c_control = numpy.full(users.shape, 2.7 * (bs.bit_quantization / 16) ** 0.2 * math.sqrt(bs.num_antennas))
+    c_network = 8.0 * (bs.spectral_efficiency / 6) * users
+
+    # low_phy_gops = c_filter + c_dft
+    high_phy_gops = c_precoding + c_modulation + c_mapping
+    high_layer_gops = c_channel_coding + c_control + c_network
+
+    if cr_mode == CR_MODE_HP:
+        high_layer_gops = high_phy_gops / 0.327 - high_phy_gops
+    elif cr_mode == CR_MODE_HL:
+        high_phy_gops = high_layer_gops / 0.673 - high_layer_gops
+
+    return {'f2': high_phy_gops,
+            'f3': 0.2 * high_layer_gops,
+            'f4': 0.2 * high_layer_gops,
+            'f5': 0.014 * high_layer_gops,
+            'f6': 0.014 * high_layer_gops,
+            'f7': 0.286 * high_layer_gops,
+            'f8': 0.286 * high_layer_gops,
+            'c_modulation': c_modulation,
+            'c_mapping': c_mapping,
+            'c_channel_coding': c_channel_coding,
+            'c_control': c_control,
+            'c_network': c_network,
+            'high_phy': high_phy_gops,
+            'high_layer': high_layer_gops}
+
+
+def compute_vnf_gops(bs: BaseStation, users: int, cr_mode: str = CR_MODE_CALC) -> dict[str, float]:
+    """ :returns: The GOPS of each VNF (and its components) of a base station serving the given amount of users """
+    return {key: float(value) for key, value in compute_vnf_gops_array(bs, users, cr_mode).items()}
+
+
+class GopsTable:
+    """
+    GOPS of every VNF for every base station and timestamp of a usage matrix.
+
+    The table is computed in a single vectorized evaluation of the GOPS model, so model builders
+    (and capacity planning, which does not need a MIP) only index it.
+    """
+
+    def __init__(self, bs: BaseStation, usage: numpy.ndarray, base_station_keys: list[str],
+                 cr_mode: str = CR_MODE_CALC) -> None:
+        """
+        Parameters
+        ----------
+
+        bs : BaseStation
+            The base station profile, shared by every base station.
+        usage : numpy.ndarray
+            The amount of users of each base station (columns) at each timestamp (rows).
+        base_station_keys : list
+            The base station key of each usage column.
+        cr_mode : str
+            How the high PHY and high layer GOPS are related (CR_MODE_CALC, CR_MODE_HP or CR_MODE_HL).
+        """
+        self.bs = bs
+        self.cr_mode = cr_mode
+        self.usage = numpy.asarray(usage)
+        self.base_station_keys = list(base_station_keys)
+
+        table = compute_vnf_gops_array(bs, self.usage, cr_mode)
+        # timestamp x base station x VNF
+        self.gops = numpy.stack([table[function] for function in VIRTUAL_NETWORK_FUNCTIONS], axis=-1)
+        # timestamp x base station x component
+        self.components = numpy.stack([table[component] for component in GOPS_COMPONENTS], axis=-1)
+
+        single_user = compute_vnf_gops_array(bs, numpy.ones(len(self.base_station_keys)), cr_mode)
+        self.__single_user_gops = numpy.stack([single_user[function] for function in VIRTUAL_NETWORK_FUNCTIONS],
+                                              axis=-1)
+        self.__single_user_components = numpy.stack([single_user[component] for component in GOPS_COMPONENTS],
+                                                    axis=-1)
+
+    def get_users(self, timestamp: int) -> numpy.ndarray:
+        """ :returns: The amount of users of each base station, timestamp -1 means one user per base station """
+        if timestamp == -1:
+            return numpy.ones(len(self.base_station_keys), dtype=self.usage.dtype)
+        return self.usage[timestamp]
+
+    def get_gops(self, timestamp: int) -> numpy.ndarray:
+        """ :returns: A (base station x VNF) array, timestamp -1 means one user per base station """
+        if timestamp == -1:
+            return self.__single_user_gops
+        return self.gops[timestamp]
+
+    def get_node_vnf_gops(self, timestamp: int) -> dict[str, dict[str, float]]:
+        """ :returns: The GOPS of each VNF (and its components) per base station key, as compute_vnf_gops() """
+        gops = self.get_gops(timestamp).tolist()
+        components = (self.__single_user_components if timestamp == -1 else self.components[timestamp]).tolist()
+        node_vnf_gops = {}
+        for bs_key, bs_gops, bs_components in zip(self.base_station_keys, gops, components):
+            node_vnf_gops[bs_key] = dict(zip(VIRTUAL_NETWORK_FUNCTIONS, bs_gops))
+            node_vnf_gops[bs_key].update(zip(GOPS_COMPONENTS, bs_components))
+        return node_vnf_gops
+
+    def get_total_gops(self) -> numpy.ndarray:
+        """ :returns: The GOPS demanded by all base stations at each timestamp """
+        return self.gops.sum(axis=(1, 2))
+
+    def get_minimum_hardware_units(self, gops_capacity: float) -> numpy.ndarray:
+        """ :returns: A lower bound of the hardware units needed at each timestamp, without building a MIP """
+        return numpy.ceil(self.get_total_gops() / gops_capacity).astype(int)
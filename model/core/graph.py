@@ -3,6 +3,7 @@ import collections
 class Graph:
     def __init__(self):
         self.vertices = []
+        self.__vertex_set = set()
         self.graph = collections.defaultdict(list)
         self.cost = {}
         self.paths = []
@@ -15,35 +16,52 @@ class Graph:
     def get_paths(self) -> list:
         return self.paths
 
-    def __find_all_paths(self, source: int, destination: int, has_been_visited: list, 
-                        actual_path: list, k: int):
-        has_been_visited[source] = True
-        actual_path.append(source)
+    def add_edge(self, source: int, destination: int, delay: float = 0):
+        if source not in self.__vertex_set:
+            self.__vertex_set.add(source)
+            self.vertices.append(source)
+        if destination not in self.__vertex_set:
+            self.__vertex_set.add(destination)
+            self.vertices.append(destination)
+        self.graph[source].append(destination)
+        self.cost[(source, destination, 'delay')] = delay
+
+    def find_all_paths(self, source: int, destination: int, k: int = 4):
+        """
+        Appends to paths the simple paths from source to destination (except the __is_cycle ones) in
+        depth-first order. Only the first k - 1 paths found are kept and the search stops at the k-th one.
 
+        The search uses an explicit stack, so it is not bounded by the recursion limit.
+        """
+        self.actual_paths_counter = 0
+        actual_path = [source]
         if source == destination:
             if not self.__is_cycle(actual_path):
                 self.actual_paths_counter += 1
                 if self.actual_paths_counter < k:
                     self.paths.append(actual_path.copy())
-        else:
-            for node in self.graph[source]:
-                if has_been_visited[node]:
-                    continue
-                self.__find_all_paths(node, destination, has_been_visited, actual_path, k)
+            return
 
-        actual_path.pop()
-        has_been_visited[source] = False
+        has_been_visited = {source}
+        # iterators over the neighbors of each node of the actual path
+        stack = [iter(self.graph[source])]
+        while stack and self.actual_paths_counter < k:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                has_been_visited.discard(actual_path.pop())
+                continue
+            if node in has_been_visited:
+                continue
 
-    def add_edge(self, source: int, destination: int, delay: float = 0):
-        if source not in self.vertices:
-            self.vertices.append(source)
-        if destination not in self.vertices:
-            self.vertices.append(destination)
-        self.graph[source].append(destination)
-        self.cost[(source, destination, 'delay')] = delay
+            actual_path.append(node)
+            if node == destination:
+                if not self.__is_cycle(actual_path):
+                    self.actual_paths_counter += 1
+                    if self.actual_paths_counter < k:
+                        self.paths.append(actual_path.copy())
+                actual_path.pop()
+                continue
 
-    def find_all_paths(self, source: int, destination: int, k: int = 4):
-        has_been_visited = {key: False for key in self.vertices}
-        path = []
-        self.actual_paths_counter = 0
-        self.__find_all_paths(source, destination, has_been_visited, path, k)
\ No newline at end of file
+            has_been_visited.add(node)
+            stack.append(iter(self.graph[node]))
@@ -0,0 +1,472 @@
+import logging
+import time
+
+import scipy.sparse
+
+from core.solution import *
+
+# allowed excess over a hardware or link capacity, absorbs the rounding of the summed loads
+CAPACITY_TOLERANCE = 10 ** (-9)
+# extra passes of GreedyPlacement.solve() while base stations are left out
+GREEDY_REPAIR_PASSES = 8
+
+# rounds of solve_lp_rounding(), the first one rounds each base station to its candidate with the highest LP value
+LP_ROUNDING_ROUNDS = 10
+
+# candidates selected, base stations (positions) left out and resulting usages of a greedy pass
+GreedyPass = namedtuple('GreedyPass', ['selected', 'unassigned', 'hw_usage', 'link_usage', 'pair_counts'])
+# best repaired round, LP bound of the centralization, relative gap between them and centralization of each
+# round (the first one is the plain greedy placement)
+LPRoundingResult = namedtuple('LPRoundingResult', ['solution', 'lp_bound', 'gap', 'centralizations'])
+
+
+class GreedySolution(PlacementView):
+    """
+    Placement found by GreedyPlacement.solve(), with the same values a SolutionView reports for a solved model.
+
+    Candidates follow GreedyPlacement.keys, hardwares follow hwKeys (Topology.get_hardware_keys()) and links
+    follow linkKeys. Base stations that no candidate fits are left out of the selection (see unassigned).
+    """
+
+    def __init__(self, greedy: 'GreedyPlacement', selected: numpy.ndarray, y: numpy.ndarray, hw_usage: numpy.ndarray,
+                 link_usage: numpy.ndarray, centralization: float, ran_power: float, net_power: float,
+                 mig_power: float, unassigned: list[str]) -> None:
+        super().__init__(greedy.topo, greedy.splits, greedy.keys, selected, greedy.hwKeys, y, greedy.hwKeys, hw_usage,
+                         greedy.linkKeys, link_usage)
+        self.greedy = greedy
+        self.objectiveValue = centralization
+        self.centralization = centralization
+        self.ranPower = ran_power
+        self.netPower = net_power
+        self.migPower = mig_power
+        self.unassigned = unassigned
+
+    def is_complete(self) -> bool:
+        """ :returns: True if every base station has a candidate """
+        return len(self.unassigned) == 0
+
+    def get_x_values(self) -> dict:
+        """ :returns: The X value of each selected decision key, see EEPRANModel.add_warm_start() """
+        return {key: 1 for key in self.get_selected_keys()}
+
+
+class GreedyPlacement:
+    """
+    Solver-free constructive placement of the EEPRAN problem.
+
+    Uses the candidates, VNF placements, link usages and capacities of build_eepran_model(), but instead of
+    solving the MIP, base stations are placed one at a time in first-fit-decreasing order: the base stations
+    with the highest GOPS demand go first, and each one takes the candidate that fits the residual hardware
+    and link capacities and adds the most centralization (VNFs joining a node that already runs that VNF).
+    Ties go to the candidates whose (node, VNF) pairs are reachable by the most base stations, then to the
+    lowest added power (turning on a new hardware unit, dynamic, network and migration power). solve() can
+    also start from rounded candidates (e.g. of an LP relaxation), only the base stations on overloaded
+    hardwares or links are then placed by the greedy.
+
+    The load independent part is built once, so solve() can be called for many timestamps (e.g. for what-if
+    analysis or as the MIP start of EEPRANModel.add_warm_start() through GreedySolution.get_x_values()).
+    """
+
+    def __init__(self, topo: Topology, service: str = SERVICE_URLLC, cr_mode: str = CR_MODE_CALC) -> None:
+        build_start = time.time()
+
+        self.topo = topo
+        self.crMode = cr_mode
+        self.splits, self.drcDict, self.drcDictEmbb, self.throughput, self.vnfMigCost = get_service_data(service)
+        self.maximumCentralization = len(VIRTUAL_NETWORK_FUNCTIONS) * len(topo.get_base_station_keys())
+
+        index = topo.get_index()
+        self.hwKeys = index.hardwares.keys
+        self.linkKeys = index.directed_links.keys
+        bs_keys = index.base_stations.keys
+
+        # ---------- Candidates (grouped by base station) ----------
+        delay_table = topo.get_crosshaul_delay_table(self.splits)
+        feasible_routes = {drc.identifier: delay_table.feasible_routes(drc) for drc in self.splits}
+        candidate_index = CandidateIndex(topo.get_routes(), self.splits, bs_keys)
+        keys_by_bs = group_keys_by_base_station(candidate_index.generate_keys(feasible_routes), bs_keys)
+        self.keys = [key for bs_key in bs_keys for key in keys_by_bs[bs_key]]
+        self.keyPositions = {key: position for position, key in enumerate(self.keys)}
+        self.bsOffsets = numpy.cumsum([0] + [len(keys_by_bs[bs_key]) for bs_key in bs_keys])
+        self.keyBss = numpy.repeat(numpy.arange(len(bs_keys)), numpy.diff(self.bsOffsets))
+
+        # ---------- VNF placements and link usages of each candidate ----------
+        function_positions = {function: position for position, function in enumerate(VIRTUAL_NETWORK_FUNCTIONS)}
+        placement_terms = []
+        link_terms = []
+        migration_terms = []
+        for position, key in enumerate(self.keys):
+            route = topo.get_route(key.route_id)
+            drc = self.drcDict[key.drc_id]
+
+            for function in VIRTUAL_NETWORK_FUNCTIONS:
+                node_key = None
+                hw_key = None
+                if route.has_backhaul() and function in drc.fs_cu:
+                    node_key = route.get_backhaul_node_key()
+                    hw_key = route.get_backhaul_hardware_key()
+                elif route.has_midhaul() and function in drc.fs_du:
+                    node_key = route.get_midhaul_node_key()
+                    hw_key = route.get_midhaul_hardware_key()
+                elif function in drc.fs_ru:
+                    node_key = route.get_fronthaul_node_key()
+                    hw_key = route.get_fronthaul_hardware_key()
+
+                if node_key is None or hw_key is None:
+                    continue
+                placement_terms.append((position, function_positions[function], index.nodes.ids[node_key],
+                                        index.hardwares.ids[hw_key]))
+
+            for bandwidth_attribute, link_keys in (('bandwidth_bh', route.get_backhaul_links()),
+                                                   ('bandwidth_mh', route.get_midhaul_links()),
+                                                   ('bandwidth_fh', route.get_fronthaul_links())):
+                bandwidth = getattr(self.drcDictEmbb[key.drc_id], bandwidth_attribute) * self.throughput * 10 ** (-9)
+                for link_key in link_keys:
+                    link_terms.append((position, index.directed_links.ids[link_key], bandwidth))
+
+            # the VNFs that may migrate, as EEPRANStructure.keyMigrations
+            for functions, hw_key in ((drc.fs_cu, route.get_backhaul_hardware_key()),
+                                      (drc.fs_du, route.get_midhaul_hardware_key()),
+                                      (drc.fs_ru, route.get_fronthaul_hardware_key())):
+                for function in functions:
+                    if function in function_positions:
+                        migration_terms.append((position, function_positions[function],
+                                                index.hardwares.ids.get(hw_key, -1), self.vnfMigCost[function]))
+
+        # placements and link terms are generated in candidate order, so each candidate is a contiguous range
+        placement_terms = numpy.array(placement_terms, dtype=numpy.int64).reshape(-1, 4)
+        self.placementKeys = placement_terms[:, 0]
+        self.placementFunctions = placement_terms[:, 1]
+        self.placementHws = placement_terms[:, 3]
+        # (node, VNF) pair of each placement, numbered node * number of VNFs + VNF
+        self.placementPairs = placement_terms[:, 2] * len(VIRTUAL_NETWORK_FUNCTIONS) + placement_terms[:, 1]
+        self.placementOffsets = numpy.searchsorted(self.placementKeys, numpy.arange(len(self.keys) + 1))
+
+        link_terms = numpy.array(link_terms, dtype=float).reshape(-1, 3)
+        self.linkTermKeys = link_terms[:, 0].astype(numpy.int64)
+        self.linkTermLinks = link_terms[:, 1].astype(numpy.int64)
+        self.linkTermBandwidths = link_terms[:, 2]
+
+        migration_terms = numpy.array(migration_terms, dtype=float).reshape(-1, 4)
+        self.migrationKeys = migration_terms[:, 0].astype(numpy.int64)
+        self.migrationCodes = self.__get_placement_codes(self.keyBss[self.migrationKeys],
+                                                         migration_terms[:, 1].astype(numpy.int64),
+                                                         migration_terms[:, 2].astype(numpy.int64))
+        self.migrationCosts = migration_terms[:, 3]
+
+        # base stations able to place each (node, VNF) pair, a measure of how central the pair is
+        num_pairs = len(index.nodes) * len(VIRTUAL_NETWORK_FUNCTIONS)
+        reachable_pairs = numpy.unique(self.keyBss[self.placementKeys] * num_pairs + self.placementPairs)
+        pair_reach = numpy.bincount(reachable_pairs % num_pairs, minlength=num_pairs)
+        self.keyReach = numpy.bincount(self.placementKeys, weights=pair_reach[self.placementPairs],
+                                       minlength=len(self.keys))
+        self.numPairs = num_pairs
+
+        # ---------- Hardware and link capacities and power ----------
+        self.hwCapacities = numpy.empty(len(self.hwKeys))
+        self.hwStaticPower = numpy.empty(len(self.hwKeys))
+        self.hwDynamicPower = numpy.empty(len(self.hwKeys))
+        for hw_id in range(len(self.hwKeys)):
+            hw = topo.get_hardware_by_index(hw_id)
+            node = topo.get_node_by_index(int(index.hardware_nodes[hw_id]))
+            self.hwCapacities[hw_id] = hw.gops_capacity
+            self.hwStaticPower[hw_id] = hw.power_consumption * node.static_percentage
+            self.hwDynamicPower[hw_id] = hw.power_consumption * (1 - node.static_percentage)
+
+        self.linkCapacities = numpy.empty(len(self.linkKeys))
+        # power of each unit of bandwidth, the link power cost per port capacity
+        self.linkPowerCosts = numpy.empty(len(self.linkKeys))
+        for link_id, link_key in enumerate(self.linkKeys):
+            link = topo.get_link(link_key)
+            is_node1_switch = 1 if link.is_node1_switch else 0
+            is_node2_switch = 1 if link.is_node2_switch else 0
+            cost = ((2 * link.pluggable_transceiver_power_consumption) +
+                    (link.switch_port_power_consumption * (is_node1_switch + is_node2_switch)))
+            self.linkCapacities[link_id] = link.max_ports * link.port_capacity
+            self.linkPowerCosts[link_id] = cost / link.port_capacity
+
+        build_end = time.time()
+        logging.info('Greedy Placement Definition: {}s ({} candidates)'.format(build_end - build_start,
+                                                                               len(self.keys)))
+
+    def __get_placement_codes(self, bs_ids: numpy.ndarray, function_ids: numpy.ndarray,
+                              hw_ids: numpy.ndarray) -> numpy.ndarray:
+        """ :returns: A single integer for each (base station, VNF, hardware) placement, -1 hardwares included """
+        num_functions = len(VIRTUAL_NETWORK_FUNCTIONS)
+        return (bs_ids * num_functions + function_ids) * (len(self.hwKeys) + 1) + hw_ids + 1
+
+    def __get_migration_costs(self, actual_deployment: Deployment) -> numpy.ndarray:
+        """ :returns: The cost of the VNFs of each candidate not deployed yet, as Deployment.GetMigrationCosts() """
+        index = self.topo.get_index()
+        function_positions = {function: position for position, function in enumerate(VIRTUAL_NETWORK_FUNCTIONS)}
+        deployed = [(index.base_stations.ids[bs_key], function_positions[vnf], index.hardwares.ids[hw_key])
+                    for bs_key, vnf, hw_key in actual_deployment.GetPlacements()
+                    if vnf in function_positions and hw_key in index.hardwares]
+        deployed = numpy.array(deployed, dtype=numpy.int64).reshape(-1, 3)
+        deployed_codes = self.__get_placement_codes(deployed[:, 0], deployed[:, 1], deployed[:, 2])
+
+        migrated = ~numpy.isin(self.migrationCodes, deployed_codes)
+        return numpy.bincount(self.migrationKeys, weights=migrated * self.migrationCosts, minlength=len(self.keys))
+
+    def __round(self, rounded: numpy.ndarray, values: numpy.ndarray, demands: numpy.ndarray,
+                hw_loads: scipy.sparse.csr_matrix, link_loads: scipy.sparse.csr_matrix) -> GreedyPass:
+        """
+        Places each base station in its rounded candidate (position) and, while a hardware or link is overloaded,
+        takes out the rounded candidate using one with the lowest value (then the base station with the highest
+        demand). The base stations taken out are the unassigned ones of the returned pass.
+        """
+        hw_matrix = hw_loads[rounded]
+        link_matrix = link_loads[rounded]
+        kept = numpy.ones(len(rounded), dtype=bool)
+        removal_order = numpy.lexsort((-demands, values))
+        while True:
+            hw_usage = hw_matrix.T @ kept.astype(float)
+            link_usage = link_matrix.T @ kept.astype(float)
+            overloaded = hw_usage > self.hwCapacities + CAPACITY_TOLERANCE
+            congested = link_usage > self.linkCapacities + CAPACITY_TOLERANCE
+            if not overloaded.any() and not congested.any():
+                break
+            on_overload = kept & ((hw_matrix[:, overloaded].getnnz(axis=1) > 0) |
+                                  (link_matrix[:, congested].getnnz(axis=1) > 0))
+            kept[removal_order[on_overload[removal_order]][0]] = False
+
+        selected = numpy.sort(rounded[kept])
+        pair_counts = numpy.bincount(self.placementPairs[numpy.isin(self.placementKeys, selected)],
+                                     minlength=self.numPairs)
+        return GreedyPass(selected, self.keyBss[rounded[~kept]].tolist(), hw_usage, link_usage, pair_counts)
+
+    def __place(self, order: list[int], hw_loads: scipy.sparse.csr_matrix, link_loads: scipy.sparse.csr_matrix,
+                key_power: numpy.ndarray, start: GreedyPass) -> GreedyPass:
+        """
+        Places the base stations (by position) in the given order, each one in its best fitting candidate, over
+        the candidates and usages of the start pass.
+        """
+        hw_load_keys = numpy.repeat(numpy.arange(len(self.keys)), numpy.diff(hw_loads.indptr))
+        link_load_keys = numpy.repeat(numpy.arange(len(self.keys)), numpy.diff(link_loads.indptr))
+        hw_usage = start.hw_usage.copy()
+        link_usage = start.link_usage.copy()
+        pair_counts = start.pair_counts.copy()
+        selected = start.selected.tolist()
+        unassigned = []
+
+        for bs_position in order:
+            first, last = int(self.bsOffsets[bs_position]), int(self.bsOffsets[bs_position + 1])
+            if first == last:
+                unassigned.append(bs_position)
+                continue
+
+            hw_entries = slice(hw_loads.indptr[first], hw_loads.indptr[last])
+            hw_ids = hw_loads.indices[hw_entries]
+            hw_rows = hw_load_keys[hw_entries] - first
+            overloaded = hw_usage[hw_ids] + hw_loads.data[hw_entries] > self.hwCapacities[hw_ids] + CAPACITY_TOLERANCE
+            turned_on = self.hwStaticPower[hw_ids] * (hw_usage[hw_ids] == 0)
+
+            link_entries = slice(link_loads.indptr[first], link_loads.indptr[last])
+            link_ids = link_loads.indices[link_entries]
+            congested = (link_usage[link_ids] + link_loads.data[link_entries] >
+                         self.linkCapacities[link_ids] + CAPACITY_TOLERANCE)
+
+            fits = ((numpy.bincount(hw_rows, weights=overloaded, minlength=last - first) == 0) &
+                    (numpy.bincount(link_load_keys[link_entries] - first, weights=congested,
+                                    minlength=last - first) == 0))
+            if not fits.any():
+                unassigned.append(bs_position)
+                continue
+
+            placements = slice(self.placementOffsets[first], self.placementOffsets[last])
+            joined = numpy.bincount(self.placementKeys[placements] - first,
+                                    weights=pair_counts[self.placementPairs[placements]] > 0, minlength=last - first)
+            added_power = key_power[first:last] + 3600 * numpy.bincount(hw_rows, weights=turned_on,
+                                                                        minlength=last - first)
+
+            candidates = numpy.flatnonzero(fits)
+            best = candidates[numpy.lexsort((added_power[candidates], -self.keyReach[first:last][candidates],
+                                             -joined[candidates]))[0]]
+            key_position = first + int(best)
+            selected.append(key_position)
+
+            hw_entries = slice(hw_loads.indptr[key_position], hw_loads.indptr[key_position + 1])
+            hw_usage[hw_loads.indices[hw_entries]] += hw_loads.data[hw_entries]
+            link_entries = slice(link_loads.indptr[key_position], link_loads.indptr[key_position + 1])
+            link_usage[link_loads.indices[link_entries]] += link_loads.data[link_entries]
+            pair_counts[self.placementPairs[self.placementOffsets[key_position]:
+                                            self.placementOffsets[key_position + 1]]] += 1
+
+        return GreedyPass(numpy.sort(numpy.array(selected, dtype=numpy.int64)), unassigned, hw_usage, link_usage,
+                          pair_counts)
+
+    def solve(self, timestamp: int = -1, actual_deployment: Deployment = None,
+              repair_passes: int = GREEDY_REPAIR_PASSES, rounded_keys: dict = None) -> GreedySolution:
+        """
+        Places every base station for the load of a timestamp.
+
+        Parameters
+        ----------
+
+        timestamp : int
+            The timestamp of the base station usage, -1 means one user per base station.
+        actual_deployment : Deployment
+            The current deployment, used to define the migration costs.
+        repair_passes : int
+            The extra passes tried while base stations are left out, placing them first.
+        rounded_keys : dict
+            The rounded candidate of base stations (at most one decision key each, e.g. drawn from the X values
+            of an LP relaxation) and its value. The base stations start in their rounded candidate, those on
+            overloaded hardwares or links are taken out (lowest value first) and placed by the greedy with
+            the base stations without one.
+        """
+        solve_start = time.time()
+
+        topo = self.topo
+        num_keys = len(self.keys)
+        gops_table = topo.get_gops_table(self.crMode)
+        # the rows of the GOPS table follow Topology.get_base_station_keys(), as the base stations of the index
+        bs_keys = gops_table.base_station_keys
+        gops = gops_table.get_gops(timestamp)
+        users = gops_table.get_users(timestamp)
+
+        # ---------- Loads and power of each candidate ----------
+        placement_gops = gops[self.keyBss[self.placementKeys], self.placementFunctions]
+        link_bandwidths = self.linkTermBandwidths * users[self.keyBss[self.linkTermKeys]]
+        # (candidate x hardware) and (candidate x link) usages, repeated hardwares and links are summed
+        hw_loads = scipy.sparse.csr_matrix((placement_gops, (self.placementKeys, self.placementHws)),
+                                           shape=(num_keys, len(self.hwKeys)))
+        link_loads = scipy.sparse.csr_matrix((link_bandwidths, (self.linkTermKeys, self.linkTermLinks)),
+                                             shape=(num_keys, len(self.linkKeys)))
+
+        dynamic_power = numpy.bincount(
+            self.placementKeys, minlength=num_keys,
+            weights=placement_gops * self.hwDynamicPower[self.placementHws] / self.hwCapacities[self.placementHws])
+        net_power = numpy.bincount(self.linkTermKeys, weights=link_bandwidths * self.linkPowerCosts[self.linkTermLinks],
+                                   minlength=num_keys)
+        if actual_deployment is None:
+            mig_power = numpy.bincount(self.migrationKeys, weights=self.migrationCosts, minlength=num_keys)
+        else:
+            mig_power = self.__get_migration_costs(actual_deployment)
+
+        # ---------- First fit, base stations by decreasing demand ----------
+        # base stations left out of a pass go first in the next one, the pass leaving out the fewest is kept
+        key_power = 3600 * (dynamic_power + net_power) + mig_power
+        assignable = numpy.diff(self.bsOffsets) > 0
+        demands = gops.sum(axis=1)
+        order = numpy.argsort(-demands, kind='stable').tolist()
+        start = GreedyPass(numpy.empty(0, dtype=numpy.int64), [], numpy.zeros(len(self.hwKeys)),
+                           numpy.zeros(len(self.linkKeys)), numpy.zeros(self.numPairs, dtype=numpy.int64))
+        if rounded_keys:
+            # rounded candidates that fit are kept, the greedy only places the other base stations
+            rounded = {self.keyPositions[key]: value for key, value in rounded_keys.items() if key in self.keyPositions}
+            rounded_positions = numpy.array(list(rounded.keys()), dtype=numpy.int64)
+            start = self.__round(rounded_positions, numpy.array(list(rounded.values()), dtype=float),
+                                 demands[self.keyBss[rounded_positions]], hw_loads, link_loads)
+            rounded_bss = set(self.keyBss[start.selected].tolist())
+            order = [bs_position for bs_position in order if bs_position not in rounded_bss]
+        placement = None
+        for _ in range(max(1, repair_passes + 1)):
+            attempt = self.__place(order, hw_loads, link_loads, key_power, start)
+            if placement is None or len(attempt.unassigned) < len(placement.unassigned):
+                placement = attempt
+            missed = [bs_position for bs_position in attempt.unassigned if assignable[bs_position]]
+            if len(missed) == 0:
+                break
+            missed_positions = set(missed)
+            order = missed + [bs_position for bs_position in order if bs_position not in missed_positions]
+        selected, hw_usage, link_usage, pair_counts = (placement.selected, placement.hw_usage, placement.link_usage,
+                                                       placement.pair_counts)
+        unassigned = [bs_keys[bs_position] for bs_position in placement.unassigned]
+
+        # ---------- Objective and power of the placement ----------
+        used_pairs = pair_counts[pair_counts > 0]
+        centralization = float(used_pairs.sum() - numpy.ceil(used_pairs / self.maximumCentralization).sum())
+        # the hardware units turned on, the ceil of the usage as in the model
+        y = numpy.ceil(hw_usage / self.hwCapacities - CAPACITY_TOLERANCE).clip(min=0)
+        ran_power = 3600 * ((y * self.hwStaticPower).sum() + dynamic_power[selected].sum())
+
+        solution = GreedySolution(self, selected, y, hw_usage, link_usage, centralization, float(ran_power),
+                                  float(3600 * net_power[selected].sum()), float(mig_power[selected].sum()),
+                                  unassigned)
+
+        solve_end = time.time()
+        logging.info('Greedy Placement (timestamp {}): {}s (centralization {}, {} unassigned)'.format(
+            timestamp, solve_end - solve_start, centralization, len(unassigned)))
+        return solution
+
+
+def solve_lp_rounding(eepran_model: EEPRANModel, greedy_placement: GreedyPlacement,
+                      actual_deployment: Deployment = None, num_rounds: int = LP_ROUNDING_ROUNDS,
+                      seed: int = 0) -> LPRoundingResult:
+    """
+    Solves the LP relaxation of an EEPRAN model and rounds it into a placement.
+
+    The LP is solved on a relaxed copy of the model (EEPRANModel.solve_relaxation()), so the model keeps its
+    variable types and can still be solved as a MIP. Each round rounds every base station to one candidate:
+    the first round to its candidate with the highest X value, the other rounds to a candidate drawn with
+    probability proportional to its X value. The rounded candidates are placed first, then
+    GreedyPlacement.solve() repairs the round: only the base stations on overloaded hardwares or links (lowest
+    X value first) are moved to their best fitting greedy candidate.
+
+    The relaxed Z variables make the LP bound of the centralization loose and its X values often integral, so
+    the plain greedy placement is kept as an extra round and the best round is never worse than it.
+
+    Parameters
+    ----------
+
+    eepran_model : EEPRANModel
+        The model, updated for the timestamp to place (see EEPRANModel.update_load()).
+    greedy_placement : GreedyPlacement
+        The greedy placement of the same topology and service, used to repair the rounds.
+    actual_deployment : Deployment
+        The current deployment, used to define the migration costs.
+    num_rounds : int
+        The amount of rounds.
+    seed : int
+        The seed of the random rounds.
+
+    Returns
+    -------
+
+    The best round (fewest base stations left out, then highest centralization, then lowest power), with the
+    LP bound as its optimality gap certificate, or None if the relaxation has no solution.
+    """
+    rounding_start = time.time()
+
+    structure = eepran_model.structure
+    relaxation = eepran_model.solve_relaxation()
+    if relaxation.solution is None:
+        logging.info('LP Rounding: relaxation not solved ({})'.format(relaxation.model.solve_details.status))
+        return None
+
+    lp_bound = relaxation.solution.get_objective_value()
+    relaxed_x_vars = [relaxation.variables[eepran_model.model.x[key].index] for key in structure.decisionVarKeys]
+    x_values = numpy.array(relaxation.solution.get_values(relaxed_x_vars), dtype=float).clip(min=0)
+    key_positions = {key: position for position, key in enumerate(structure.decisionVarKeys)}
+    bs_candidates = [(keys, x_values[[key_positions[key] for key in keys]])
+                     for keys in structure.decisionVarKeysByBs.values() if len(keys) > 0]
+
+    def get_rank(solution: GreedySolution) -> tuple:
+        return (len(solution.unassigned), -solution.centralization,
+                solution.ranPower + solution.netPower + solution.migPower)
+
+    random_generator = numpy.random.default_rng(seed)
+    best = None
+    centralizations = []
+    # the first round is the plain greedy placement, without rounded candidates
+    for rounding in range(-1, max(1, num_rounds)):
+        rounded_keys = {}
+        for keys, values in (bs_candidates if rounding >= 0 else ()):
+            if rounding == 0 or values.sum() <= 0:
+                choice = int(numpy.argmax(values))
+            else:
+                choice = int(random_generator.choice(len(keys), p=values / values.sum()))
+            rounded_keys[keys[choice]] = float(values[choice])
+
+        solution = greedy_placement.solve(eepran_model.timestamp, actual_deployment, rounded_keys=rounded_keys)
+        centralizations.append(solution.centralization)
+        if best is None or get_rank(solution) < get_rank(best):
+            best = solution
+
+    gap = (lp_bound - best.centralization) / abs(lp_bound) if lp_bound != 0 else 0.0
+
+    rounding_end = time.time()
+    logging.info('LP Rounding: {}s (LP bound {}, centralization {}, gap {:.4%})'.format(
+        rounding_end - rounding_start, lp_bound, best.centralization, gap))
+    return LPRoundingResult(best, lp_bound, gap, centralizations)
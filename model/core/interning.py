@@ -0,0 +1,106 @@
+import numpy
+
+from core.link import *
+from core.node import *
+
+
+class KeyInterner:
+    """ Dense integer identifiers (0, 1, ...) of keys, in interning order """
+
+    def __init__(self, keys: list = ()) -> None:
+        self.keys = []
+        self.ids = {}
+        for key in keys:
+            self.intern(key)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self.ids
+
+    def intern(self, key) -> int:
+        """ :returns: The identifier of the key, assigning the next one when the key is new """
+        identifier = self.ids.get(key)
+        if identifier is None:
+            identifier = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+        return identifier
+
+    def get_id(self, key) -> int:
+        return self.ids[key]
+
+    def get_key(self, identifier: int):
+        return self.keys[identifier]
+
+
+class TopologyIndex:
+    """
+    Integer identifiers of the nodes, hardwares, base stations and links of a topology.
+
+    Nodes, hardwares and base stations are numbered in the order of Topology.get_node_keys(),
+    get_hardware_keys() and get_base_station_keys(). Both directions of a link share its Link, so
+    each Link is an (undirected) link while each link key is a directed link. The string <-> ID maps are
+    kept for reporting, the relations between identifiers are NumPy arrays.
+    """
+
+    def __init__(self, nodes: dict[str, Node], links: dict[str, Link]) -> None:
+        """
+        Parameters
+        ----------
+
+        nodes : dict
+            The nodes of the topology, by node key.
+        links : dict
+            The links of the topology, by (directed) link key.
+        """
+        self.nodes = KeyInterner(nodes.keys())
+        self.hardwares = KeyInterner()
+        self.base_stations = KeyInterner()
+        self.links = KeyInterner()
+        self.directed_links = KeyInterner()
+
+        # node id and hardware / base station type identifier of each hardware and base station
+        hardware_nodes, hardware_types = [], []
+        base_station_nodes, base_station_types = [], []
+        # hardware keys of each node, so they are not formatted again on every lookup
+        self.node_hardware_keys = []
+        for node_id, node in enumerate(nodes.values()):
+            self.node_hardware_keys.append(node.get_hardware_keys())
+            for hw_key, hw_type in zip(self.node_hardware_keys[node_id], node.get_hardware_type_identifiers()):
+                self.hardwares.intern(hw_key)
+                hardware_nodes.append(node_id)
+                hardware_types.append(hw_type)
+            for bs_key, bs_type in zip(node.get_base_station_keys(), node.get_base_station_identifiers()):
+                self.base_stations.intern(bs_key)
+                base_station_nodes.append(node_id)
+                base_station_types.append(bs_type)
+
+        self.hardware_nodes = numpy.array(hardware_nodes, dtype=numpy.int64)
+        self.hardware_types = numpy.array(hardware_types, dtype=numpy.int64)
+        self.base_station_nodes = numpy.array(base_station_nodes, dtype=numpy.int64)
+        self.base_station_types = numpy.array(base_station_types, dtype=numpy.int64)
+
+        # undirected link of each directed link, links are named by the key of their (node1, node2) direction
+        link_ids = {}
+        directed_link_links = []
+        for link_key, link in links.items():
+            link_id = link_ids.get(id(link))
+            if link_id is None:
+                link_id = link_ids[id(link)] = self.links.intern(str((link.node1, link.node2)))
+            self.directed_links.intern(link_key)
+            directed_link_links.append(link_id)
+
+        self.directed_link_links = numpy.array(directed_link_links, dtype=numpy.int64)
+
+    def get_hardware_type(self, hw_key: str) -> int:
+        """ :returns: The hardware type identifier (see Topology.add_hardware()) of the hardware """
+        return int(self.hardware_types[self.hardwares.ids[hw_key]])
+
+    def get_hardware_node_key(self, hw_key: str) -> str:
+        """ :returns: The key of the node hosting the hardware """
+        return self.nodes.keys[self.hardware_nodes[self.hardwares.ids[hw_key]]]
+
+    def get_link_id(self, link_key: str) -> int:
+        """ :returns: The (undirected) link of a link key, in either direction """
+        return int(self.directed_link_links[self.directed_links.ids[link_key]])
@@ -37,4 +37,46 @@ class Link:
         if self.is_node2_switch:
             power_consumption += self.switch_port_power_consumption
         
-        return power_consumption
\ No newline at end of file
+        return power_consumption
+
+    def get_physical_links(self) -> list:
+        """ :returns: The physical links crossed by this link, in order """
+        return [self]
+
+
+class LogicalLink(Link):
+    """
+    A chain of physical links through pure-switch nodes, merged into a single link between the chain endpoints.
+
+    Every flow crossing the chain crosses all of its links, so the link keeps the summed delay and the bottleneck
+    port capacity and amount of ports, and its transceiver and switch port powers are aggregated so that the
+    power of a port fraction (usage / port_capacity * power) is the sum over the physical links.
+    """
+
+    def __init__(self, node1, node2, physical_links: list[Link]):
+        bottleneck = min(physical_links, key=lambda link: link.port_capacity * link.max_ports)
+        port_capacity = bottleneck.port_capacity
+
+        is_node1_switch = self.__is_switch(physical_links[0], node1)
+        is_node2_switch = self.__is_switch(physical_links[-1], node2)
+        transceiver_power = sum(link.pluggable_transceiver_power_consumption / link.port_capacity
+                                for link in physical_links) * port_capacity
+        switch_power = sum((link.get_power_consumption() - 2 * link.pluggable_transceiver_power_consumption) /
+                           link.port_capacity for link in physical_links) * port_capacity
+        num_switch_ports = int(is_node1_switch) + int(is_node2_switch)
+        if num_switch_ports > 0:
+            switch_power /= num_switch_ports
+        else:
+            transceiver_power += switch_power / 2
+            switch_power = 0.0
+
+        super().__init__(port_capacity, bottleneck.max_ports, sum(link.delay for link in physical_links),
+                         node1, is_node1_switch, node2, is_node2_switch, transceiver_power, switch_power)
+        self.physical_links = list(physical_links)
+
+    @staticmethod
+    def __is_switch(link: Link, node) -> bool:
+        return link.is_node1_switch if link.node1 == node else link.is_node2_switch
+
+    def get_physical_links(self) -> list:
+        return self.physical_links
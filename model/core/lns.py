@@ -0,0 +1,203 @@
+import logging
+import random
+import time
+
+from core.model import *
+
+# base stations freed in each neighborhood
+LNS_NEIGHBORHOOD_SIZE = 30
+# time limit of each sub-MIP, in seconds
+LNS_SUB_TIME_LIMIT = 10
+# hardwares of a hardware pool neighborhood (drawn among twice as many of the least used ones) and most used
+# links among which the congested link neighborhood is drawn
+LNS_HARDWARE_POOL = 2
+LNS_CONGESTED_LINKS = 5
+# objective changes below this value are not improvements
+LNS_TOLERANCE = 10 ** (-6)
+
+NEIGHBORHOOD_AGGREGATION_NODE = 'aggregation_node'
+NEIGHBORHOOD_HARDWARE_POOL = 'hardware_pool'
+NEIGHBORHOOD_CONGESTED_LINK = 'congested_link'
+NEIGHBORHOODS = [NEIGHBORHOOD_AGGREGATION_NODE, NEIGHBORHOOD_HARDWARE_POOL, NEIGHBORHOOD_CONGESTED_LINK]
+
+# one sub-MIP of the search: elapsed time, objective of the sub-MIP (None without solution), best objective so far,
+# neighborhood, amount of freed base stations and solve status
+LNSStep = namedtuple('LNSStep', ['time', 'objective', 'best_objective', 'neighborhood', 'freed', 'status'])
+# best selection (bs_key -> decision key), its objective and solution (the last accepted sub-MIP, None if none was
+# accepted and the selection is the start) and every step of the search, the improvement curve
+LNSResult = namedtuple('LNSResult', ['selection', 'objective', 'solution', 'steps'])
+
+
+class LargeNeighborhoodSearch:
+    """
+    Large-neighborhood search over a built EEPRAN model.
+
+    Starting from an incumbent, each iteration frees the X variables of a neighborhood of base stations, fixes
+    every other base station to its incumbent candidate and solves the resulting sub-MIP with a short time
+    limit, the incumbent being its MIP start. Neighborhoods rotate between:
+
+    - aggregation node: the base stations whose candidates place VNFs in a node used by the incumbent,
+    - hardware pool: the base stations using the least used turned on hardwares (and those able to reach them),
+      so the sub-MIP can turn them off,
+    - congested link: the base stations using one of the most used links (and those able to use it).
+
+    Sub-MIP solutions are accepted when they are not worse than the incumbent, so the search also moves
+    across plateaus of the centralization. The variable bounds and time limit of the model are restored
+    after the search.
+    """
+
+    def __init__(self, eepran_model: EEPRANModel, neighborhood_size: int = LNS_NEIGHBORHOOD_SIZE,
+                 sub_time_limit: float = LNS_SUB_TIME_LIMIT, seed: int = 0) -> None:
+        self.eepranModel = eepran_model
+        self.neighborhoodSize = neighborhood_size
+        self.subTimeLimit = sub_time_limit
+        self.random = random.Random(seed)
+
+        # base stations with a candidate using each node, hardware and link (through the EEPRANModel accessors,
+        # served by either backend)
+        self.nodeBss: dict[str, set[str]] = {}
+        self.hwBss: dict[str, set[str]] = {}
+        self.linkBss: dict[str, set[str]] = {}
+        for key in eepran_model.structure.decisionVarKeys:
+            for _, node_key, hw_key in eepran_model.get_key_placements(key):
+                self.nodeBss.setdefault(node_key, set()).add(key.bs_key)
+                self.hwBss.setdefault(hw_key, set()).add(key.bs_key)
+            for link_key in eepran_model.get_key_loads(key)[1]:
+                self.linkBss.setdefault(link_key, set()).add(key.bs_key)
+
+    def run(self, start, time_budget: float, max_iterations: int = None) -> LNSResult:
+        """
+        Improves a feasible placement until the time budget runs out.
+
+        Parameters
+        ----------
+
+        start : Deployment | dict
+            The incumbent: a deployment or the X values of a solution (e.g. solution.get_value_dict(model.x)
+            or GreedySolution.get_x_values()). It must select a candidate for every base station.
+        time_budget : float
+            The wall-clock budget of the search, in seconds.
+        max_iterations : int
+            The maximum amount of sub-MIPs, unlimited by default.
+        """
+        search_start = time.time()
+
+        model = self.eepranModel.model
+        structure = self.eepranModel.structure
+        if isinstance(start, Deployment):
+            selection = {bs_key: DecisionVariableKey(route_id, drc_id, bs_key)
+                         for bs_key, (drc_id, route_id) in start.GetSelection().items()}
+        else:
+            selection = {key.bs_key: key for key, value in start.items() if value > 10 ** (-3)}
+        objective = self.__get_objective(selection)
+
+        solution = None
+        steps = []
+        time_limit = model.parameters.timelimit.get()
+        x_vars = [model.x[key] for key in structure.decisionVarKeys]
+        try:
+            iteration = 0
+            empty_neighborhoods = 0
+            while (time.time() - search_start < time_budget and
+                   (max_iterations is None or iteration < max_iterations)):
+                neighborhood = NEIGHBORHOODS[iteration % len(NEIGHBORHOODS)]
+                iteration += 1
+                freed = self.__get_neighborhood(neighborhood, selection)
+                if len(freed) == 0:
+                    # no neighborhood frees any base station, nothing is left to search
+                    empty_neighborhoods += 1
+                    if empty_neighborhoods == len(NEIGHBORHOODS):
+                        break
+                    continue
+                empty_neighborhoods = 0
+
+                # every base station out of the neighborhood keeps its incumbent candidate
+                fixed_keys = {key for bs_key, key in selection.items() if bs_key not in freed}
+                model.change_var_lower_bounds(x_vars, [1 if key in fixed_keys else 0
+                                                       for key in structure.decisionVarKeys])
+                model.parameters.timelimit = max(1, min(self.subTimeLimit,
+                                                        time_budget - (time.time() - search_start)))
+                self.eepranModel.add_warm_start({key: 1 for key in selection.values()})
+                sub_solution = model.solve(clean_before_solve=True)
+
+                sub_objective = None
+                if sub_solution is not None:
+                    sub_objective = sub_solution.get_objective_value()
+                    if sub_objective >= objective - LNS_TOLERANCE:
+                        # the returned solution always describes the returned selection
+                        values = sub_solution.get_values(x_vars)
+                        selection = {key.bs_key: key for key, value in zip(structure.decisionVarKeys, values)
+                                     if value > 10 ** (-3)}
+                        solution = sub_solution
+                        objective = max(objective, sub_objective)
+
+                steps.append(LNSStep(time.time() - search_start, sub_objective, objective, neighborhood, len(freed),
+                                     model.solve_details.status))
+        finally:
+            model.change_var_lower_bounds(x_vars, [0] * len(x_vars))
+            model.parameters.timelimit = time_limit
+
+        search_end = time.time()
+        logging.info('Large Neighborhood Search: {}s ({} sub-MIPs, objective {})'.format(
+            search_end - search_start, len(steps), objective))
+        return LNSResult(selection, objective, solution, steps)
+
+    def __get_objective(self, selection: dict) -> float:
+        """ :returns: The centralization of a selection, as the objective of the model """
+        vnf_counts = {}
+        for key in selection.values():
+            for function, node_key, _ in self.eepranModel.get_key_placements(key):
+                vnf_counts[(node_key, function)] = vnf_counts.get((node_key, function), 0) + 1
+        maximum_centralization = self.eepranModel.structure.maximumCentralization
+        return float(sum(count - math.ceil(count / maximum_centralization) for count in vnf_counts.values()))
+
+    def __get_neighborhood(self, neighborhood: str, selection: dict) -> set[str]:
+        """
+        Returns the base stations freed by a neighborhood of the incumbent selection.
+
+        The base stations using the chosen resources in the incumbent come first, the remaining room of the
+        neighborhood is drawn from the base stations able to use them.
+        """
+        hw_usage = {}
+        link_usage = {}
+        placed_nodes = set()
+        for key in selection.values():
+            hw_loads, link_loads = self.eepranModel.get_key_loads(key)
+            for hw_key, load in hw_loads.items():
+                hw_usage[hw_key] = hw_usage.get(hw_key, 0) + load
+            for link_key, load in link_loads.items():
+                link_usage[link_key] = link_usage.get(link_key, 0) + load
+            placed_nodes.update(node_key for _, node_key, _ in self.eepranModel.get_key_placements(key))
+
+        if neighborhood == NEIGHBORHOOD_AGGREGATION_NODE:
+            # nodes only reachable by their own base station do not aggregate anything
+            nodes = sorted(node_key for node_key in placed_nodes if len(self.nodeBss.get(node_key, ())) > 1)
+            if len(nodes) == 0:
+                return set()
+            node_key = self.random.choice(nodes)
+            used = {bs_key for bs_key, key in selection.items()
+                    if any(placed_node == node_key for _, placed_node, _ in self.eepranModel.get_key_placements(key))}
+            reachable = self.nodeBss[node_key]
+
+        elif neighborhood == NEIGHBORHOOD_HARDWARE_POOL:
+            hw_keys = sorted(hw_usage.keys(), key=lambda hw: hw_usage[hw] / self.eepranModel.hwCapacities[hw])
+            pool = set(self.random.sample(hw_keys[:2 * LNS_HARDWARE_POOL], min(len(hw_keys), LNS_HARDWARE_POOL)))
+            used = {bs_key for bs_key, key in selection.items()
+                    if any(hw_key in pool for _, _, hw_key in self.eepranModel.get_key_placements(key))}
+            reachable = set().union(*(self.hwBss.get(hw_key, set()) for hw_key in pool))
+
+        else:
+            topo = self.eepranModel.structure.topo
+            link_keys = sorted(link_usage.keys(), reverse=True, key=lambda link: link_usage[link] / (
+                    topo.get_link(link).max_ports * topo.get_link(link).port_capacity))
+            if len(link_keys) == 0:
+                return set()
+            link_key = self.random.choice(link_keys[:LNS_CONGESTED_LINKS])
+            used = {bs_key for bs_key, key in selection.items()
+                    if link_key in self.eepranModel.get_key_loads(key)[1]}
+            reachable = self.linkBss[link_key]
+
+        freed = self.random.sample(sorted(used), min(len(used), self.neighborhoodSize))
+        others = sorted(reachable - used)
+        freed += self.random.sample(others, min(len(others), self.neighborhoodSize - len(freed)))
+        return set(freed)
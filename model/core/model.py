@@ -1,26 +1,86 @@
 import math
 
+import scipy.sparse
+from cplex.callbacks import LazyConstraintCallback
+from docplex.mp.callbacks.cb_mixin import ConstraintCallbackMixin
+from docplex.mp.constants import EffortLevel
 from docplex.mp.constr import AbstractConstraint
 from docplex.mp.linear import LinearExpr, ZeroExpr
 from docplex.mp.model import Model
+from docplex.mp.progress import ProgressClock, ProgressListener
+from docplex.mp.relax_linear import LinearRelaxer
 
 import core.drc as package_drc
+from core.candidates import *
 from core.topology import *
 
-CR_MODE_CALC = "calc"
-CR_MODE_HP = "hp"
-CR_MODE_HL = "hl"
 SERVICE_URLLC = "urllc"
 SERVICE_1080P = "1080"
 SERVICE_1440P = "1440"
 SERVICE_2160P = "2160"
 
+CeilVariableKey = namedtuple('CeilVariableKey', ['node_key', 'function_key'])
+# load independent terms of the hardware (GOPS of a base station function) and link (bandwidth factor of a
+# base station user) usages of the candidates, see EEPRANModel.get_load_matrices()
+LoadIncidence = namedtuple('LoadIncidence', ['hw_keys', 'hw_rows', 'hw_cols', 'hw_bss', 'hw_functions',
+                                             'link_keys', 'link_rows', 'link_cols', 'link_bss', 'link_bandwidths'])
+# load independent data of a service, see get_service_data()
+ServiceData = namedtuple('ServiceData', ['splits', 'drc_dict', 'drc_dict_embb', 'throughput', 'vnf_mig_cost'])
+# LP relaxation of an EEPRAN model, see EEPRANModel.solve_relaxation(): the relaxed copy of the model, its solution
+# (None if not solved) and the variables of the copy, by index of the model variables
+LPRelaxation = namedtuple('LPRelaxation', ['model', 'solution', 'variables'])
+
+
+class EEPRANStructure:
+    """
+    Load independent part of an EEPRAN model.
+
+    Keeps the candidate keys, where each candidate places its VNFs, the crosshaul links it uses and the
+    constraints whose coefficients depend on the base station load, so the model can be updated in place
+    for another timestamp instead of being rebuilt.
+    """
+
+    def __init__(self, topo: Topology, decision_var_keys: list, decision_var_keys_by_bs: dict[str, list],
+                 splits: list[Drc], drc_dict: dict[int, Drc], drc_dict_embb: dict[int, Drc], throughput: float,
+                 cr_mode: str, vnf_mig_cost: dict[str, float], maximum_centralization: int) -> None:
+        self.topo = topo
+        self.decisionVarKeys = decision_var_keys
+        self.decisionVarKeysByBs = decision_var_keys_by_bs
+        self.splits = splits
+        self.drcDict = drc_dict
+        self.drcDictEmbb = drc_dict_embb
+        self.throughput = throughput
+        self.crMode = cr_mode
+        self.vnfMigCost = vnf_mig_cost
+        self.maximumCentralization = maximum_centralization
+
+        # key -> [(function, node_key, hw_key)]
+        self.keyPlacements: dict[tuple, list[tuple[str, str, str]]] = {}
+        # key -> [(drc bandwidth attribute, link keys)]
+        self.keyLinks: dict[tuple, list[tuple[str, list[str]]]] = {}
+        # key -> [(drc bandwidth attribute, directed link ids)], keyLinks over TopologyIndex.directed_links
+        self.keyLinkIds: dict[tuple, list[tuple[str, list[int]]]] = {}
+        # key -> [(function, hw_key)] of the VNFs that may migrate
+        self.keyMigrations: dict[tuple, list[tuple[str, str]]] = {}
+
+        self.hwDynamicPower: dict[str, float] = {}
+        self.lowCeilConstraints: dict[str, AbstractConstraint] = {}
+        self.highCeilConstraints: dict[str, AbstractConstraint] = {}
+        self.processingConstraints: dict[str, AbstractConstraint] = {}
+        self.linkCapacityConstraints: dict[str, AbstractConstraint] = {}
+        # load independent constraints, kept for their dual values (see core.column_generation)
+        self.vnfLowCeilConstraints: dict[CeilVariableKey, AbstractConstraint] = {}
+        self.vnfHighCeilConstraints: dict[CeilVariableKey, AbstractConstraint] = {}
+        self.singleRouteConstraints: dict[str, AbstractConstraint] = {}
+        self.linkPowerCosts: dict[str, float] = {}
+
+
 class EEPRANModel:
     def __init__(self, model: Model, centralization_constraint: AbstractConstraint,
                  ran_power_expr: LinearExpr, net_power_expr: LinearExpr, mig_power_expr: LinearExpr,
                  link_usage_exprs: dict[str, LinearExpr], link_power_exprs: dict[str, LinearExpr],
                  hw_usage_exprs: dict[str, LinearExpr], hw_capacities: dict[str, int],
-                 node_vnf_gops: dict[str, dict[str, float]]) -> None:
+                 node_vnf_gops: dict[str, dict[str, float]], structure: EEPRANStructure = None) -> None:
         self.model = model
         self.centralizationContraint = centralization_constraint
         self.nodeVnfGops = node_vnf_gops
@@ -31,21 +91,372 @@ class EEPRANModel:
         self.linkPowerExprs = link_power_exprs
         self.hwUsageExprs = hw_usage_exprs
         self.hwCapacities = hw_capacities
+        self.structure = structure
+        self.timestamp = None
+        self.bsUsers: dict[str, int] = {}
+        self.warmStartStats: dict[str, int] = {}
+        # link capacity constraints left out of the model, see LazyLinkCapacityCallback
+        self.lazyLinkCallback: 'LazyLinkCapacityCallback' = None
+        self.__load_incidence: LoadIncidence = None
+
+    def update_load(self, timestamp: int = -1, actual_deployment: Deployment = None) -> None:
+        """
+        Updates the load dependent coefficients of the model in place.
+
+        Only the GOPS terms, link bandwidth terms and migration costs change, variables and the
+        load independent constraints (single route, centralization) are kept as built.
+
+        Parameters
+        ----------
+
+        timestamp : int
+            The timestamp of the base station usage, -1 means one user per base station.
+        actual_deployment : Deployment
+            The current deployment, used to define the migration costs.
+
+        """
+        update_start = time.time()
+
+        structure = self.structure
+        topo = structure.topo
+        model = self.model
+
+        gops_table = topo.get_gops_table(structure.crMode)
+        bs_users = dict(zip(gops_table.base_station_keys, gops_table.get_users(timestamp).tolist()))
+        node_vnf_gops = gops_table.get_node_vnf_gops(timestamp)
+
+        if actual_deployment is None:
+            actual_deployment = Deployment(topo.get_base_station_keys(), structure.splits, topo.get_routes())
+
+        link_ids = topo.get_index().directed_links
+        dynamic_power_coefs = {}
+        hw_usage_coefs = {hw_key: {} for hw_key in structure.processingConstraints.keys()}
+        link_usage_coefs = {link_ids.ids[link_key]: {} for link_key in structure.linkCapacityConstraints.keys()}
+        mig_power_coefs = {}
+        migration_costs = actual_deployment.GetMigrationCosts(
+            [key.bs_key for key in structure.decisionVarKeys],
+            [structure.keyMigrations[key] for key in structure.decisionVarKeys], structure.vnfMigCost).tolist()
+
+        for position, key in enumerate(structure.decisionVarKeys):
+            x = model.x[key]
+
+            # ---------- vRAN Consumption ----------
+            vnf_gops = node_vnf_gops[key.bs_key]
+
+            for function, _, hw_key in structure.keyPlacements[key]:
+                dynamic_power_coefs[x] = dynamic_power_coefs.get(x, 0) + (
+                        vnf_gops[function] * structure.hwDynamicPower[hw_key] / self.hwCapacities[hw_key])
+                hw_usage_coefs[hw_key][x] = hw_usage_coefs[hw_key].get(x, 0) + vnf_gops[function]
+
+            # ---------- Network Link Usage ----------
+            for bandwidth_attribute, key_link_ids in structure.keyLinkIds[key]:
+                bandwidth = (getattr(structure.drcDictEmbb[key.drc_id], bandwidth_attribute) *
+                             structure.throughput * bs_users[key.bs_key] * 10 ** (-9))
+                for link_id in key_link_ids:
+                    link_usage_coefs[link_id][x] = link_usage_coefs[link_id].get(x, 0) + bandwidth
+
+            # ---------- Migration ----------
+            mig_power_coefs[x] = migration_costs[position]
+
+        # ---------- RAN Power Consumption and Processing Capacity ----------
+        self.ranPowerExpr.set_coefficients([(x, coef * 3600) for x, coef in dynamic_power_coefs.items()])
+        for hw_key, coefs in hw_usage_coefs.items():
+            capacity = self.hwCapacities[hw_key]
+            ceil_coefs = [(x, -coef / capacity) for x, coef in coefs.items()]
+            structure.lowCeilConstraints[hw_key].left_expr.set_coefficients(ceil_coefs)
+            structure.highCeilConstraints[hw_key].left_expr.set_coefficients(ceil_coefs)
+            structure.processingConstraints[hw_key].left_expr.set_coefficients(coefs.items())
+
+        # ---------- Network Power Consumption and Link Capacity ----------
+        net_power_coefs = {}
+        for link_id, coefs in link_usage_coefs.items():
+            link_key = link_ids.keys[link_id]
+            link = topo.get_link(link_key)
+            cost = structure.linkPowerCosts[link_key]
+
+            self.linkUsageExprs[link_key].set_coefficients(coefs.items())
+            structure.linkCapacityConstraints[link_key].left_expr.set_coefficients(
+                [(x, coef / link.port_capacity) for x, coef in coefs.items()])
+            self.linkPowerExprs[link_key].set_coefficients(
+                [(x, coef / link.port_capacity * cost) for x, coef in coefs.items()])
+            for x, coef in coefs.items():
+                net_power_coefs[x] = net_power_coefs.get(x, 0) + coef / link.port_capacity * cost
+        self.netPowerExpr.set_coefficients([(x, coef * 3600) for x, coef in net_power_coefs.items()])
+
+        # ---------- Migration Power Consumption ----------
+        self.migPowerExpr.set_coefficients(mig_power_coefs.items())
 
-
-def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap: int = 0, service: str = SERVICE_URLLC,
-                       cr_mode: str = CR_MODE_CALC, actual_deployment: Deployment = None) -> EEPRANModel:
-    model = Model(name='EEPRAN Problem', log_output=True)
-    model.parameters.mip.tolerances.mipgap = 1e-5
-
-    logging.info('Model Creation Time:')
-
-    # -----------
-    # Define Data
-    # -----------
-
-    data_defining_start = time.time()
-
+        self.nodeVnfGops = node_vnf_gops
+        self.bsUsers = bs_users
+        self.timestamp = timestamp
+
+        update_end = time.time()
+        logging.info('Model Load Update (timestamp {}): {}s'.format(timestamp, update_end - update_start))
+
+    def get_key_placements(self, key) -> list[tuple[str, str, str]]:
+        """ :returns: The (function, node_key, hw_key) where the candidate key places each VNF """
+        return self.structure.keyPlacements[key]
+
+    def get_key_loads(self, key) -> tuple[dict[str, float], dict[str, float]]:
+        """ :returns: The GOPS used in each hardware and the bandwidth used in each link by the candidate key """
+        structure = self.structure
+        hw_loads = {}
+        for function, _, hw_key in self.get_key_placements(key):
+            hw_loads[hw_key] = hw_loads.get(hw_key, 0) + self.nodeVnfGops[key.bs_key][function]
+
+        link_loads = {}
+        for bandwidth_attribute, link_keys in structure.keyLinks[key]:
+            bandwidth = (getattr(structure.drcDictEmbb[key.drc_id], bandwidth_attribute) *
+                         structure.throughput * self.bsUsers[key.bs_key] * 10 ** (-9))
+            for link_key in link_keys:
+                link_loads[link_key] = link_loads.get(link_key, 0) + bandwidth
+
+        return hw_loads, link_loads
+
+    def get_load_matrices(self) -> tuple[list[str], scipy.sparse.csr_matrix, list[str], scipy.sparse.csr_matrix]:
+        """
+        Returns the hardware and link usage of every candidate for the actual load.
+
+        The candidate terms are collected once, later calls only scale them by the load of the actual timestamp.
+
+        Returns
+        -------
+
+        The hardware keys, a (hardware x candidate) matrix with the GOPS used by each candidate, the link keys
+        and a (link x candidate) matrix with the bandwidth used by each candidate. Candidates (columns) follow
+        structure.decisionVarKeys, hardwares and links follow hwUsageExprs and linkUsageExprs.
+        """
+        structure = self.structure
+        if self.__load_incidence is None:
+            self.__load_incidence = self.__get_load_incidence()
+        incidence = self.__load_incidence
+
+        gops_table = structure.topo.get_gops_table(structure.crMode)
+        num_keys = len(structure.decisionVarKeys)
+        hw_usage = scipy.sparse.csr_matrix(
+            (gops_table.get_gops(self.timestamp)[incidence.hw_bss, incidence.hw_functions],
+             (incidence.hw_rows, incidence.hw_cols)), shape=(len(incidence.hw_keys), num_keys))
+        link_usage = scipy.sparse.csr_matrix(
+            (incidence.link_bandwidths * gops_table.get_users(self.timestamp)[incidence.link_bss],
+             (incidence.link_rows, incidence.link_cols)), shape=(len(incidence.link_keys), num_keys))
+
+        return incidence.hw_keys, hw_usage, incidence.link_keys, link_usage
+
+    def __get_load_incidence(self) -> LoadIncidence:
+        structure = self.structure
+        bs_positions = {bs_key: position for position, bs_key in
+                        enumerate(structure.topo.get_gops_table(structure.crMode).base_station_keys)}
+        function_positions = {function: position for position, function in enumerate(VIRTUAL_NETWORK_FUNCTIONS)}
+        hw_keys = list(self.hwUsageExprs.keys())
+        hw_positions = {hw_key: position for position, hw_key in enumerate(hw_keys)}
+        link_keys = list(self.linkUsageExprs.keys())
+        link_ids = structure.topo.get_index().directed_links.ids
+        link_positions = {link_ids[link_key]: position for position, link_key in enumerate(link_keys)}
+
+        hw_terms = []
+        link_terms = []
+        for position, key in enumerate(structure.decisionVarKeys):
+            bs_position = bs_positions[key.bs_key]
+            for function, _, hw_key in structure.keyPlacements[key]:
+                hw_terms.append((hw_positions[hw_key], position, bs_position, function_positions[function]))
+            for bandwidth_attribute, key_link_ids in structure.keyLinkIds[key]:
+                bandwidth = (getattr(structure.drcDictEmbb[key.drc_id], bandwidth_attribute) *
+                             structure.throughput * 10 ** (-9))
+                for link_id in key_link_ids:
+                    link_terms.append((link_positions[link_id], position, bs_position, bandwidth))
+
+        hw_terms = numpy.array(hw_terms, dtype=numpy.int64).reshape(-1, 4)
+        link_terms = numpy.array(link_terms, dtype=float).reshape(-1, 4)
+        return LoadIncidence(hw_keys, hw_terms[:, 0], hw_terms[:, 1], hw_terms[:, 2], hw_terms[:, 3],
+                             link_keys, link_terms[:, 0].astype(numpy.int64), link_terms[:, 1].astype(numpy.int64),
+                             link_terms[:, 2].astype(numpy.int64), link_terms[:, 3])
+
+    def solve_relaxation(self) -> LPRelaxation:
+        """
+        Solves the LP relaxation of the model.
+
+        The relaxation is a continuous copy of the model (docplex LinearRelaxer), so the model keeps its variable
+        types and last solution. Variables and constraints keep their indexes in the copy: the value of a model
+        variable is read through relaxation.variables[var.index] and the dual value of a constraint through
+        relaxation.model.get_constraint_by_index(constraint.index).
+        """
+        relaxation_start = time.time()
+
+        relaxed_model = LinearRelaxer.make_relaxed_model(self.model, copy_parameters=True, verbose=False)
+        solution = relaxed_model.solve()
+
+        relaxation_end = time.time()
+        logging.info('LP Relaxation: {}s ({})'.format(relaxation_end - relaxation_start,
+                                                      relaxed_model.solve_details.status))
+        return LPRelaxation(relaxed_model, solution, list(relaxed_model.iter_variables()))
+
+    def add_warm_start(self, start) -> bool:
+        """
+        Adds a MIP start for the next solve from a previous deployment.
+
+        The start is repaired for the actual load: base stations whose previous candidate no longer exists
+        or no longer fits the hardware and link capacities are moved to the first candidate that fits, or
+        left out of the start (partial MIP start completed by the solver).
+
+        Parameters
+        ----------
+
+        start : Deployment | dict
+            The deployment of the previous timestamp, or the previous solution values of the X variables
+            (e.g. solution.get_value_dict(model.x)).
+
+        Returns
+        -------
+
+        True if every base station was assigned in the MIP start.
+        """
+        warm_start_begin = time.time()
+
+        structure = self.structure
+        topo = structure.topo
+        model = self.model
+        model.clear_mip_starts()
+
+        previous_keys = {}
+        if isinstance(start, Deployment):
+            for bs_key, (drc_id, route_id) in start.GetSelection().items():
+                previous_keys[bs_key] = DecisionVariableKey(route_id, drc_id, bs_key)
+        else:
+            for key, value in start.items():
+                if value > 10 ** (-3):
+                    previous_keys[key.bs_key] = key
+
+        hw_residual = dict(self.hwCapacities)
+        link_residual = {link_key: topo.get_link(link_key).max_ports * topo.get_link(link_key).port_capacity
+                         for link_key in self.linkUsageExprs.keys()}
+
+        def fits(key) -> bool:
+            hw_loads, link_loads = self.get_key_loads(key)
+            return (all(load <= hw_residual[hw_key] for hw_key, load in hw_loads.items()) and
+                    all(load <= link_residual[link_key] for link_key, load in link_loads.items()))
+
+        def assign(key) -> None:
+            hw_loads, link_loads = self.get_key_loads(key)
+            for hw_key, load in hw_loads.items():
+                hw_residual[hw_key] -= load
+            for link_key, load in link_loads.items():
+                link_residual[link_key] -= load
+
+        # previous candidates are kept first, so moved base stations only use the remaining capacity
+        selection = {}
+        for bs_key, key in previous_keys.items():
+            if key in model.x and fits(key):
+                assign(key)
+                selection[bs_key] = key
+        kept = len(selection)
+
+        repaired = 0
+        for bs_key, keys in structure.decisionVarKeysByBs.items():
+            if bs_key in selection.keys():
+                continue
+            for key in keys:
+                if fits(key):
+                    assign(key)
+                    selection[bs_key] = key
+                    if bs_key in previous_keys.keys():
+                        repaired += 1
+                    break
+
+        complete = len(selection) == len(structure.decisionVarKeysByBs)
+        values = {model.x[key]: 1 for key in selection.values()}
+
+        if complete:
+            # the hardware units and centralization ceil variables follow from the selected candidates
+            hw_usage = {hw_key: 0.0 for hw_key in self.hwCapacities.keys()}
+            vnf_counts = {}
+            for key in selection.values():
+                hw_loads, _ = self.get_key_loads(key)
+                for hw_key, load in hw_loads.items():
+                    hw_usage[hw_key] += load
+                for function, node_key, _ in self.get_key_placements(key):
+                    ceil_key = CeilVariableKey(node_key, function)
+                    vnf_counts[ceil_key] = vnf_counts.get(ceil_key, 0) + 1
+
+            for hw_key, usage in hw_usage.items():
+                values[model.y[hw_key]] = math.ceil(usage / self.hwCapacities[hw_key])
+            for ceil_key, count in vnf_counts.items():
+                if ceil_key in model.z:
+                    values[model.z[ceil_key]] = math.ceil(count / structure.maximumCentralization)
+
+        mip_start = model.new_solution(values)
+        model.add_mip_start(mip_start, effort_level=EffortLevel.Repair, complete_vars=complete)
+
+        self.warmStartStats = {'kept': kept,
+                               'repaired': repaired,
+                               'assigned': len(selection),
+                               'unassigned': len(structure.decisionVarKeysByBs) - len(selection)}
+
+        warm_start_end = time.time()
+        logging.info('Warm Start Definition: {}s ({})'.format(warm_start_end - warm_start_begin,
+                                                              self.warmStartStats))
+        return complete
+
+
+class FirstIncumbentListener(ProgressListener):
+    """ Records how long the solver takes to find its first incumbent in each solve. """
+
+    def __init__(self):
+        super().__init__(ProgressClock.Solutions)
+        self.first_incumbent_time = None
+        self.__solve_start = time.time()
+
+    def notify_start(self):
+        super().notify_start()
+        self.first_incumbent_time = None
+        self.__solve_start = time.time()
+
+    def notify_progress(self, progress_data):
+        if self.first_incumbent_time is None and progress_data.has_incumbent:
+            self.first_incumbent_time = progress_data.time
+
+    def notify_end(self, status, objective):
+        # an accepted MIP start that is not improved does not trigger progress notifications
+        if self.first_incumbent_time is None and objective is not None:
+            self.first_incumbent_time = time.time() - self.__solve_start
+
+
+class LazyLinkCapacityCallback(ConstraintCallbackMixin, LazyConstraintCallback):
+    """
+    Adds the link capacity constraints left out of the model only when a candidate incumbent violates them.
+
+    The constraints are kept by the EEPRAN structure and updated with the load as the other ones, the callback
+    checks them against every integer solution found by the solver and adds the violated ones as lazy
+    constraints of the actual solve. How many times the constraint of each link was added is kept in
+    linkCounts, across solves until cleared.
+
+    Registered by build_eepran_model(lazy_link_capacity=True), see register_link_constraints().
+    """
+
+    # allowed excess over the link capacity, as the solver feasibility tolerance
+    TOLERANCE = 10 ** (-6)
+
+    def __init__(self, env):
+        LazyConstraintCallback.__init__(self, env)
+        ConstraintCallbackMixin.__init__(self)
+        self.linkKeys: dict[int, str] = {}
+        self.linkCounts: dict[str, int] = {}
+
+    def register_link_constraints(self, link_constraints: dict[str, AbstractConstraint]) -> None:
+        """ Registers the capacity constraint (not added to the model) of each link key """
+        self.register_constraints(list(link_constraints.values()))
+        self.linkKeys.update({id(constraint): link_key for link_key, constraint in link_constraints.items()})
+
+    def __call__(self):
+        solution = self.make_complete_solution()
+        for constraint, cpx_lhs, cpx_sense, cpx_rhs in self.get_cpx_unsatisfied_cts(self.cts, solution,
+                                                                                   self.TOLERANCE):
+            self.add(cpx_lhs, cpx_sense, cpx_rhs)
+            link_key = self.linkKeys[id(constraint)]
+            self.linkCounts[link_key] = self.linkCounts.get(link_key, 0) + 1
+
+
+def get_service_data(service: str = SERVICE_URLLC) -> ServiceData:
+    """ :returns: The DRCs (list and by identifier), eMBB DRCs, user throughput and VNF migration costs of a service """
     splits = package_drc.get_drc_list_urllc()
     drc_dict = {drc.identifier: drc for drc in splits}
 
@@ -63,11 +474,6 @@ def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap:
     }
 
     vnf_mig_cost = {key: (0.512 * 3 * value + 20.165) for key, value in vnf_mem_usage.items()}
-    virtual_network_functions = ['f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8']
-
-    maximum_centralization = len(virtual_network_functions) * len(topo.get_base_station_keys())
-
-    integer_feasibility_tolerance = 1 / maximum_centralization
 
     throughput_urllc = 1024000
     throughput_1080p = 12000000
@@ -89,14 +495,41 @@ def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap:
         splits = splits_embb
         drc_dict = drc_dict_embb
 
-    bs_users = {}
-    if timestamp == -1:
-        bs_users = {bs_key: 1 for bs_key in topo.get_base_station_keys()}
-    else:
-        bs_users = topo.get_load_at(timestamp)
+    return ServiceData(splits, drc_dict, drc_dict_embb, throughput, vnf_mig_cost)
+
 
-    if actual_deployment is None:
-        actual_deployment = Deployment(topo.get_base_station_keys(), splits, topo.get_routes())
+def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap: int = 0, service: str = SERVICE_URLLC,
+                       cr_mode: str = CR_MODE_CALC, actual_deployment: Deployment = None,
+                       lazy_link_capacity: bool = False, export_lp: bool = True) -> EEPRANModel:
+    """
+    Builds the EEPRAN model for the given topology.
+
+    The model is built once per topology, the returned EEPRANModel can be updated for other
+    timestamps through EEPRANModel.update_load() instead of being rebuilt.
+
+    With lazy_link_capacity, the link capacity constraints are left out of the model and only added by a
+    lazy constraint callback when an incumbent violates them (see LazyLinkCapacityCallback).
+
+    The model is exported to data/model_opt.lp unless export_lp is False.
+    """
+
+    model = Model(name='EEPRAN Problem', log_output=True)
+    model.parameters.mip.tolerances.mipgap = 1e-5
+
+    logging.info('Model Creation Time:')
+
+    # -----------
+    # Define Data
+    # -----------
+
+    data_defining_start = time.time()
+
+    splits, drc_dict, drc_dict_embb, throughput, vnf_mig_cost = get_service_data(service)
+    virtual_network_functions = ['f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8']
+
+    maximum_centralization = len(virtual_network_functions) * len(topo.get_base_station_keys())
+
+    integer_feasibility_tolerance = 1 / maximum_centralization
 
     data_defining_end = time.time()
     logging.info('    Data Definition: {}s'.format(data_defining_end - data_defining_start))
@@ -107,71 +540,22 @@ def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap:
 
     var_definition_start = time.time()
 
-    # list with keys for decision variables
-    DecisionVariableKey = namedtuple('DecisionVariableKey', ['route_id', 'drc_id', 'bs_key'])
-    decision_var_keys = [
-        DecisionVariableKey(route.identifier, drc.identifier, bs_key)
-        for route in topo.get_routes()
-        for drc in splits
-        for bs_key in topo.get_base_station_keys()
-        if route.is_destination(bs_key)
-           and drc.num_needed_nodes() == route.qty_nodes()
-           and route.delay_backhaul <= drc.delay_bh
-           and route.delay_midhaul <= drc.delay_mh
-           and route.delay_fronthaul <= drc.delay_fh
-    ]
-
-    splits7_2 = [1, 2, 4, 6, 9]
-    splits6 = [62]
-    decision_var_keys = []
-    for route in topo.get_routes():
-        for drc in splits:
-            for bs_key in topo.get_base_station_keys():
-
-                if not route.is_destination(bs_key):
-                    continue
-                if drc.num_needed_nodes() != route.qty_nodes():
-                    continue
-
-                buffer_size = 0
-                if drc.identifier in splits6:
-                    buffer_size = 2
-                elif drc.identifier in splits7_2:
-                    buffer_size = 2
-
-                packet_size = 12368.0
-
-                fronthaul_delay = route.delay_fronthaul  # Optical Propagation Delay (5 us/km)
-                for link_key in route.fronthaul:
-                    link = topo.get_link(str(link_key))
-                    fronthaul_delay += 0.005  # Switch Electrical Processing Delay (0.005 ms)
-                    fronthaul_delay += packet_size / (link.port_capacity * 10 ** 9) * 10**3  # Transmission Delay
-                    fronthaul_delay += buffer_size * packet_size / (link.port_capacity * 10 ** 9) * 10**3  # Buffer Delay
-
-                midhaul_delay = route.delay_midhaul  # Optical Propagation Delay (5 us/km)
-                for link_key in route.midhaul:
-                    link = topo.get_link(str(link_key))
-                    midhaul_delay += 0.005  # Switch Electrical Processing Delay (0.005 ms)
-                    midhaul_delay += packet_size / (link.port_capacity * 10 ** 9) * 10**3  # Transmission Delay
-                    midhaul_delay += buffer_size * packet_size / (link.port_capacity * 10 ** 9) * 10**3   # Buffer Delay
-
-                backhaul_delay = route.delay_backhaul  # Optical Propagation Delay (5 us/km)
-                for link_key in route.backhaul:
-                    link = topo.get_link(str(link_key))
-                    backhaul_delay += 0.005  # Switch Electrical Processing Delay (0.005 ms)
-                    backhaul_delay += packet_size / (link.port_capacity * 10 ** 9) * 10**3   # Transmission Delay
-                    backhaul_delay += buffer_size * packet_size / (link.port_capacity * 10 ** 9) * 10**3  # Buffer Delay (300us)
-
-                if fronthaul_delay > drc.delay_fh or midhaul_delay > drc.delay_mh or backhaul_delay > drc.delay_bh:
-                    continue
-
-                decision_var_keys.append(DecisionVariableKey(route.identifier, drc.identifier, bs_key))
+    # list with keys for decision variables, only valid (route, drc, bs) candidates are visited
+    candidate_generation_start = time.time()
+    # crosshaul delays depend only on the route and the DRC buffer size, the table is reused across timestamps
+    delay_table = topo.get_crosshaul_delay_table(splits)
+    feasible_routes = {drc.identifier: delay_table.feasible_routes(drc) for drc in splits}
+    candidate_index = CandidateIndex(topo.get_routes(), splits, topo.get_base_station_keys())
+    decision_var_keys = candidate_index.generate_keys(feasible_routes)
+    decision_var_keys_by_bs = group_keys_by_base_station(decision_var_keys, topo.get_base_station_keys())
+    candidate_generation_end = time.time()
+    logging.info('      - Candidate Generation: {}s ({} candidates)'.format(
+        candidate_generation_end - candidate_generation_start, len(decision_var_keys)))
 
     # for key in decision_var_keys:
     #     print(key, " -> ", topo.get_route(key.route_id).sequence)
 
     # list with keys for ceil variables in psi_2
-    CeilVariableKey = namedtuple('CeilVariableKey', ['node_key', 'function_key'])
     ceil_var_keys = [CeilVariableKey(node_key, function_key)
                      for node_key in topo.get_node_keys()
                      for function_key in virtual_network_functions
@@ -195,175 +579,83 @@ def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap:
 
     objective_function_start = time.time()
 
+    structure = EEPRANStructure(topo, decision_var_keys, decision_var_keys_by_bs, splits, drc_dict,
+                                drc_dict_embb, throughput, cr_mode, vnf_mig_cost, maximum_centralization)
+
+    # Coefficients depending on the load are set by EEPRANModel.update_load()
     ran_power_consumption = model.linear_expr()
-    base_station_power_expression = model.linear_expr()
-    dynamic_power_expression = model.linear_expr()
     static_power_consumptions = {}
-    link_usage_expressions = {}
-    node_vnf_gops: dict[str, dict[str, float]] = {}
-    psi_1 = {}
-    key_link_association = {}
+    link_ids = topo.get_index().directed_links
+    # directed link ids used by any candidate, in order of first use
+    used_link_ids: dict[int, None] = {}
     hardware_processing_expressions: dict[str, LinearExpr] = {}
+    hw_capacities = {}
 
     for key in decision_var_keys:
         route = topo.get_route(key.route_id)
 
         # ---------- vRAN Consumption ----------
+        structure.keyPlacements[key] = []
         for function in virtual_network_functions:
-            hw = None
-            node = None
             hw_key = None
+            node_key = None
 
             if route.has_backhaul() and function in drc_dict[key.drc_id].fs_cu:
                 node_key = route.get_backhaul_node_key()
                 hw_key = route.get_backhaul_hardware_key()
 
-                hw = topo.get_hardware_by_key(hw_key)
-                node = topo.get_node(node_key)
-
             elif route.has_midhaul() and function in drc_dict[key.drc_id].fs_du:
                 node_key = route.get_midhaul_node_key()
                 hw_key = route.get_midhaul_hardware_key()
 
-                hw = topo.get_hardware_by_key(hw_key)
-                node = topo.get_node(node_key)
-
             elif function in drc_dict[key.drc_id].fs_ru:
                 node_key = route.get_fronthaul_node_key()
                 hw_key = route.get_fronthaul_hardware_key()
 
+            if node_key is None or hw_key is None:
+                continue
+
+            structure.keyPlacements[key].append((function, node_key, hw_key))
+
+            if hw_key not in hardware_processing_expressions.keys():
                 hw = topo.get_hardware_by_key(hw_key)
                 node = topo.get_node(node_key)
 
-            if hw is None or node is None or hw_key is None:
-                continue
-
-            if route.get_target_base_station() not in node_vnf_gops.keys():
-                bs = topo.get_base_station(1)
-
-                # c_filter = 40 * bs.num_antennas * bs.sampling_frequency / 10**9
-                # c_dft = (8 * bs.num_antennas * bs.num_subcarriers * math.log2(bs.num_subcarriers)) / (bs.ofdm_symbol_duration * 10**9)
-
-                c_precoding = (bs.num_used_subcarriers / (bs.ofdm_symbol_duration * bs.tau_c * 10 ** 9)) * \
-                              (8 * bs.num_antennas * bs.tau_p ** 2 + 8 * bs.num_antennas ** 2 * (
-                                      bs.tau_p + bs_users[key.bs_key])) + \
-                              (bs.num_used_subcarriers * bs.tau_d / (bs.ofdm_symbol_duration * bs.tau_c * 10 ** 9)) * \
-                              (8 * bs.num_antennas * bs_users[key.bs_key]) + \
-                              (bs.num_used_subcarriers / (bs.ofdm_symbol_duration * bs.tau_c * 10 ** 9)) * \
-                              (8 * bs.num_antennas * bs_users[key.bs_key]) + \
-                              (bs.num_used_subcarriers / (bs.ofdm_symbol_duration * bs.tau_c * 10 ** 9)) * \
-                              ((4 * bs.num_antennas ** 2 + 4 * bs.num_antennas) * bs.tau_p + 8 * bs.num_antennas ** 2 *
-                               bs_users[key.bs_key] + 8 * (bs.num_antennas ** 3 - bs.num_antennas) / 3)
-
-                c_modulation = 1.3 * (bs.bit_quantization / 16) ** 1.2 * bs.num_antennas
-                c_mapping = 1.3 * (bs.bit_quantization / 16) ** 1.2 * (bs.spectral_efficiency / 6) ** 1.5 * bs_users[
-                    key.bs_key]
-                c_channel_coding = 1.3 * (bs.bit_quantization / 16) ** 1.2 * (bs.spectral_efficiency / 6) * bs_users[
-                    key.bs_key]
-
-                c_control = 2.7 * (bs.bit_quantization / 16) ** 0.2 * math.sqrt(bs.num_antennas)
-                c_network = 8.0 * (bs.spectral_efficiency / 6) * bs_users[key.bs_key]
-
-                # low_phy_gops = c_filter + c_dft
-                high_phy_gops = c_precoding + c_modulation + c_mapping
-                high_layer_gops = c_channel_coding + c_control + c_network
-
-                if cr_mode == CR_MODE_HP:
-                    high_layer_gops = high_phy_gops / 0.327 - high_phy_gops
-                elif cr_mode == CR_MODE_HL:
-                    high_phy_gops = high_layer_gops / 0.673 - high_layer_gops
-
-                node_vnf_gops[route.get_target_base_station()] = {'f2': high_phy_gops,
-                                                                  'f3': 0.2 * high_layer_gops,
-                                                                  'f4': 0.2 * high_layer_gops,
-                                                                  'f5': 0.014 * high_layer_gops,
-                                                                  'f6': 0.014 * high_layer_gops,
-                                                                  'f7': 0.286 * high_layer_gops,
-                                                                  'f8': 0.286 * high_layer_gops,
-                                                                  'c_modulation': c_modulation,
-                                                                  'c_mapping': c_mapping,
-                                                                  'c_channel_coding': c_channel_coding,
-                                                                  'c_control': c_control,
-                                                                  'c_network': c_network,
-                                                                  'high_phy': high_phy_gops,
-                                                                  'high_layer': high_layer_gops}
-
-            dynamic_power_consumption = hw.power_consumption * (1 - node.static_percentage)
-
-            dynamic_power_expression.add_term(
-                model.x[key],
-                (node_vnf_gops[route.get_target_base_station()][
-                     function] * dynamic_power_consumption / hw.gops_capacity)
-            )
-
-            psi_1.setdefault(hw_key, model.linear_expr()).add_term(
-                model.x[key],
-                1.0 / maximum_centralization
-            )
-
-            hardware_processing_expressions.setdefault(hw_key, model.linear_expr()).add_term(
-                model.x[key],
-                node_vnf_gops[route.get_target_base_station()][function]
-            )
-
-            if hw_key not in static_power_consumptions.keys():
+                hardware_processing_expressions[hw_key] = model.linear_expr()
+                hw_capacities[hw_key] = hw.gops_capacity
+                structure.hwDynamicPower[hw_key] = hw.power_consumption * (1 - node.static_percentage)
                 static_power_consumptions[hw_key] = hw.power_consumption * node.static_percentage
 
         # ---------- Network Link Usage ----------
-        route = topo.get_route(key.route_id)
-
-        links = {'backhaul': [], 'midhaul': [], 'fronthaul': [],
-                 'backhaul_load': 0.0, 'midhaul_load': 0.0, 'fronthaul_load': 0.0}
-
-        bandwidth = drc_dict_embb[key.drc_id].bandwidth_bh * throughput * bs_users[key.bs_key] * 10 ** (-9)
-        links['backhaul_load'] = bandwidth
-        for link_key in route.get_backhaul_links():
-            links['backhaul'].append(link_key)
-            link_usage_expressions.setdefault(link_key, model.linear_expr()).add_term(
-                model.x[key],
-                bandwidth
-            )
-
-        bandwidth = drc_dict_embb[key.drc_id].bandwidth_mh * throughput * bs_users[key.bs_key] * 10 ** (-9)
-        links['midhaul_load'] = bandwidth
-        for link_key in route.get_midhaul_links():
-            links['midhaul'].append(link_key)
-            link_usage_expressions.setdefault(link_key, model.linear_expr()).add_term(
-                model.x[key],
-                bandwidth
-            )
-
-        bandwidth = drc_dict_embb[key.drc_id].bandwidth_fh * throughput * bs_users[key.bs_key] * 10 ** (-9)
-        links['fronthaul_load'] = bandwidth
-        for link_key in route.get_fronthaul_links():
-            links['fronthaul'].append(link_key)
-            link_usage_expressions.setdefault(link_key, model.linear_expr()).add_term(
-                model.x[key],
-                bandwidth
-            )
-
-        key_link_association[key] = links
+        structure.keyLinks[key] = [('bandwidth_bh', route.get_backhaul_links()),
+                                   ('bandwidth_mh', route.get_midhaul_links()),
+                                   ('bandwidth_fh', route.get_fronthaul_links())]
+        structure.keyLinkIds[key] = [(bandwidth_attribute, [link_ids.ids[link_key] for link_key in link_keys])
+                                     for bandwidth_attribute, link_keys in structure.keyLinks[key]]
+        for _, key_link_ids in structure.keyLinkIds[key]:
+            used_link_ids.update(dict.fromkeys(key_link_ids))
+
+        # ---------- Migration ----------
+        structure.keyMigrations[key] = (
+                [(fs, route.get_backhaul_hardware_key()) for fs in drc_dict[key.drc_id].fs_cu
+                 if fs in virtual_network_functions] +
+                [(fs, route.get_midhaul_hardware_key()) for fs in drc_dict[key.drc_id].fs_du
+                 if fs in virtual_network_functions] +
+                [(fs, route.get_fronthaul_hardware_key()) for fs in drc_dict[key.drc_id].fs_ru
+                 if fs in virtual_network_functions])
 
     # ---------- RAN Power Consumption Definition ----------
-    ran_power_consumption.add(dynamic_power_expression)
     for hw_key in topo.get_hardware_keys():
-        # if hw_key not in psi_1.keys(): 
-        #     continue
-
-        # model.add_constraint(model.y[hw_key] - psi_1[hw_key] >= 0.0, 
-        #                         'low_ceil_restriction_{}'.format(hw_key))
-        # model.add_constraint(model.y[hw_key] - psi_1[hw_key] <= 1.0 - integer_feasibility_tolerance,
-        #                         'high_ceil_restriction_{}'.format(hw_key))
-
         if hw_key not in hardware_processing_expressions.keys():
             continue
 
-        model.add_constraint(model.y[hw_key] - hardware_processing_expressions[hw_key] / topo.get_hardware_by_key(
-            hw_key).gops_capacity >= 0.0,
-                             'low_ceil_restriction_{}'.format(hw_key))
-        model.add_constraint(model.y[hw_key] - hardware_processing_expressions[hw_key] / topo.get_hardware_by_key(
-            hw_key).gops_capacity <= 1.0 - integer_feasibility_tolerance,
-                             'high_ceil_restriction_{}'.format(hw_key))
+        structure.lowCeilConstraints[hw_key] = model.add_constraint(
+            model.y[hw_key] - hardware_processing_expressions[hw_key] / hw_capacities[hw_key] >= 0.0,
+            'low_ceil_restriction_{}'.format(hw_key))
+        structure.highCeilConstraints[hw_key] = model.add_constraint(
+            model.y[hw_key] - hardware_processing_expressions[hw_key] / hw_capacities[hw_key] <=
+            1.0 - integer_feasibility_tolerance,
+            'high_ceil_restriction_{}'.format(hw_key))
 
         ran_power_consumption.add_term(model.y[hw_key], static_power_consumptions[hw_key])
 
@@ -371,84 +663,31 @@ def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap:
 
     # ---------- Network Power Consumption Definition ----------
     net_power_consumption = model.linear_expr()
+    link_usage_expressions: dict[str, LinearExpr] = {}
     link_power_expressions = {}
-    net_power_costs = {}
-    for link_key, expression in link_usage_expressions.items():
+    for link_id in used_link_ids:
+        link_key = link_ids.keys[link_id]
         link = topo.get_link(link_key)
-
-        # model.add_constraint(model.w[link_key] >= expression / link.port_capacity, 'ports_usage_lower_bound_link_{}'.format(link_key))
-        # model.add_constraint(model.w[link_key] - 1 <= (expression / link.port_capacity) - 10**(-12), 'ports_usage_higher_bound_link_{}'.format(link_key))
+        expression = link_usage_expressions[link_key] = model.linear_expr()
 
         # ----- Link Capacity Constraint -----
-        model.add_constraint(expression / link.port_capacity <= link.max_ports,
-                             'qty_ports_link_{}'.format(link_key))
+        link_capacity = expression / link.port_capacity <= link.max_ports
+        if not lazy_link_capacity:
+            model.add_constraint(link_capacity, 'qty_ports_link_{}'.format(link_key))
+        structure.linkCapacityConstraints[link_key] = link_capacity
 
         # ----- Network Power Consumption -----
         is_node1_switch = 1 if link.is_node1_switch else 0
         is_node2_switch = 1 if link.is_node2_switch else 0
-        net_power_consumption += (
-                expression / link.port_capacity * (
-                (2 * link.pluggable_transceiver_power_consumption) +
-                (link.switch_port_power_consumption * (is_node1_switch + is_node2_switch))
-        )
-        )
-
-        link_power_expressions[link_key] = (
-                expression / link.port_capacity * (
-                (2 * link.pluggable_transceiver_power_consumption) +
-                (link.switch_port_power_consumption * (is_node1_switch + is_node2_switch))
-        )
-        )
-
-        net_power_costs[link_key] = (
+        structure.linkPowerCosts[link_key] = (
                 (2 * link.pluggable_transceiver_power_consumption) +
                 (link.switch_port_power_consumption * (is_node1_switch + is_node2_switch))
         )
 
-    net_power_consumption = net_power_consumption * 3600
-
-    for key in decision_var_keys:
-        # print(net_power_costs.keys())
-
-        key_link_association[key]['backhaul_power'] = []
-        for link in key_link_association[key]['backhaul']:
-            key_link_association[key]['backhaul_power'].append(net_power_costs[link])
-
-        key_link_association[key]['midhaul_power'] = []
-        for link in key_link_association[key]['midhaul']:
-            key_link_association[key]['midhaul_power'].append(net_power_costs[link])
-
-        key_link_association[key]['fronthaul_power'] = []
-        for link in key_link_association[key]['fronthaul']:
-            key_link_association[key]['fronthaul_power'].append(net_power_costs[link])
+        link_power_expressions[link_key] = model.linear_expr()
 
     # ---------- Migration Power Consumption Definition ---------
-    mig_function_start = time.time()
-
     mig_power_consumption = model.linear_expr(name="migration")
-    for key in decision_var_keys:
-        route = topo.get_route(key.route_id)
-        for fs in drc_dict[key.drc_id].fs_cu:
-            if fs not in virtual_network_functions:
-                continue
-            mig_power_consumption += (1 - actual_deployment.IsDeployedIn(key.bs_key, fs,
-                                                                         route.get_backhaul_hardware_key())) * model.x[
-                                         key] * vnf_mig_cost[fs]
-        for fs in drc_dict[key.drc_id].fs_du:
-            if fs not in virtual_network_functions:
-                continue
-            mig_power_consumption += (1 - actual_deployment.IsDeployedIn(key.bs_key, fs,
-                                                                         route.get_midhaul_hardware_key())) * model.x[
-                                         key] * vnf_mig_cost[fs]
-        for fs in drc_dict[key.drc_id].fs_ru:
-            if fs not in virtual_network_functions:
-                continue
-            mig_power_consumption += (1 - actual_deployment.IsDeployedIn(key.bs_key, fs,
-                                                                         route.get_fronthaul_hardware_key())) * model.x[
-                                         key] * vnf_mig_cost[fs]
-
-    mig_function_end = time.time()
-    logging.info('      - Migration Function Definition: {}s'.format(mig_function_end - mig_function_start))
 
     # --------- Objective Definition ----------
 
@@ -494,11 +733,11 @@ def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap:
             expression = 0
 
         # Psi_2 Ceil Function Restriction
-        model.add_constraint(
+        structure.vnfLowCeilConstraints[key] = model.add_constraint(
             model.z[key] - (expression / maximum_centralization) >=
             0.0, 'low_ceil_restriction_{}_{}'.format(key.node_key, key.function_key)
         )
-        model.add_constraint(
+        structure.vnfHighCeilConstraints[key] = model.add_constraint(
             model.z[key] - (expression / maximum_centralization) <=
             1.0 - integer_feasibility_tolerance,
             'high_ceil_restriction_{}_{}'.format(key.node_key, key.function_key)
@@ -529,15 +768,14 @@ def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap:
 
     
     for bs_key in topo.get_base_station_keys():
-        paths_count = model.sum(model.x[key]
-                                for key in decision_var_keys
-                                if key.bs_key == bs_key)
+        paths_count = model.sum(model.x[key] for key in decision_var_keys_by_bs[bs_key])
 
         # if isinstance(paths_count, ZeroExpr):
         #     # print("ZERO EXPR: ", bs_key)
         #     continue
 
-        model.add_constraint(paths_count == 1, 'single_route_{}'.format(bs_key))
+        structure.singleRouteConstraints[bs_key] = model.add_constraint(paths_count == 1,
+                                                                        'single_route_{}'.format(bs_key))
 
     single_route_end = time.time()
     logging.info('    Single Route Definition: {}s'.format(single_route_end - single_route_start))
@@ -602,53 +840,34 @@ def build_eepran_model(topo: Topology, timestamp: int = -1, centralization_cap:
 
     processing_function_start = time.time()
 
-    # for bs, gops in node_vnf_gops.items():
-    #     print("BS: ", bs)
-    #     print("LOAD: ", gops)
-    #     print("------------------------------------------")
-
-    # for var_key in decision_var_keys:
-    #     route = topo.get_route(var_key.route_id)
-    #     for hw_key in route.get_hardware_keys():
-    #         hardware_processing_expressions.setdefault(hw_key, model.linear_expr())
-    #         hardware_processing_expressions[hw_key] += model.sum(
-    #             model.x[var_key] * node_vnf_gops[route.get_target_base_station()][function]
-    #             for function in virtual_network_functions
-    #             if (route.is_cu(hw_key) and function in drc_dict[var_key.drc_id].fs_cu)
-    #             or (route.is_du(hw_key) and function in drc_dict[var_key.drc_id].fs_du)
-    #             or (route.is_ru(hw_key) and function in drc_dict[var_key.drc_id].fs_ru)
-    #         )
-
-    hw_capacities = {}
     for key, expr in hardware_processing_expressions.items():
-        hw = topo.get_hardware_by_key(key)
-        hw_capacities[key] = hw.gops_capacity
-        model.add_constraint(expr <= hw.gops_capacity, 'processing_capacity_{}'.format(key))
+        structure.processingConstraints[key] = model.add_constraint(expr <= hw_capacities[key],
+                                                                    'processing_capacity_{}'.format(key))
 
     processing_function_end = time.time()
     logging.info('    Processing Definition: {}s'.format(processing_function_end - processing_function_start))
 
+    eepran_model = EEPRANModel(model, centralization_constraint, ran_power_consumption,
+                               net_power_consumption, mig_power_consumption, link_usage_expressions,
+                               link_power_expressions, hardware_processing_expressions, hw_capacities, {},
+                               structure)
+
     # ------------------------------
-    #         Model Export
+    #     Load Dependent Terms
     # ------------------------------
 
-    # for key, links in key_link_association.items():
-    #     print(key, ": ")
-    #     print("   - Backhaul:  ", links['backhaul'])
-    #     print("     +  Load:  ", links['backhaul_load'])
-    #     print("     + Power:  ", links['backhaul_power'])
-    #     print("   - Midhaul:   ", links['midhaul'])
-    #     print("     +  Load:  ", links['midhaul_load'])
-    #     print("     + Power:  ", links['midhaul_power'])
-    #     print("   - Fronthaul: ", links['fronthaul'])
-    #     print("     +  Load:  ", links['fronthaul_load'])
-    #     print("     + Power:  ", links['fronthaul_power'])
-    #     print("++++++++++++++++++++++++++++++++++++++++++++++++++++++++")
+    eepran_model.update_load(timestamp, actual_deployment)
+
+    if lazy_link_capacity:
+        eepran_model.lazyLinkCallback = model.register_callback(LazyLinkCapacityCallback)
+        eepran_model.lazyLinkCallback.register_link_constraints(structure.linkCapacityConstraints)
+
+    # ------------------------------
+    #         Model Export
+    # ------------------------------
 
     # model.add_constraint(model.x[DecisionVariableKey(55, 9, 'node14_bs1')] >= 0.5)
-    model.export_as_lp('data/model_opt.lp')
+    if export_lp:
+        model.export_as_lp('data/model_opt.lp')
 
-    return EEPRANModel(model, centralization_constraint, ran_power_consumption,
-                       net_power_consumption, mig_power_consumption, link_usage_expressions,
-                       link_power_expressions,
-                       hardware_processing_expressions, hw_capacities, node_vnf_gops)
+    return eepran_model
@@ -0,0 +1,96 @@
+import collections
+
+
+class ShortestPathDag:
+    """
+    Shortest-path (minimum hop) DAG rooted at an origin node.
+
+    A single BFS keeps, for each reachable node, its hop distance from the origin and the neighbors one hop
+    closer to it (its predecessors). Every path from the origin to a node following predecessors backwards
+    is a minimum-hop path, so the equal-length paths of all destinations come from the same traversal.
+    """
+
+    def __init__(self, adjacency: dict, origin_node: str) -> None:
+        """
+        Parameters
+        ----------
+
+        adjacency : dict
+            The neighbors of each node (e.g. networkx.Graph.adj).
+        origin_node : str
+            The root of the DAG.
+        """
+        self.origin_node = origin_node
+        self.hops = {origin_node: 0}
+        self.predecessors = {origin_node: []}
+
+        queue = collections.deque([origin_node])
+        while queue:
+            node = queue.popleft()
+            next_hop = self.hops[node] + 1
+            for neighbor in adjacency[node]:
+                neighbor_hop = self.hops.get(neighbor)
+                if neighbor_hop is None:
+                    self.hops[neighbor] = next_hop
+                    self.predecessors[neighbor] = [node]
+                    queue.append(neighbor)
+                elif neighbor_hop == next_hop:
+                    self.predecessors[neighbor].append(node)
+
+    def find_paths(self, destination: str, k: int, delay_bound=None) -> list:
+        """
+        Enumerates minimum-hop paths from the origin to the destination.
+
+        Parameters
+        ----------
+
+        destination : str
+            The last node of the paths.
+        k : int
+            The maximum amount of paths.
+        delay_bound : CrosshaulDelayBound
+            Optional delay bound. Partial paths are discarded as soon as none of its DRCs can be met, so they
+            do not count towards k.
+
+        Returns
+        -------
+
+        Up to k paths (lists of nodes, origin first).
+        """
+        if destination not in self.predecessors:
+            return []
+
+        paths = []
+        # explicit stack of (node, position of the next predecessor to visit, delay bound state), the
+        # link into the destination (its base station) is not part of any crosshaul
+        reversed_path = [destination]
+        stack = [(destination, 0, None)]
+        while stack and len(paths) < k:
+            node, position, bound_state = stack[-1]
+            if node == self.origin_node:
+                paths.append(reversed_path[::-1])
+                stack.pop()
+                reversed_path.pop()
+                continue
+
+            node_predecessors = self.predecessors[node]
+            if position == len(node_predecessors):
+                stack.pop()
+                reversed_path.pop()
+                continue
+
+            stack[-1] = (node, position + 1, bound_state)
+            predecessor = node_predecessors[position]
+            predecessor_state = None
+            if delay_bound is not None:
+                if node == destination:
+                    predecessor_state = delay_bound.start()
+                else:
+                    predecessor_state = delay_bound.extend(bound_state, (predecessor, node))
+                    if predecessor_state is None:
+                        continue
+
+            stack.append((predecessor, 0, predecessor_state))
+            reversed_path.append(predecessor)
+
+        return paths
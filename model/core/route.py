@@ -1,6 +1,12 @@
+from collections.abc import Sequence
+
 from core.node import *
 
 class Route:
+    __slots__ = ('identifier', 'source', 'target', 'sequence', 'fronthaul', 'midhaul', 'backhaul',
+                 'delay_fronthaul', 'delay_midhaul', 'delay_backhaul',
+                 '__fronthaul_links', '__midhaul_links', '__backhaul_links', '__hash')
+
     def __init__(self, identifier: int, source: str, target: str, sequence: list, fronthaul: list,
                  midhaul: list, backhaul: list, delay_fronthaul: float, delay_midhaul: float, delay_backhaul: float):
         self.identifier = identifier
@@ -13,12 +19,27 @@ class Route:
         self.delay_fronthaul = delay_fronthaul
         self.delay_midhaul = delay_midhaul
         self.delay_backhaul = delay_backhaul
+        # link keys and hash are computed on first use, routes are not modified once created
+        self.__fronthaul_links = None
+        self.__midhaul_links = None
+        self.__backhaul_links = None
+        self.__hash = None
 
 
     def __hash__(self) -> int:
-        hash_key = [j for i in (self.fronthaul + self.midhaul + self.backhaul + self.sequence) 
-                        for j in i]
-        return hash(frozenset(hash_key))
+        if self.__hash is None:
+            hash_key = [j for i in (self.fronthaul + self.midhaul + self.backhaul + self.sequence)
+                            for j in i]
+            self.__hash = hash(frozenset(hash_key))
+        return self.__hash
+
+
+    def to_dict(self) -> dict:
+        """ :returns: The route fields, as exported to JSON """
+        return {'identifier': self.identifier, 'source': self.source, 'target': self.target,
+                'sequence': self.sequence, 'fronthaul': self.fronthaul, 'midhaul': self.midhaul,
+                'backhaul': self.backhaul, 'delay_fronthaul': self.delay_fronthaul,
+                'delay_midhaul': self.delay_midhaul, 'delay_backhaul': self.delay_backhaul}
 
 
     def __str__(self) -> str:
@@ -36,20 +57,26 @@ class Route:
                 self.sequence == other.sequence)
 
 
-    def get_all_links(self) -> bool:
-        return [str(link) for link in self.fronthaul + self.midhaul + self.backhaul]
+    def get_all_links(self) -> tuple:
+        return self.get_fronthaul_links() + self.get_midhaul_links() + self.get_backhaul_links()
 
 
-    def get_fronthaul_links(self) -> list:
-        return [str(link) for link in self.fronthaul]
+    def get_fronthaul_links(self) -> tuple:
+        if self.__fronthaul_links is None:
+            self.__fronthaul_links = tuple(str(link) for link in self.fronthaul)
+        return self.__fronthaul_links
 
 
-    def get_midhaul_links(self) -> list:
-        return [str(link) for link in self.midhaul]
+    def get_midhaul_links(self) -> tuple:
+        if self.__midhaul_links is None:
+            self.__midhaul_links = tuple(str(link) for link in self.midhaul)
+        return self.__midhaul_links
 
 
-    def get_backhaul_links(self) -> list:
-        return [str(link) for link in self.backhaul]
+    def get_backhaul_links(self) -> tuple:
+        if self.__backhaul_links is None:
+            self.__backhaul_links = tuple(str(link) for link in self.backhaul)
+        return self.__backhaul_links
 
 
     def get_hardware_keys(self) -> list:
@@ -139,17 +166,57 @@ class Route:
 
 
     def is_fronthaul(self, link: str) -> bool:
-        return link in [str(link) for link in self.fronthaul]
+        return link in self.get_fronthaul_links()
 
 
     def is_midhaul(self, link: str) -> bool:
-        return link in [str(link) for link in self.midhaul]
+        return link in self.get_midhaul_links()
 
 
     def is_backhaul(self, link: str) -> bool:
-        return link in [str(link) for link in self.backhaul]
+        return link in self.get_backhaul_links()
 
 
     def is_destination(self, ru: str) -> bool:
         """ Check if Ru ru is the destination of the route. """
-        return self.target == ru
\ No newline at end of file
+        return self.target == ru
+
+
+class RouteTable(Sequence):
+    """
+    The routes of a topology, in generation order, indexed by identifier.
+
+    Routes are kept as slotted records (see Route) and the identifier index is maintained on every change,
+    so get_route() is a single dict lookup and never refers to routes of a previous generation.
+    """
+
+    def __init__(self, routes: list = ()) -> None:
+        self.__routes = []
+        self.__positions = {}
+        for route in routes:
+            self.append(route)
+
+    def __len__(self) -> int:
+        return len(self.__routes)
+
+    def __getitem__(self, position):
+        return self.__routes[position]
+
+    def __iter__(self):
+        return iter(self.__routes)
+
+    def append(self, route: Route) -> None:
+        if route.identifier in self.__positions:
+            raise ValueError('Duplicated route identifier: {}'.format(route.identifier))
+        self.__positions[route.identifier] = len(self.__routes)
+        self.__routes.append(route)
+
+    def has_route(self, identifier: int) -> bool:
+        return identifier in self.__positions
+
+    def get_position(self, identifier: int) -> int:
+        """ :returns: The position of the route with the given identifier """
+        return self.__positions[identifier]
+
+    def get_route(self, identifier: int) -> Route:
+        return self.__routes[self.__positions[identifier]]
@@ -0,0 +1,157 @@
+import json
+import os
+from collections.abc import Sequence
+
+import numpy
+
+from core.route import *
+
+ROUTE_STORE_VERSION = 1
+# crosshaul columns, in the order of Route.sequence
+CROSSHAULS = ['backhaul', 'midhaul', 'fronthaul']
+
+
+class RouteStore(Sequence):
+    """
+    Columnar, memory-mappable storage of routes.
+
+    Node names are interned to integers and each distinct (node, node) link gets an integer identifier. The
+    links of each crosshaul are stored CSR-style (one offsets array and one link identifiers array per
+    crosshaul) and the identifier, source, target, sequence and delays of the routes are stored in columns.
+    Routes are only materialized (and kept) when accessed, so a store can stand in for the route list.
+    """
+
+    def __init__(self, node_names: list[str], columns: dict[str, numpy.ndarray]) -> None:
+        self.node_names = node_names
+        self.columns = columns
+        self.__routes: list = [None] * len(columns['identifiers'])
+        self.__link_tuples = None
+        self.__first_identifier = None
+        self.__sorted_positions = None
+
+    @staticmethod
+    def from_routes(routes: list[Route]) -> 'RouteStore':
+        """ :returns: A store with the given routes, in the same order """
+        node_ids = {}
+        link_ids = {}
+        link_nodes = []
+
+        def intern_node(node_name) -> int:
+            node_id = node_ids.get(node_name)
+            if node_id is None:
+                node_id = node_ids[node_name] = len(node_ids)
+            return node_id
+
+        def intern_link(link) -> int:
+            link_id = link_ids.get(link)
+            if link_id is None:
+                link_id = link_ids[link] = len(link_ids)
+                link_nodes.append((intern_node(link[0]), intern_node(link[1])))
+            return link_id
+
+        identifiers = numpy.empty(len(routes), dtype=numpy.int64)
+        endpoints = numpy.empty((len(routes), 2), dtype=numpy.int32)
+        sequences = numpy.empty((len(routes), len(CROSSHAULS)), dtype=numpy.int32)
+        delays = numpy.empty((len(routes), len(CROSSHAULS)), dtype=numpy.float64)
+        crosshaul_links = {crosshaul: [] for crosshaul in CROSSHAULS}
+        crosshaul_offsets = {crosshaul: numpy.zeros(len(routes) + 1, dtype=numpy.int64) for crosshaul in CROSSHAULS}
+
+        for position, route in enumerate(routes):
+            identifiers[position] = route.identifier
+            endpoints[position] = (intern_node(route.source), intern_node(route.target))
+            sequences[position] = [intern_node(node) for node in route.sequence]
+            delays[position] = (route.delay_backhaul, route.delay_midhaul, route.delay_fronthaul)
+            for crosshaul in CROSSHAULS:
+                links = crosshaul_links[crosshaul]
+                links.extend(intern_link(tuple(link)) for link in getattr(route, crosshaul))
+                crosshaul_offsets[crosshaul][position + 1] = len(links)
+
+        columns = {'identifiers': identifiers, 'endpoints': endpoints, 'sequences': sequences, 'delays': delays,
+                   'link_nodes': numpy.array(link_nodes, dtype=numpy.int32).reshape(-1, 2)}
+        for crosshaul in CROSSHAULS:
+            columns['{}_offsets'.format(crosshaul)] = crosshaul_offsets[crosshaul]
+            columns['{}_links'.format(crosshaul)] = numpy.array(crosshaul_links[crosshaul], dtype=numpy.int32)
+
+        node_names = [None] * len(node_ids)
+        for node_name, node_id in node_ids.items():
+            node_names[node_id] = node_name
+
+        return RouteStore(node_names, columns)
+
+    def save(self, path: str) -> None:
+        """ Saves the store as a directory with one .npy file per column """
+        os.makedirs(path, exist_ok=True)
+        for name, column in self.columns.items():
+            numpy.save(os.path.join(path, '{}.npy'.format(name)), column)
+        with open(os.path.join(path, 'store.json'), 'w') as store_file:
+            json.dump({'version': ROUTE_STORE_VERSION, 'node_names': self.node_names,
+                       'columns': list(self.columns.keys())}, store_file)
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> 'RouteStore':
+        """ :returns: The store saved in path, with its columns memory-mapped (read-only) unless mmap is False """
+        with open(os.path.join(path, 'store.json'), 'r') as store_file:
+            metadata = json.load(store_file)
+        if metadata['version'] != ROUTE_STORE_VERSION:
+            raise ValueError('Unsupported route store version: {}'.format(metadata['version']))
+
+        columns = {name: numpy.load(os.path.join(path, '{}.npy'.format(name)), mmap_mode='r' if mmap else None)
+                   for name in metadata['columns']}
+        return RouteStore(metadata['node_names'], columns)
+
+    def __len__(self) -> int:
+        return len(self.__routes)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[idx] for idx in range(*position.indices(len(self)))]
+
+        route = self.__routes[position]
+        if route is None:
+            route = self.__routes[position] = self.__materialize(position % len(self))
+        return route
+
+    def __materialize(self, position: int) -> Route:
+        if self.__link_tuples is None:
+            self.__link_tuples = [(self.node_names[node1], self.node_names[node2])
+                                  for node1, node2 in self.columns['link_nodes'].tolist()]
+
+        crosshauls = {}
+        for crosshaul in CROSSHAULS:
+            offsets = self.columns['{}_offsets'.format(crosshaul)]
+            links = self.columns['{}_links'.format(crosshaul)][offsets[position]:offsets[position + 1]]
+            crosshauls[crosshaul] = [self.__link_tuples[link_id] for link_id in links.tolist()]
+
+        source, target = self.columns['endpoints'][position].tolist()
+        delay_backhaul, delay_midhaul, delay_fronthaul = self.columns['delays'][position].tolist()
+        return Route(int(self.columns['identifiers'][position]), self.node_names[source], self.node_names[target],
+                     [self.node_names[node] for node in self.columns['sequences'][position].tolist()],
+                     crosshauls['fronthaul'], crosshauls['midhaul'], crosshauls['backhaul'],
+                     delay_fronthaul, delay_midhaul, delay_backhaul)
+
+    def get_position(self, identifier: int) -> int:
+        """ :returns: The position of the route with the given identifier """
+        identifiers = self.columns['identifiers']
+        if self.__first_identifier is None and self.__sorted_positions is None:
+            first_identifier = int(identifiers[0]) if len(identifiers) > 0 else 0
+            # routes are generated with sequential identifiers, otherwise fall back to a sorted index
+            if numpy.array_equal(identifiers, numpy.arange(first_identifier, first_identifier + len(identifiers))):
+                self.__first_identifier = first_identifier
+            else:
+                self.__sorted_positions = numpy.argsort(identifiers, kind='stable')
+
+        if self.__first_identifier is not None:
+            position = identifier - self.__first_identifier
+            if not 0 <= position < len(identifiers):
+                raise KeyError(identifier)
+            return position
+
+        sorted_position = numpy.searchsorted(identifiers, identifier, sorter=self.__sorted_positions)
+        if (sorted_position == len(identifiers) or
+                identifiers[self.__sorted_positions[sorted_position]] != identifier):
+            raise KeyError(identifier)
+        return int(self.__sorted_positions[sorted_position])
+
+    def get_route(self, identifier: int) -> Route:
+        """ :returns: The route with the given identifier, materializing only that route """
+        return self[self.get_position(identifier)]
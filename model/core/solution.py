@@ -0,0 +1,137 @@
+import collections
+
+from core.model import *
+
+# decision variables above this value are selected
+SELECTION_TOLERANCE = 10 ** (-3)
+
+
+class PlacementView:
+    """
+    Selected candidates, turned on hardware units and resulting usages of a placement, shared by the solved
+    model (SolutionView) and the solver-free placements (core.heuristic.GreedySolution).
+
+    The selection is given by positions in keys, y follows hwKeys, hwUsage follows usageHwKeys and linkUsage
+    follows linkKeys, all as NumPy arrays.
+    """
+
+    def __init__(self, topo: Topology, splits: list[Drc], keys: list, selected: numpy.ndarray, hw_keys: list[str],
+                 y: numpy.ndarray, usage_hw_keys: list[str], hw_usage: numpy.ndarray, link_keys: list[str],
+                 link_usage: numpy.ndarray) -> None:
+        self.topo = topo
+        self.splits = splits
+        self.keys = keys
+        self.selected = selected
+        self.hwKeys = hw_keys
+        self.y = y
+        self.usageHwKeys = usage_hw_keys
+        self.hwUsage = hw_usage
+        self.linkKeys = link_keys
+        self.linkUsage = link_usage
+
+    def get_selected_keys(self) -> list:
+        """ :returns: The selected decision keys, in the order of keys """
+        return [self.keys[position] for position in self.selected.tolist()]
+
+    def get_selection(self) -> dict:
+        """ :returns: The selected decision key of each (assigned) base station """
+        return {key.bs_key: key for key in self.get_selected_keys()}
+
+    def get_drc_counts(self) -> dict[int, int]:
+        """ :returns: The amount of base stations using each DRC """
+        return collections.Counter(key.drc_id for key in self.get_selected_keys())
+
+    def get_turned_on_units(self) -> dict[str, float]:
+        """ :returns: The hardware units turned on in each hardware with any """
+        turned_on = numpy.flatnonzero(self.y > SELECTION_TOLERANCE)
+        return {self.hwKeys[position]: self.y[position] for position in turned_on.tolist()}
+
+    def get_num_turned_on_machines(self) -> float:
+        return float(self.y[self.y > SELECTION_TOLERANCE].sum())
+
+    def get_hw_usage(self, minimum: float = 0.0) -> dict[str, float]:
+        """ :returns: The GOPS used in each hardware using more than minimum """
+        used = numpy.flatnonzero(self.hwUsage > minimum)
+        return {self.usageHwKeys[position]: self.hwUsage[position] for position in used.tolist()}
+
+    def get_link_usage(self, minimum: float = 0.0) -> dict[str, float]:
+        """ :returns: The bandwidth used in each physical link using more than minimum, see expand_link_usage() """
+        used = numpy.flatnonzero(self.linkUsage > minimum)
+        return self.topo.expand_link_usage({self.linkKeys[position]: self.linkUsage[position]
+                                            for position in used.tolist()})
+
+    def get_deployment(self, drcs: list[Drc] = None) -> Deployment:
+        """ :returns: The deployment of the selected candidates (over the given DRCs, default: the service splits) """
+        deployment = Deployment(self.topo.get_base_station_keys(), drcs if drcs is not None else self.splits,
+                                self.topo.get_routes())
+        for key in self.get_selected_keys():
+            deployment.SetDeploy(key.bs_key, key.drc_id, key.route_id)
+        return deployment
+
+
+class SolutionView(PlacementView):
+    """
+    Values of a solved EEPRAN model, as NumPy arrays aligned with the decision keys (structure.decisionVarKeys)
+    and the hardware keys (model.y).
+
+    Every variable value is read from the solution in a single bulk call, and the hardware and link usages
+    are products of the load matrices of the model (see EEPRANModel.get_load_matrices()) with the X values,
+    so reporting does not query the solution expression by expression.
+    """
+
+    def __init__(self, eepran_model: EEPRANModel, solution=None) -> None:
+        """
+        Parameters
+        ----------
+
+        eepran_model : EEPRANModel
+            The solved model (of either backend).
+        solution : SolveSolution
+            The solution to read, by default the last solution of the model.
+        """
+        self.eepranModel = eepran_model
+        self.solution = solution if solution is not None else eepran_model.model.solution
+
+        model = eepran_model.model
+        structure = eepran_model.structure
+        keys = structure.decisionVarKeys
+        hw_keys = list(model.y.keys())
+
+        x_vars = [model.x[key] for key in keys]
+        y_vars = [model.y[hw_key] for hw_key in hw_keys]
+        values = numpy.array(self.solution.get_values(x_vars + y_vars), dtype=float)
+        self.x = values[:len(x_vars)]
+
+        usage_hw_keys, hw_usage, link_keys, link_usage = eepran_model.get_load_matrices()
+        super().__init__(structure.topo, structure.splits, keys, numpy.flatnonzero(self.x > SELECTION_TOLERANCE),
+                         hw_keys, values[len(x_vars):], usage_hw_keys, hw_usage @ self.x, link_keys,
+                         link_usage @ self.x)
+
+        self.objectiveValue = self.solution.get_objective_value()
+        self.centralization = self.solution.get_value(eepran_model.centralizationContraint.left_expr)
+        self.ranPower = self.solution.get_value(eepran_model.ranPowerExpr)
+        self.netPower = self.solution.get_value(eepran_model.netPowerExpr)
+        self.migPower = self.solution.get_value(eepran_model.migPowerExpr)
+
+    def get_migrations(self, deployment: Deployment) -> list[tuple[str, str, str]]:
+        """
+        Returns the CU and DU functions of the selected candidates that are not deployed in the same place.
+
+        As reported by the experiments, CU functions are placed in the first node of the route sequence and
+        DU functions in the second one.
+
+        Returns
+        -------
+
+        The (bs_key, vnf, hw) of each migrated function, in decision key order.
+        """
+        topo = self.eepranModel.structure.topo
+        drc_dict = self.eepranModel.structure.drcDict
+        placements = []
+        for key in self.get_selected_keys():
+            sequence = topo.get_route(key.route_id).sequence
+            placements += [(key.bs_key, vnf, sequence[0]) for vnf in drc_dict[key.drc_id].fs_cu]
+            placements += [(key.bs_key, vnf, sequence[1]) for vnf in drc_dict[key.drc_id].fs_du]
+
+        deployed = deployment.AreDeployedIn(placements)
+        return [placement for placement, is_deployed in zip(placements, deployed.tolist()) if not is_deployed]
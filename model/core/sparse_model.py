@@ -0,0 +1,735 @@
+import numpy
+import scipy.sparse
+
+from docplex.mp.advmodel import AdvModel
+
+from core.model import *
+
+# crosshaul segments, in the same order used by EEPRANStructure.keyLinks
+SEGMENT_BACKHAUL = 0
+SEGMENT_MIDHAUL = 1
+SEGMENT_FRONTHAUL = 2
+SEGMENT_BANDWIDTHS = ['bandwidth_bh', 'bandwidth_mh', 'bandwidth_fh']
+
+# load dependent coefficients of a timestamp, matrices are indexed by (processing / link row, candidate)
+SparseLoad = namedtuple('SparseLoad', ['bs_users', 'node_vnf_gops', 'users', 'gops', 'hw_usage', 'link_usage',
+                                       'dynamic_power', 'net_power', 'migration_power'])
+
+
+class SparseEEPRANStructure(EEPRANStructure):
+    """
+    Load independent part of an EEPRAN model built by the sparse backend.
+
+    Instead of per candidate lists, placements, link usages and migrations are kept as index arrays
+    (one entry per candidate term) sorted by candidate, so the load dependent coefficients of every
+    constraint can be computed at once with NumPy and SciPy sparse matrices.
+    """
+
+    def __init__(self, topo: Topology, decision_var_keys: list, decision_var_keys_by_bs: dict[str, list],
+                 splits: list[Drc], drc_dict: dict[int, Drc], drc_dict_embb: dict[int, Drc], throughput: float,
+                 cr_mode: str, vnf_mig_cost: dict[str, float], maximum_centralization: int) -> None:
+        super().__init__(topo, decision_var_keys, decision_var_keys_by_bs, splits, drc_dict, drc_dict_embb,
+                         throughput, cr_mode, vnf_mig_cost, maximum_centralization)
+
+        self.baseStationKeys: list[str] = []
+        self.nodeKeys: list[str] = []
+        self.hwKeys: list[str] = []
+        self.linkKeys: list[str] = []
+
+        # candidate -> base station / drc position
+        self.keyBs: numpy.ndarray = None
+        self.keyDrc: numpy.ndarray = None
+        self.keyPositions: dict[tuple, int] = None
+
+        # placement terms: (candidate, function, node, processing row)
+        self.placementKeys: numpy.ndarray = None
+        self.placementFunctions: numpy.ndarray = None
+        self.placementNodes: numpy.ndarray = None
+        self.placementHws: numpy.ndarray = None
+        self.placementPointers: numpy.ndarray = None
+
+        # link terms: (link row, candidate, segment), sorted by link row
+        self.linkTermLinks: numpy.ndarray = None
+        self.linkTermKeys: numpy.ndarray = None
+        self.linkTermSegments: numpy.ndarray = None
+        # link terms of each candidate: linkTermOrder[linkTermPointers[k]:linkTermPointers[k + 1]]
+        self.linkTermOrder: numpy.ndarray = None
+        self.linkTermPointers: numpy.ndarray = None
+
+        # migration terms: (candidate, function, unique (bs, function, hw) position)
+        self.migrationKeys: numpy.ndarray = None
+        self.migrationFunctions: numpy.ndarray = None
+        self.migrationTargets: numpy.ndarray = None
+        self.migrationTargetKeys: list[tuple[str, str, str]] = []
+
+        # processing row -> hw data
+        self.processingHwKeys: list[str] = []
+        self.processingCapacities: numpy.ndarray = None
+        self.processingDynamicPower: numpy.ndarray = None
+
+        # link row -> link data
+        self.linkPortCapacities: numpy.ndarray = None
+        self.linkCosts: numpy.ndarray = None
+
+        # drc position -> segment bandwidth (always the eMBB ones, as in the expression backend)
+        self.drcBandwidths: numpy.ndarray = None
+
+    def compute_load(self, timestamp: int = -1, actual_deployment: Deployment = None) -> SparseLoad:
+        """
+        Computes the load dependent coefficients of every candidate for the given timestamp.
+
+        Parameters
+        ----------
+
+        timestamp : int
+            The timestamp of the base station usage, -1 means one user per base station.
+        actual_deployment : Deployment
+            The current deployment, used to define the migration costs.
+
+        Returns
+        -------
+
+        The GOPS used by each candidate in each hardware, the bandwidth used by each candidate in each link
+        and the RAN, network and migration power coefficients of each candidate.
+        """
+        topo = self.topo
+        num_keys = len(self.decisionVarKeys)
+
+        gops_table = topo.get_gops_table(self.crMode)
+        users = gops_table.get_users(timestamp).astype(float)
+        gops = gops_table.get_gops(timestamp)
+        bs_users = dict(zip(gops_table.base_station_keys, gops_table.get_users(timestamp).tolist()))
+        node_vnf_gops = gops_table.get_node_vnf_gops(timestamp)
+
+        if actual_deployment is None:
+            actual_deployment = Deployment(topo.get_base_station_keys(), self.splits, topo.get_routes())
+
+        # ---------- vRAN Consumption ----------
+        placement_gops = gops[self.keyBs[self.placementKeys], self.placementFunctions]
+        hw_usage = scipy.sparse.csr_matrix(
+            (placement_gops, (self.placementHws, self.placementKeys)),
+            shape=(len(self.processingHwKeys), num_keys))
+        dynamic_power = numpy.bincount(
+            self.placementKeys,
+            weights=(placement_gops * self.processingDynamicPower[self.placementHws] /
+                     self.processingCapacities[self.placementHws]),
+            minlength=num_keys)
+
+        # ---------- Network Link Usage ----------
+        link_term_bandwidths = (self.drcBandwidths[self.keyDrc[self.linkTermKeys], self.linkTermSegments] *
+                                self.throughput * users[self.keyBs[self.linkTermKeys]] * 10 ** (-9))
+        link_usage = scipy.sparse.csr_matrix(
+            (link_term_bandwidths, (self.linkTermLinks, self.linkTermKeys)),
+            shape=(len(self.linkKeys), num_keys))
+
+        # ---------- Migration ----------
+        deployed = actual_deployment.AreDeployedIn(self.migrationTargetKeys).astype(float)
+        mig_costs = numpy.array([self.vnfMigCost[function] for function in VIRTUAL_NETWORK_FUNCTIONS])
+        migration_power = numpy.bincount(
+            self.migrationKeys,
+            weights=(1 - deployed[self.migrationTargets]) * mig_costs[self.migrationFunctions],
+            minlength=num_keys)
+
+        link_rows = numpy.repeat(numpy.arange(len(self.linkKeys)), numpy.diff(link_usage.indptr))
+        net_power = numpy.bincount(link_usage.indices,
+                                   weights=(link_usage.data / self.linkPortCapacities[link_rows] *
+                                            self.linkCosts[link_rows]),
+                                   minlength=num_keys)
+
+        return SparseLoad(bs_users, node_vnf_gops, users, gops, hw_usage, link_usage, dynamic_power, net_power,
+                          migration_power)
+
+
+class SparseEEPRANModel(EEPRANModel):
+    """
+    EEPRAN model built by build_eepran_model_sparse().
+
+    Exposes the same attributes as EEPRANModel, so the solution reporting is unchanged, but computes
+    the load dependent coefficients with sparse matrices instead of per candidate loops.
+    """
+
+    def __init__(self, model: Model, centralization_constraint: AbstractConstraint,
+                 ran_power_expr: LinearExpr, net_power_expr: LinearExpr, mig_power_expr: LinearExpr,
+                 link_usage_exprs: dict[str, LinearExpr], link_power_exprs: dict[str, LinearExpr],
+                 hw_usage_exprs: dict[str, LinearExpr], hw_capacities: dict[str, int],
+                 structure: SparseEEPRANStructure, x_vars: list, load: SparseLoad) -> None:
+        super().__init__(model, centralization_constraint, ran_power_expr, net_power_expr, mig_power_expr,
+                         link_usage_exprs, link_power_exprs, hw_usage_exprs, hw_capacities, {}, structure)
+        self.xVars = x_vars
+        self.bsUsersArray: numpy.ndarray = None
+        self.gopsArray: numpy.ndarray = None
+        self.hwUsageMatrix: scipy.sparse.csr_matrix = None
+        self.linkUsageMatrix: scipy.sparse.csr_matrix = None
+        self.set_load(load)
+
+    def set_load(self, load: SparseLoad) -> None:
+        """ Keeps the base station load the model coefficients were computed for """
+        self.nodeVnfGops = load.node_vnf_gops
+        self.bsUsers = load.bs_users
+        self.bsUsersArray = load.users
+        self.gopsArray = load.gops
+        self.hwUsageMatrix = load.hw_usage
+        self.linkUsageMatrix = load.link_usage
+
+    def update_load(self, timestamp: int = -1, actual_deployment: Deployment = None) -> None:
+        """
+        Updates the load dependent coefficients of the model in place.
+
+        Same as EEPRANModel.update_load(), with the coefficients computed as sparse matrices.
+
+        Parameters
+        ----------
+
+        timestamp : int
+            The timestamp of the base station usage, -1 means one user per base station.
+        actual_deployment : Deployment
+            The current deployment, used to define the migration costs.
+
+        """
+        update_start = time.time()
+
+        structure = self.structure
+        load = structure.compute_load(timestamp, actual_deployment)
+        hw_usage = load.hw_usage
+        link_usage = load.link_usage
+
+        # ---------- RAN Power Consumption and Processing Capacity ----------
+        self.ranPowerExpr.set_coefficients(self.__vector_terms(load.dynamic_power * 3600))
+        for row, hw_key in enumerate(structure.processingHwKeys):
+            coefs = self.__row_terms(hw_usage, row)
+            capacity = self.hwCapacities[hw_key]
+            ceil_coefs = [(x, -coef / capacity) for x, coef in coefs]
+            structure.lowCeilConstraints[hw_key].left_expr.set_coefficients(ceil_coefs)
+            structure.highCeilConstraints[hw_key].left_expr.set_coefficients(ceil_coefs)
+            structure.processingConstraints[hw_key].left_expr.set_coefficients(coefs)
+
+        # ---------- Network Power Consumption and Link Capacity ----------
+        for row, link_key in enumerate(structure.linkKeys):
+            coefs = self.__row_terms(link_usage, row)
+            port_capacity = structure.linkPortCapacities[row]
+            cost = structure.linkCosts[row]
+
+            self.linkUsageExprs[link_key].set_coefficients(coefs)
+            structure.linkCapacityConstraints[link_key].left_expr.set_coefficients(
+                [(x, coef / port_capacity) for x, coef in coefs])
+            self.linkPowerExprs[link_key].set_coefficients(
+                [(x, coef / port_capacity * cost) for x, coef in coefs])
+        self.netPowerExpr.set_coefficients(self.__vector_terms(load.net_power * 3600))
+
+        # ---------- Migration Power Consumption ----------
+        self.migPowerExpr.set_coefficients(self.__vector_terms(load.migration_power))
+
+        self.set_load(load)
+        self.timestamp = timestamp
+
+        update_end = time.time()
+        logging.info('Model Load Update (timestamp {}): {}s'.format(timestamp, update_end - update_start))
+
+    def __vector_terms(self, coefs: numpy.ndarray) -> list:
+        return list(zip(self.xVars, coefs.tolist()))
+
+    def __row_terms(self, matrix: scipy.sparse.csr_matrix, row: int) -> list:
+        begin, end = matrix.indptr[row], matrix.indptr[row + 1]
+        x_vars = self.xVars
+        return [(x_vars[col], coef) for col, coef in
+                zip(matrix.indices[begin:end].tolist(), matrix.data[begin:end].tolist())]
+
+    def get_load_matrices(self) -> tuple[list[str], scipy.sparse.csr_matrix, list[str], scipy.sparse.csr_matrix]:
+        return self.structure.processingHwKeys, self.hwUsageMatrix, self.structure.linkKeys, self.linkUsageMatrix
+
+    def get_key_placements(self, key) -> list[tuple[str, str, str]]:
+        structure = self.structure
+        position = structure.keyPositions[key]
+        begin, end = structure.placementPointers[position], structure.placementPointers[position + 1]
+        return [(VIRTUAL_NETWORK_FUNCTIONS[function], structure.nodeKeys[node], structure.processingHwKeys[hw])
+                for function, node, hw in zip(structure.placementFunctions[begin:end].tolist(),
+                                              structure.placementNodes[begin:end].tolist(),
+                                              structure.placementHws[begin:end].tolist())]
+
+    def get_key_loads(self, key) -> tuple[dict[str, float], dict[str, float]]:
+        structure = self.structure
+        position = structure.keyPositions[key]
+        bs_position = structure.keyBs[position]
+
+        hw_loads = {}
+        begin, end = structure.placementPointers[position], structure.placementPointers[position + 1]
+        for function, hw in zip(structure.placementFunctions[begin:end].tolist(),
+                                structure.placementHws[begin:end].tolist()):
+            hw_key = structure.processingHwKeys[hw]
+            hw_loads[hw_key] = hw_loads.get(hw_key, 0) + self.gopsArray[bs_position, function]
+
+        link_loads = {}
+        terms = structure.linkTermOrder[structure.linkTermPointers[position]:structure.linkTermPointers[position + 1]]
+        for link, segment in zip(structure.linkTermLinks[terms].tolist(), structure.linkTermSegments[terms].tolist()):
+            link_key = structure.linkKeys[link]
+            bandwidth = (structure.drcBandwidths[structure.keyDrc[position], segment] * structure.throughput *
+                         self.bsUsersArray[bs_position] * 10 ** (-9))
+            link_loads[link_key] = link_loads.get(link_key, 0) + bandwidth
+
+        return hw_loads, link_loads
+
+
+def _first_appearance_order(rows: numpy.ndarray, ranks: numpy.ndarray, num_rows: int) -> numpy.ndarray:
+    """ :returns: The rows that appear in the terms, ordered by the smallest rank of their terms """
+    first_rank = numpy.full(num_rows, numpy.iinfo(numpy.int64).max, dtype=numpy.int64)
+    numpy.minimum.at(first_rank, rows, ranks)
+    appearing = numpy.flatnonzero(first_rank < numpy.iinfo(numpy.int64).max)
+    return appearing[numpy.argsort(first_rank[appearing], kind='stable')]
+
+
+def _linear_expr(model: Model, variables: list, coefs: numpy.ndarray) -> LinearExpr:
+    """ :returns: A LinearExpr (never a ZeroExpr) that can have its coefficients updated in place """
+    expression = model.linear_expr()
+    expression.add(model.scal_prod(variables, coefs))
+    return expression
+
+
+def _remap(values: numpy.ndarray, order: numpy.ndarray, num_values: int) -> numpy.ndarray:
+    """ :returns: The position of each value in order (-1 for values not in order) """
+    positions = numpy.full(num_values, -1, dtype=numpy.int64)
+    positions[order] = numpy.arange(len(order))
+    return positions[values]
+
+
+def build_eepran_model_sparse(topo: Topology, timestamp: int = -1, centralization_cap: int = 0,
+                              service: str = SERVICE_URLLC, cr_mode: str = CR_MODE_CALC,
+                              actual_deployment: Deployment = None,
+                              lazy_link_capacity: bool = False, export_lp: bool = True) -> SparseEEPRANModel:
+    """
+    Builds the EEPRAN model for the given topology assembling its constraints as sparse matrices.
+
+    Builds the same model as build_eepran_model(), but the coefficients of every constraint family
+    (hardware and centralization ceil restrictions, link capacity, single route and processing
+    capacity) are computed with NumPy over index arrays and loaded into docplex in bulk through
+    matrix_constraints(), avoiding the per candidate expression updates of the expression backend.
+
+    With lazy_link_capacity, the link capacity constraints are left out of the model and only added by a
+    lazy constraint callback when an incumbent violates them (see LazyLinkCapacityCallback).
+
+    The model is exported to data/model_opt.lp unless export_lp is False.
+    """
+
+    model = AdvModel(name='EEPRAN Problem', log_output=True)
+    model.parameters.mip.tolerances.mipgap = 1e-5
+
+    logging.info('Model Creation Time (sparse):')
+
+    # -----------
+    # Define Data
+    # -----------
+
+    data_defining_start = time.time()
+
+    splits, drc_dict, drc_dict_embb, throughput, vnf_mig_cost = get_service_data(service)
+
+    maximum_centralization = len(VIRTUAL_NETWORK_FUNCTIONS) * len(topo.get_base_station_keys())
+
+    integer_feasibility_tolerance = 1 / maximum_centralization
+
+    routes = topo.get_routes()
+    # nodes and hardwares are numbered by their interned identifiers
+    index = topo.get_index()
+    base_station_keys = index.base_stations.keys
+    node_keys = index.nodes.keys
+    node_positions = index.nodes.ids
+    hw_keys = index.hardwares.keys
+    hw_positions = index.hardwares.ids
+    function_positions = {function: position for position, function in enumerate(VIRTUAL_NETWORK_FUNCTIONS)}
+
+    data_defining_end = time.time()
+    logging.info('    Data Definition: {}s'.format(data_defining_end - data_defining_start))
+
+    # --------------------------
+    # Define Decision Variable X
+    # --------------------------
+
+    var_definition_start = time.time()
+
+    candidate_generation_start = time.time()
+    delay_table = topo.get_crosshaul_delay_table(splits)
+    feasible_routes = {drc.identifier: delay_table.feasible_routes(drc) for drc in splits}
+    candidate_index = CandidateIndex(routes, splits, base_station_keys)
+    key_routes, key_drcs, key_bss = candidate_index.generate_candidates(feasible_routes)
+    decision_var_keys = candidate_index.keys_from_candidates(key_routes, key_drcs, key_bss)
+    decision_var_keys_by_bs = group_keys_by_base_station(decision_var_keys, base_station_keys)
+    num_keys = len(decision_var_keys)
+    candidate_generation_end = time.time()
+    logging.info('      - Candidate Generation: {}s ({} candidates)'.format(
+        candidate_generation_end - candidate_generation_start, num_keys))
+
+    ceil_var_keys = [CeilVariableKey(node_key, function_key)
+                     for node_key in node_keys
+                     for function_key in VIRTUAL_NETWORK_FUNCTIONS
+                     if topo.get_node(node_key).has_hardware()]
+    # node -> first ceil variable position (-1 for nodes without hardware)
+    node_ceil_base = numpy.full(len(node_keys), -1, dtype=numpy.int64)
+    for position in range(0, len(ceil_var_keys), len(VIRTUAL_NETWORK_FUNCTIONS)):
+        node_ceil_base[node_positions[ceil_var_keys[position].node_key]] = position
+
+    model.x = model.binary_var_dict(
+        keys=decision_var_keys,
+        name=lambda vk: 'x_path{}_drc{}_{}'.format(vk.route_id, vk.drc_id, vk.bs_key)
+    )
+    model.y = model.integer_var_dict(keys=hw_keys, name='y')
+    model.z = model.integer_var_dict(keys=ceil_var_keys, name='z')
+
+    x_vars = [model.x[key] for key in decision_var_keys]
+    y_vars = [model.y[hw_key] for hw_key in hw_keys]
+    z_vars = [model.z[key] for key in ceil_var_keys]
+    # columns of every constraint matrix: [x | y | z]
+    all_vars = x_vars + y_vars + z_vars
+    y_offset = num_keys
+    z_offset = num_keys + len(hw_keys)
+
+    var_definition_end = time.time()
+    logging.info('    Variables Definition: {}s'.format(var_definition_end - var_definition_start))
+
+    # ---------------------------
+    # Define Candidate Structures
+    # ---------------------------
+
+    structure_start = time.time()
+
+    structure = SparseEEPRANStructure(topo, decision_var_keys, decision_var_keys_by_bs, splits, drc_dict,
+                                      drc_dict_embb, throughput, cr_mode, vnf_mig_cost, maximum_centralization)
+    structure.baseStationKeys = base_station_keys
+    structure.nodeKeys = node_keys
+    structure.hwKeys = hw_keys
+    structure.keyBs = key_bss
+    structure.keyDrc = key_drcs
+    structure.keyPositions = {key: position for position, key in enumerate(decision_var_keys)}
+
+    # route -> (node, hw) of each crosshaul segment and links of each segment, only for the routes
+    # of some candidate (key_routes is remapped to the position in used_routes)
+    used_routes, key_routes = numpy.unique(key_routes, return_inverse=True)
+    route_nodes = numpy.full((len(used_routes), 3), -1, dtype=numpy.int64)
+    route_hws = numpy.full((len(used_routes), 3), -1, dtype=numpy.int64)
+    route_shapes = numpy.zeros(len(used_routes), dtype=numpy.int64)
+    link_positions = {}
+    segment_link_rows = [[], [], []]
+    segment_link_cols = [[], [], []]
+    segment_link_ranks = [[], [], []]
+    for position, route_position in enumerate(used_routes.tolist()):
+        route = routes[route_position]
+        segment_nodes = [route.get_backhaul_node_key(), route.get_midhaul_node_key(), route.get_fronthaul_node_key()]
+        segment_hws = [route.get_backhaul_hardware_key(), route.get_midhaul_hardware_key(),
+                       route.get_fronthaul_hardware_key()]
+        for segment in range(3):
+            if segment_nodes[segment] is not None:
+                route_nodes[position, segment] = node_positions[segment_nodes[segment]]
+            if segment_hws[segment] is not None:
+                route_hws[position, segment] = hw_positions[segment_hws[segment]]
+        route_shapes[position] = (route.has_backhaul() * 4 + route.has_midhaul() * 2 + route.has_fronthaul())
+
+        segment_links = [route.get_backhaul_links(), route.get_midhaul_links(), route.get_fronthaul_links()]
+        for segment in range(3):
+            for link_rank, link_key in enumerate(segment_links[segment]):
+                segment_link_rows[segment].append(position)
+                segment_link_cols[segment].append(link_positions.setdefault(link_key, len(link_positions)))
+                segment_link_ranks[segment].append(link_rank)
+
+    # ---------- vRAN Consumption ----------
+    # (drc, route shape) -> [(function, segment)], following the placement rules of the expression backend
+    placement_keys, placement_functions, placement_nodes, placement_hws = [], [], [], []
+    migration_keys, migration_functions, migration_hws = [], [], []
+    group_ids = key_drcs * 8 + route_shapes[key_routes]
+    for group_id in numpy.unique(group_ids).tolist():
+        drc = splits[group_id // 8]
+        shape = group_id % 8
+        has_backhaul, has_midhaul = bool(shape & 4), bool(shape & 2)
+        group_keys = numpy.flatnonzero(group_ids == group_id)
+        group_routes = key_routes[group_keys]
+
+        for function in VIRTUAL_NETWORK_FUNCTIONS:
+            segment = None
+            if has_backhaul and function in drc.fs_cu:
+                segment = SEGMENT_BACKHAUL
+            elif has_midhaul and function in drc.fs_du:
+                segment = SEGMENT_MIDHAUL
+            elif function in drc.fs_ru:
+                segment = SEGMENT_FRONTHAUL
+            if segment is None:
+                continue
+
+            nodes = route_nodes[group_routes, segment]
+            hws = route_hws[group_routes, segment]
+            placed = (nodes >= 0) & (hws >= 0)
+            placement_keys.append(group_keys[placed])
+            placement_functions.append(numpy.full(placed.sum(), function_positions[function], dtype=numpy.int64))
+            placement_nodes.append(nodes[placed])
+            placement_hws.append(hws[placed])
+
+        # ---------- Migration ----------
+        for segment, functions in [(SEGMENT_BACKHAUL, drc.fs_cu), (SEGMENT_MIDHAUL, drc.fs_du),
+                                   (SEGMENT_FRONTHAUL, drc.fs_ru)]:
+            for function in functions:
+                if function not in function_positions:
+                    continue
+                migration_keys.append(group_keys)
+                migration_functions.append(numpy.full(len(group_keys), function_positions[function],
+                                                      dtype=numpy.int64))
+                migration_hws.append(route_hws[group_routes, segment])
+
+    def concatenate(arrays: list) -> numpy.ndarray:
+        return numpy.concatenate(arrays) if len(arrays) > 0 else numpy.empty(0, dtype=numpy.int64)
+
+    placement_keys = concatenate(placement_keys)
+    placement_functions = concatenate(placement_functions)
+    placement_nodes = concatenate(placement_nodes)
+    placement_hws = concatenate(placement_hws)
+    order = numpy.lexsort((placement_functions, placement_keys))
+    placement_keys = placement_keys[order]
+    placement_functions = placement_functions[order]
+    placement_nodes = placement_nodes[order]
+    placement_hws = placement_hws[order]
+
+    # processing rows follow the order each hardware is first used by a candidate
+    _, first_placements = numpy.unique(placement_hws, return_index=True)
+    first_placements = numpy.sort(first_placements)
+    processing_order = placement_hws[first_placements]
+    processing_hw_keys = [hw_keys[hw] for hw in processing_order.tolist()]
+    hw_capacities = {}
+    static_power = numpy.empty(len(processing_hw_keys))
+    dynamic_power = numpy.empty(len(processing_hw_keys))
+    for row, (hw_position, node_position) in enumerate(zip(processing_order.tolist(),
+                                                           placement_nodes[first_placements].tolist())):
+        hw_key = hw_keys[hw_position]
+        hw = topo.get_hardware_by_index(hw_position)
+        node = topo.get_node_by_index(node_position)
+        hw_capacities[hw_key] = hw.gops_capacity
+        dynamic_power[row] = hw.power_consumption * (1 - node.static_percentage)
+        static_power[row] = hw.power_consumption * node.static_percentage
+        structure.hwDynamicPower[hw_key] = dynamic_power[row]
+
+    structure.placementKeys = placement_keys
+    structure.placementFunctions = placement_functions
+    structure.placementNodes = placement_nodes
+    structure.placementHws = _remap(placement_hws, processing_order, len(hw_keys))
+    structure.placementPointers = numpy.searchsorted(placement_keys, numpy.arange(num_keys + 1))
+    structure.processingHwKeys = processing_hw_keys
+    structure.processingCapacities = numpy.array([hw_capacities[hw_key] for hw_key in processing_hw_keys],
+                                                 dtype=float)
+    structure.processingDynamicPower = dynamic_power
+
+    migration_keys = concatenate(migration_keys)
+    migration_functions = concatenate(migration_functions)
+    migration_hws = concatenate(migration_hws)
+    # migration terms keep the cu -> du -> ru order of each candidate
+    order = numpy.argsort(migration_keys, kind='stable')
+    migration_keys = migration_keys[order]
+    migration_functions = migration_functions[order]
+    migration_hws = migration_hws[order]
+    targets = ((key_bss[migration_keys] * len(VIRTUAL_NETWORK_FUNCTIONS) + migration_functions) *
+               (len(hw_keys) + 1) + migration_hws + 1)
+    unique_targets, structure.migrationTargets = numpy.unique(targets, return_inverse=True)
+    structure.migrationKeys = migration_keys
+    structure.migrationFunctions = migration_functions
+    structure.migrationTargetKeys = []
+    for target in unique_targets.tolist():
+        bs_function, hw = divmod(target, len(hw_keys) + 1)
+        bs_position, function = divmod(bs_function, len(VIRTUAL_NETWORK_FUNCTIONS))
+        structure.migrationTargetKeys.append((base_station_keys[bs_position], VIRTUAL_NETWORK_FUNCTIONS[function],
+                                              hw_keys[hw - 1] if hw > 0 else None))
+
+    # ---------- Network Link Usage ----------
+    link_term_links, link_term_keys, link_term_segments, link_term_ranks = [], [], [], []
+    for segment in range(3):
+        route_links = scipy.sparse.csr_matrix(
+            (numpy.array(segment_link_ranks[segment], dtype=numpy.int64) + 1,
+             (segment_link_rows[segment], segment_link_cols[segment])),
+            shape=(len(used_routes), len(link_positions)))
+        key_links = route_links[key_routes].tocoo()
+        link_term_links.append(key_links.col.astype(numpy.int64))
+        link_term_keys.append(key_links.row.astype(numpy.int64))
+        link_term_segments.append(numpy.full(key_links.nnz, segment, dtype=numpy.int64))
+        link_term_ranks.append(key_links.data.astype(numpy.int64) - 1)
+    link_term_links = concatenate(link_term_links)
+    link_term_keys = concatenate(link_term_keys)
+    link_term_segments = concatenate(link_term_segments)
+    link_term_ranks = concatenate(link_term_ranks)
+
+    # link rows follow the order each link is first used by a candidate (bh -> mh -> fh)
+    max_links = int(link_term_ranks.max()) + 1 if len(link_term_ranks) > 0 else 1
+    link_order = _first_appearance_order(
+        link_term_links, (link_term_keys * 3 + link_term_segments) * max_links + link_term_ranks, len(link_positions))
+    link_position_keys = [None] * len(link_positions)
+    for link_key, position in link_positions.items():
+        link_position_keys[position] = link_key
+    link_keys = [link_position_keys[link] for link in link_order.tolist()]
+    link_term_links = _remap(link_term_links, link_order, len(link_positions))
+    order = numpy.lexsort((link_term_segments, link_term_keys, link_term_links))
+
+    structure.linkKeys = link_keys
+    structure.linkTermLinks = link_term_links[order]
+    structure.linkTermKeys = link_term_keys[order]
+    structure.linkTermSegments = link_term_segments[order]
+    structure.linkTermOrder = numpy.argsort(structure.linkTermKeys, kind='stable')
+    structure.linkTermPointers = numpy.searchsorted(structure.linkTermKeys[structure.linkTermOrder],
+                                                    numpy.arange(num_keys + 1))
+    # the bandwidths of DRCs without candidates are never used
+    used_drcs = set(numpy.unique(key_drcs).tolist())
+    structure.drcBandwidths = numpy.array([[getattr(drc_dict_embb[drc.identifier], attribute)
+                                            if position in used_drcs else 0.0
+                                            for attribute in SEGMENT_BANDWIDTHS]
+                                           for position, drc in enumerate(splits)]).reshape(-1, 3)
+
+    links = [topo.get_link(link_key) for link_key in link_keys]
+    structure.linkPortCapacities = numpy.array([link.port_capacity for link in links], dtype=float)
+    structure.linkCosts = numpy.array([(2 * link.pluggable_transceiver_power_consumption) +
+                                       (link.switch_port_power_consumption *
+                                        ((1 if link.is_node1_switch else 0) + (1 if link.is_node2_switch else 0)))
+                                       for link in links], dtype=float)
+    for row, link_key in enumerate(link_keys):
+        structure.linkPowerCosts[link_key] = structure.linkCosts[row]
+
+    structure_end = time.time()
+    logging.info('    Candidate Structures Definition: {}s'.format(structure_end - structure_start))
+
+    # ----------------------------
+    # Define Constraint Matrices
+    # ----------------------------
+
+    constraints_start = time.time()
+
+    load = structure.compute_load(timestamp, actual_deployment)
+
+    num_vars = len(all_vars)
+    num_processing = len(processing_hw_keys)
+
+    def widen(matrix: scipy.sparse.csr_matrix) -> scipy.sparse.csr_matrix:
+        """ :returns: The candidate matrix with the [x | y | z] columns of the constraint matrices """
+        return scipy.sparse.csr_matrix((matrix.data, matrix.indices, matrix.indptr), shape=(matrix.shape[0], num_vars))
+
+    processing_matrix = widen(load.hw_usage)
+    y_identity = scipy.sparse.csr_matrix(
+        (numpy.ones(num_processing), (numpy.arange(num_processing), y_offset + processing_order)),
+        shape=(num_processing, num_vars))
+    hw_ceil_matrix = (y_identity - scipy.sparse.diags(1 / structure.processingCapacities) @ processing_matrix).tocsr()
+    link_matrix = (scipy.sparse.diags(1 / structure.linkPortCapacities) @ widen(load.link_usage)).tocsr()
+
+    placement_ceils = node_ceil_base[placement_nodes]
+    counted = placement_ceils >= 0
+    ceil_rows = placement_ceils[counted] + placement_functions[counted]
+    vnf_count_matrix = scipy.sparse.csr_matrix(
+        (numpy.ones(len(ceil_rows)), (ceil_rows, placement_keys[counted])), shape=(len(ceil_var_keys), num_vars))
+    z_identity = scipy.sparse.csr_matrix(
+        (numpy.ones(len(ceil_var_keys)),
+         (numpy.arange(len(ceil_var_keys)), z_offset + numpy.arange(len(ceil_var_keys)))),
+        shape=(len(ceil_var_keys), num_vars))
+    z_ceil_matrix = (z_identity - vnf_count_matrix / maximum_centralization).tocsr()
+    # centralization is calculated by CR (not by Hardware)
+    centralization_matrix = scipy.sparse.csr_matrix(
+        numpy.asarray(vnf_count_matrix.sum(axis=0)) - numpy.asarray(z_identity.sum(axis=0)))
+
+    single_route_matrix = scipy.sparse.csr_matrix(
+        (numpy.ones(num_keys), (key_bss, numpy.arange(num_keys))), shape=(len(base_station_keys), num_vars))
+
+    constraints_end = time.time()
+    logging.info('    Constraint Matrices Definition: {}s'.format(constraints_end - constraints_start))
+
+    # -----------------------------
+    # Load Constraints into docplex
+    # -----------------------------
+
+    loading_start = time.time()
+
+    # constraints are added in the same order and with the same names as the expression backend
+
+    # ---------- RAN Power Consumption Definition ----------
+    low_ceils = model.matrix_constraints(hw_ceil_matrix, all_vars, numpy.zeros(num_processing), 'ge')
+    high_ceils = model.matrix_constraints(hw_ceil_matrix, all_vars,
+                                          numpy.full(num_processing, 1.0 - integer_feasibility_tolerance), 'le')
+    ceil_rows_by_hw = {hw_key: row for row, hw_key in enumerate(processing_hw_keys)}
+    hw_ceil_constraints, hw_ceil_names = [], []
+    for hw_key in hw_keys:
+        if hw_key not in ceil_rows_by_hw:
+            continue
+        row = ceil_rows_by_hw[hw_key]
+        hw_ceil_constraints += [low_ceils[row], high_ceils[row]]
+        hw_ceil_names += ['low_ceil_restriction_{}'.format(hw_key), 'high_ceil_restriction_{}'.format(hw_key)]
+    model.add_constraints(hw_ceil_constraints, hw_ceil_names)
+    for hw_key, row in ceil_rows_by_hw.items():
+        structure.lowCeilConstraints[hw_key] = low_ceils[row]
+        structure.highCeilConstraints[hw_key] = high_ceils[row]
+
+    ran_power_consumption = _linear_expr(model, x_vars, load.dynamic_power * 3600)
+    ran_power_consumption.add(model.scal_prod([y_vars[hw] for hw in processing_order.tolist()], static_power * 3600))
+
+    # ---------- Network Power Consumption Definition ----------
+    link_capacities = model.matrix_constraints(link_matrix, all_vars, [link.max_ports for link in links], 'le')
+    if not lazy_link_capacity:
+        model.add_constraints(link_capacities, ['qty_ports_link_{}'.format(link_key) for link_key in link_keys])
+
+    link_usage_expressions = {}
+    link_power_expressions = {}
+    link_usage = load.link_usage
+    for row, link_key in enumerate(link_keys):
+        structure.linkCapacityConstraints[link_key] = link_capacities[row]
+
+        begin, end = link_usage.indptr[row], link_usage.indptr[row + 1]
+        row_vars = [x_vars[col] for col in link_usage.indices[begin:end].tolist()]
+        row_usage = link_usage.data[begin:end]
+        link_usage_expressions[link_key] = _linear_expr(model, row_vars, row_usage)
+        link_power_expressions[link_key] = _linear_expr(model, row_vars, row_usage / structure.linkPortCapacities[row] *
+                                                        structure.linkCosts[row])
+    net_power_consumption = _linear_expr(model, x_vars, load.net_power * 3600)
+
+    # ---------- Migration Power Consumption Definition ---------
+    mig_power_consumption = _linear_expr(model, x_vars, load.migration_power)
+
+    # ---------- Centralization Definition ----------
+    low_z_ceils = model.matrix_constraints(z_ceil_matrix, all_vars, numpy.zeros(len(ceil_var_keys)), 'ge')
+    high_z_ceils = model.matrix_constraints(z_ceil_matrix, all_vars,
+                                            numpy.full(len(ceil_var_keys), 1.0 - integer_feasibility_tolerance), 'le')
+    z_ceil_constraints, z_ceil_names = [], []
+    for row, key in enumerate(ceil_var_keys):
+        z_ceil_constraints += [low_z_ceils[row], high_z_ceils[row]]
+        z_ceil_names += ['low_ceil_restriction_{}_{}'.format(key.node_key, key.function_key),
+                         'high_ceil_restriction_{}_{}'.format(key.node_key, key.function_key)]
+    model.add_constraints(z_ceil_constraints, z_ceil_names)
+    for row, key in enumerate(ceil_var_keys):
+        structure.vnfLowCeilConstraints[key] = low_z_ceils[row]
+        structure.vnfHighCeilConstraints[key] = high_z_ceils[row]
+
+    centralization_constraint = model.add_constraint(
+        model.matrix_constraints(centralization_matrix, all_vars, [centralization_cap], 'ge')[0],
+        'centralization_constraint')
+
+    model.maximize(centralization_constraint.left_expr)
+
+    # ---------- Single Route Definition ----------
+    single_routes = model.matrix_constraints(single_route_matrix, all_vars, numpy.ones(len(base_station_keys)), 'eq')
+    model.add_constraints(single_routes, ['single_route_{}'.format(bs_key) for bs_key in base_station_keys])
+    structure.singleRouteConstraints = dict(zip(base_station_keys, single_routes))
+
+    # ---------- Processing Capacity Definition ----------
+    processing_capacities = model.matrix_constraints(processing_matrix, all_vars,
+                                                     structure.processingCapacities, 'le')
+    model.add_constraints(processing_capacities,
+                          ['processing_capacity_{}'.format(hw_key) for hw_key in processing_hw_keys])
+    hardware_processing_expressions = {}
+    for row, hw_key in enumerate(processing_hw_keys):
+        structure.processingConstraints[hw_key] = processing_capacities[row]
+        hardware_processing_expressions[hw_key] = processing_capacities[row].left_expr
+
+    loading_end = time.time()
+    logging.info('    Constraints Loading: {}s'.format(loading_end - loading_start))
+
+    eepran_model = SparseEEPRANModel(model, centralization_constraint, ran_power_consumption,
+                                     net_power_consumption, mig_power_consumption, link_usage_expressions,
+                                     link_power_expressions, hardware_processing_expressions, hw_capacities,
+                                     structure, x_vars, load)
+    eepran_model.timestamp = timestamp
+
+    if lazy_link_capacity:
+        eepran_model.lazyLinkCallback = model.register_callback(LazyLinkCapacityCallback)
+        eepran_model.lazyLinkCallback.register_link_constraints(structure.linkCapacityConstraints)
+
+    # ------------------------------
+    #         Model Export
+    # ------------------------------
+
+    if export_lp:
+        model.export_as_lp('data/model_opt.lp')
+
+    return eepran_model
@@ -1,31 +1,73 @@
-import itertools
+import collections
 import json
 import logging
-import re
+import multiprocessing
 import time
-from collections import namedtuple
+from typing import Iterator
 
 import networkx
+import numpy
 import pandas
 
+from core.delay import *
 from core.drc import *
+from core.gops import *
 from core.graph import *
+from core.interning import *
 from core.link import *
+from core.paths import *
 from core.route import *
+from core.route_store import *
+from core.usage import *
+
+
+def find_shortest_paths(graph: networkx.Graph, origin_node: str, destination: str, k: int,
+                        weight: str = None) -> list:
+    """ :returns: Up to k shortest simple paths from origin to destination, all with the minimum amount of hops """
+    paths_found = []
+    path_lim = 0
+    counter = 0
+    for path in networkx.shortest_simple_paths(graph, origin_node, destination, weight=weight):
+        if len(paths_found) == 0:
+            path_lim = len(path)
+        elif len(path) > path_lim:
+            break
+
+        paths_found.append(path)
+        counter += 1
+        if counter == k:
+            break
+
+    return paths_found
+
+
+# graph of each path worker process, set once by the pool initializer instead of pickled per task
+_worker_graph = None
+
+
+def _init_path_worker(graph: networkx.Graph) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _find_worker_shortest_paths(task: tuple) -> list:
+    origin_node, destination, k, weight = task
+    return find_shortest_paths(_worker_graph, origin_node, destination, k, weight)
 
 
 class Topology:
-    def __init__(self, usage_csv: str):
-        self.__usage_df = pandas.read_csv(usage_csv)
-        self.__base_station_keys = None
+    def __init__(self, usage_csv: str, usage_mmap: bool = False):
+        self.__usage = UsageTrace.from_csv(usage_csv, usage_mmap)
         self.__base_stations = {}
         self.__node_levels = {}
-        self.__hardware_keys = None
         self.__hardwares = {}
         self.__nodes = {}
-        self.__routes = []
-        self.__id_to_route = {}
+        self.__routes = RouteTable()
+        self.__delay_table = None
+        self.__gops_tables = {}
         self.__links = None
+        self.__physical_link_keys = {}
+        self.__index = None
         self.__graph = None
 
     def __process_links_from_generator(self, node_names: list, port_capacities: list,
@@ -106,149 +148,98 @@ class Topology:
     def __find_crosshaul_routes(self, path: list) -> list:
         """
         Generates routes for all possible combinations of crosshaul of the given path.
+
+        A path with L links is split into backhaul, midhaul and fronthaul by 0, 1 or 2 cut points
+        between its links, so the cut points are enumerated directly (O(L²) routes per path).
         """
-        # Converting Nodes to Indexes excluding bs node
+        # Links of the path excluding bs node
         # Example:
-        #   ['node1', 'node2', 'node4', 'node5', 'node5_bs1'] -> [0, 1, 2, 3]
+        #   ['node1', 'node2', 'node4', 'node5', 'node5_bs1'] -> [('node1', 'node2'), ('node2', 'node4'),
+        #    ('node4', 'node5')]
         path = path[:-1]
-        path_indexes = [idx for idx, _ in enumerate(path)]
-
-        # Size 2 combinations in chain format
-        # Example:
-        #   [0, 1, 2, 3] -> [(0, 1), (1, 2), (2, 3)]
-        subsets = [subset for subset in itertools.combinations(path_indexes, 2)
-                   if subset[1] - subset[0] == 1]
-
-        # All combinations of the subsets
-        # Example:
-        #   [(0, 1), (1, 2), (2, 3)] -> [[(0, 1)], [(1, 2)], ..., [(0, 1), (1, 2)],
-        #    [(0, 1), (2, 3)], ..., [(0, 1), (1, 2), (2, 3)]]
-        subsets = [list(subset) for L in range(len(subsets) + 1)
-                   for subset in itertools.combinations(subsets, L)]
-        subsets = subsets[1:]
+        links = [(path[idx], path[idx + 1]) for idx in range(len(path) - 1)]
+        num_links = len(links)
+        if num_links == 0:
+            return []
 
-        # Get only the subsets that forms a chain
-        # Example:
-        # [[(0, 1)], [(1, 2)], ..., [(0, 1), (1, 2)], [(1, 2), (2, 3)], 
-        #  ..., [(1, 2), (2, 3), (3, 4)], [(0, 1), (1, 2), (2, 3), (3, 4)]]
-        chained_subsets = []
-        for subset in subsets:
-            should_remain = True
-            for idx in range(len(subset) - 1):
-                if (subset[idx][-1] != subset[idx + 1][0]):
-                    should_remain = False
-            if should_remain:
-                chained_subsets.append(subset)
-
-        # Combine chained subsets into paths from start to end
+        # Cut points split the links into consecutive crosshauls
         # Example:
-        #   path_len_2 = [[(0, 1)], [(1, 2), (2, 3), (3, 4)]]
-        #   path_len_3 = [[(0, 1)], [(1, 2), (2, 3)], [(3, 5)]]
-        routes_len_1 = [[route] for route in chained_subsets if len(route) == len(path) - 1]
-        routes_len_2 = []
-        routes_len_3 = []
-        for subset_a in chained_subsets:
-            for subset_b in chained_subsets:
-                if (subset_a[-1][-1] == subset_b[0][0] and
-                        len(subset_a) + len(subset_b) == len(path) - 1):
-                    routes_len_2.append([subset_a, subset_b])
-                for subset_c in chained_subsets:
-                    if (subset_a[-1][-1] == subset_b[0][0] and
-                            subset_b[-1][-1] == subset_c[0][0] and
-                            len(subset_a) + len(subset_b) + len(subset_c) == len(path) - 1):
-                        routes_len_3.append([subset_a, subset_b, subset_c])
-
-        # Converting Indexes back to Nodes
-        routes_len_1 = [[[(path[i], path[j]) for i, j in xhaul]
-                         for xhaul in route] for route in routes_len_1]
-        routes_len_2 = [[[(path[i], path[j]) for i, j in xhaul]
-                         for xhaul in route] for route in routes_len_2]
-        routes_len_3 = [[[(path[i], path[j]) for i, j in xhaul]
-                         for xhaul in route] for route in routes_len_3]
+        #   cuts (1, 3) -> [[(0, 1)], [(1, 2), (2, 3)], [(3, 4)]]
+        routes_len_3 = [[links[:cut_a], links[cut_a:cut_b], links[cut_b:]]
+                        for cut_a in range(1, num_links - 1)
+                        for cut_b in range(cut_a + 1, num_links)]
+        routes_len_2 = [[links[:cut], links[cut:]] for cut in range(1, num_links)]
+        routes_len_1 = [[links]]
 
         return routes_len_3 + routes_len_2 + routes_len_1
 
-    def __process_crosshaul_routes(self, routes: list) -> list:
+    def __process_crosshaul_routes(self, routes: list) -> Iterator[list]:
         """
-        Make all crosshauls (except Fronthaul) of each route end in a hardware, 
+        Make all crosshauls (except Fronthaul) of each route end in a hardware,
         and set empty list for suppressed crosshauls.
-        """
-
-        check = False
-        if routes[-1][-1][-1][1] == "node44":
-            check = True
-            print(f"\n\nRoutes: {routes}\n\n")
-        # Fronthaul
-        for route in routes.copy():
-            routes.remove(route)
-
-            fronthaul = route[-1]
-            endpoint_node_key = fronthaul[-1][-1]
-            endpoint_node = self.__nodes[endpoint_node_key]
-            if check:
-                print(f"\n\nRoute: {route}")
-                print(f"Fronthaul: {fronthaul}")
-                print(f"Endpoint Node Key: {endpoint_node_key}")
-            for hw in endpoint_node.get_hardware_keys():
-                new_route = route.copy()
-                new_route[-1] = fronthaul + [(endpoint_node_key, hw)]
-                routes.append(new_route)
-
-        if check:
-            print(f"\n\nRoutes: {routes}\n\n")
-        # Midhaul
-        for route in routes.copy():
-            if len(route) < 2:
-                continue
 
-            routes.remove(route)
+        Routes are yielded one at a time, 3-crosshaul routes first, then 1-crosshaul and 2-crosshaul routes,
+        each one expanded over the hardwares of its fronthaul, midhaul and backhaul endpoints (in this order).
+        """
+        routes_by_len = {1: [], 2: [], 3: []}
+        for route in routes:
+            routes_by_len[len(route)].append(route)
+
+        for route in routes_by_len[3]:
+            backhaul, midhaul, fronthaul = route
+            backhaul_hws = self.__get_endpoint_hardwares(backhaul)
+            midhaul_hws = self.__get_endpoint_hardwares(midhaul)
+            for fronthaul_hw in self.__get_endpoint_hardwares(fronthaul):
+                new_fronthaul = fronthaul + [fronthaul_hw]
+                for midhaul_hw in midhaul_hws:
+                    new_midhaul = midhaul + [midhaul_hw]
+                    for backhaul_hw in backhaul_hws:
+                        yield [backhaul + [backhaul_hw], new_midhaul, new_fronthaul]
+
+        for route in routes_by_len[1]:
+            fronthaul = route[0]
+            for fronthaul_hw in self.__get_endpoint_hardwares(fronthaul):
+                yield [[], [], fronthaul + [fronthaul_hw]]
+
+        for route in routes_by_len[2]:
+            midhaul, fronthaul = route
+            midhaul_hws = self.__get_endpoint_hardwares(midhaul)
+            for fronthaul_hw in self.__get_endpoint_hardwares(fronthaul):
+                new_fronthaul = fronthaul + [fronthaul_hw]
+                for midhaul_hw in midhaul_hws:
+                    yield [[], midhaul + [midhaul_hw], new_fronthaul]
+
+    def __get_endpoint_hardwares(self, xhaul: list) -> list:
+        """ :returns: The (endpoint node, hardware) links of each hardware at the endpoint of the crosshaul """
+        endpoint_node_key = xhaul[-1][-1]
+        index = self.get_index()
+        endpoint_node_id = index.nodes.ids.get(endpoint_node_key)
+        if endpoint_node_id is None:
+            # switches only known from the links host no hardware
+            return []
+        return [(endpoint_node_key, hw) for hw in index.node_hardware_keys[endpoint_node_id]]
 
-            midhaul = route[-2]
-            endpoint_node_key = midhaul[-1][-1]
-            endpoint_node = self.__nodes[endpoint_node_key]
-            for hw in endpoint_node.get_hardware_keys():
-                new_route = route.copy()
-                new_route[-2] = midhaul + [(endpoint_node_key, hw)]
-                routes.append(new_route)
+    def get_load_at(self, time: int) -> dict[str, int]:
+        bs_keys = self.get_base_station_keys()
+        return dict(zip(bs_keys, self.__usage.get_loads(time, len(bs_keys)).tolist()))
 
-        # Backhaul
-        for route in routes.copy():
-            if len(route) < 3:
-                continue
+    def get_loads_at(self, time: int) -> numpy.ndarray:
+        """ :returns: The amount of users of each base station (as get_base_station_keys()) at the timestamp """
+        return self.__usage.get_loads(time, len(self.get_base_station_keys()))
 
-            routes.remove(route)
-
-            backhaul = route[-3]
-            endpoint_node_key = backhaul[-1][-1]
-            endpoint_node = self.__nodes[endpoint_node_key]
-            for hw in endpoint_node.get_hardware_keys():
-                new_route = route.copy()
-                new_route[-3] = backhaul + [(endpoint_node_key, hw)]
-                routes.append(new_route)
-
-        # Empty Crosshauls
-        for route in routes.copy():
-            if len(route) < 2:
-                routes.remove(route)
-                new_route = [[], [], route[-1]]
-                routes.append(new_route)
-            elif len(route) < 3:
-                routes.remove(route)
-                new_route = [[], route[-2], route[-1]]
-                routes.append(new_route)
-
-        return routes
+    def get_load_window(self, start: int, end: int) -> numpy.ndarray:
+        """ :returns: The amount of users of each base station (columns) at the timestamps in [start, end) """
+        return self.__usage.get_window(start, end, len(self.get_base_station_keys()))
 
-    def get_load_at(self, time: int) -> dict[str, int]:
-        bs_keys = self.get_base_station_keys()
-        bs_load = {}
-        for i in range(0, len(bs_keys)):
-            bs_load[bs_keys[i]] = self.__usage_df.iloc[time, i]
+    def get_usage_matrix(self) -> numpy.ndarray:
+        """ :returns: The amount of users of each base station (columns, as get_base_station_keys()) at each timestamp """
+        return self.__usage.get_window(0, self.__usage.get_num_timestamps(), len(self.get_base_station_keys()))
 
-        return bs_load
+    def get_usage_trace(self) -> UsageTrace:
+        return self.__usage
 
     def get_max_load(self) -> int:
-        return self.__usage_df.max().max()
+        return self.__usage.get_max_load()
 
     def set_links_from_generator(self, links_csv: str, node_names: list, port_capacities: list,
                                  num_links: list, delays: list,
@@ -269,6 +260,9 @@ class Topology:
 
         """
         self.__links = {}
+        self.__physical_link_keys = {}
+        self.__index = None
+        self.__delay_table = None
         self.__links_df = pandas.read_csv(links_csv)
         self.__process_links_from_generator(node_names, port_capacities, num_links,
                                             delays, pluggable_transceivers_power_consumption,
@@ -293,6 +287,8 @@ class Topology:
         load_nodes_start = time.time()
 
         self.__nodes = {}
+        self.__index = None
+        self.__gops_tables = {}
         json_input = ''
         with open(nodes_path, 'r') as node_file:
             json_input = node_file.read()
@@ -330,6 +326,9 @@ class Topology:
         load_links_start = time.time()
 
         self.__links = {}
+        self.__physical_link_keys = {}
+        self.__index = None
+        self.__delay_table = None
         json_input = ''
         with open(links_path, 'r') as link_file:
             json_input = link_file.read()
@@ -376,12 +375,110 @@ class Topology:
         self.__base_stations[identifier] = BaseStation(num_antennas, num_subcarriers, num_used_subcarriers,
                                                        sampling_frequency, ofdm_symbol_duration, tau_c, tau_p,
                                                        bit_quantization, spectral_efficiency)
+        self.__gops_tables = {}
 
     def set_nodes_from_dict(self, nodes: dict) -> None:
         self.__nodes = nodes.copy()
+        self.__index = None
+        self.__gops_tables = {}
 
     def set_links_from_list(self, links: dict) -> None:
         self.__links = links
+        self.__physical_link_keys = {}
+        self.__index = None
+        self.__delay_table = None
+
+    def reduce_switch_chains(self, keep_nodes: list = ()) -> int:
+        """
+        Collapses each chain of pure-switch nodes (no hardware nor base station, exactly two neighbors) into a
+        LogicalLink between the chain endpoints.
+
+        Such nodes can not host a crosshaul endpoint, so the routes keep their hardware placements while paths
+        and the link capacity constraints shrink. Chains count as a single hop in the minimum-hop route
+        generators. Must be called after the links are loaded and before the routes are generated.
+
+        Parameters
+        ----------
+
+        keep_nodes : list
+            Nodes that must not be collapsed, e.g. the route origin node.
+
+        Returns
+        -------
+
+        The amount of physical links merged into logical links.
+        """
+        reduce_start = time.time()
+
+        neighbors = collections.defaultdict(set)
+        for link in set(self.__links.values()):
+            neighbors[link.node1].add(link.node2)
+            neighbors[link.node2].add(link.node1)
+
+        def is_pure_switch(node_key) -> bool:
+            if node_key in keep_nodes or len(neighbors[node_key]) != 2:
+                return False
+            node = self.__nodes.get(node_key)
+            return node is None or (len(node.get_hardware_keys()) == 0 and not node.has_base_station())
+
+        num_merged_links = 0
+        visited = set()
+        for node_key in list(neighbors.keys()):
+            if node_key in visited or not is_pure_switch(node_key):
+                continue
+
+            # walk both directions up to the chain endpoints
+            chain = [node_key]
+            for direction, neighbor in enumerate(sorted(neighbors[node_key])):
+                side = []
+                previous, actual = node_key, neighbor
+                while actual not in chain and actual not in side and is_pure_switch(actual):
+                    side.append(actual)
+                    previous, actual = actual, next(iter(neighbors[actual] - {previous}))
+                side.append(actual)
+                chain = chain + side if direction == 0 else side[::-1] + chain
+            visited.update(chain[1:-1])
+
+            endpoint1, endpoint2 = chain[0], chain[-1]
+            if is_pure_switch(endpoint1) or endpoint1 == endpoint2 or endpoint2 in neighbors[endpoint1]:
+                # a cycle of switches or a parallel link, which a simple graph can not represent
+                continue
+
+            link_keys = [str((chain[idx], chain[idx + 1])) for idx in range(len(chain) - 1)]
+            reverse_link_keys = [str((chain[idx + 1], chain[idx])) for idx in reversed(range(len(chain) - 1))]
+            logical_link = LogicalLink(endpoint1, endpoint2, [self.__links[key] for key in link_keys])
+            for link_key in link_keys + reverse_link_keys:
+                del self.__links[link_key]
+            for idx in range(len(chain) - 1):
+                neighbors[chain[idx]].discard(chain[idx + 1])
+                neighbors[chain[idx + 1]].discard(chain[idx])
+            neighbors[endpoint1].add(endpoint2)
+            neighbors[endpoint2].add(endpoint1)
+
+            self.__links[str((endpoint1, endpoint2))] = logical_link
+            self.__links[str((endpoint2, endpoint1))] = logical_link
+            self.__physical_link_keys[str((endpoint1, endpoint2))] = link_keys
+            self.__physical_link_keys[str((endpoint2, endpoint1))] = reverse_link_keys
+            num_merged_links += len(link_keys)
+
+        self.__index = None
+        self.__delay_table = None
+
+        reduce_end = time.time()
+        logging.info('Switch Chains Reduced ({} links): {}s'.format(num_merged_links, reduce_end - reduce_start))
+        return num_merged_links
+
+    def get_physical_link_keys(self, key: str) -> list:
+        """ :returns: The keys of the physical links crossed by the link (itself, unless it is a LogicalLink) """
+        return self.__physical_link_keys.get(key, [key])
+
+    def expand_link_usage(self, link_usage: dict[str, float]) -> dict[str, float]:
+        """ :returns: The usage of each physical link, given the usage of each (possibly logical) link """
+        physical_usage = {}
+        for link_key, usage in link_usage.items():
+            for physical_key in self.get_physical_link_keys(link_key):
+                physical_usage[physical_key] = physical_usage.get(physical_key, 0) + usage
+        return physical_usage
 
     def get_links(self) -> list:
         return self.__links.keys()
@@ -389,33 +486,71 @@ class Topology:
     def get_link(self, key: str) -> Link:
         return self.__links[key]
 
-    def get_routes(self) -> list:
+    def get_routes(self) -> RouteTable:
         return self.__routes
 
     def get_route(self, identifier: int) -> Route:
-        if len(self.__id_to_route) == 0:
-            for route_idx in range(len(self.__routes)):
-                route = self.__routes[route_idx]
-                self.__id_to_route[route.identifier] = route_idx
+        return self.__routes.get_route(identifier)
+
+    def get_crosshaul_delay_table(self, drcs: list[Drc]) -> CrosshaulDelayTable:
+        """
+        Returns the crosshaul delay table of the actual routes, covering the buffer sizes of the given DRCs.
+
+        The table is computed once and reused by every model built over the same routes and links.
+        """
+        buffer_sizes = [get_buffer_size(drc) for drc in drcs]
+        if self.__delay_table is None or not all(self.__delay_table.has_buffer_size(buffer_size)
+                                                 for buffer_size in buffer_sizes):
+            delay_table_start = time.time()
+            if self.__delay_table is not None:
+                buffer_sizes += list(self.__delay_table.fronthaul.keys())
+            self.__delay_table = CrosshaulDelayTable(self.__routes, self.get_link, buffer_sizes)
+            delay_table_end = time.time()
+            logging.info('Crosshaul Delay Table Computed: {}s'.format(delay_table_end - delay_table_start))
+
+        return self.__delay_table
+
+    def get_gops_table(self, cr_mode: str = CR_MODE_CALC) -> GopsTable:
+        """
+        Returns the GOPS of every VNF for every base station and timestamp of the usage trace.
+
+        The table is computed once per CR mode and reused by every model built over the same trace.
+        """
+        if cr_mode not in self.__gops_tables:
+            gops_table_start = time.time()
+            self.__gops_tables[cr_mode] = GopsTable(self.get_base_station(1), self.get_usage_matrix(),
+                                                    self.get_base_station_keys(), cr_mode)
+            gops_table_end = time.time()
+            logging.info('GOPS Table Computed: {}s'.format(gops_table_end - gops_table_start))
 
-        return self.__routes[self.__id_to_route[identifier]]
+        return self.__gops_tables[cr_mode]
 
     def get_node(self, key: str) -> Node:
         return self.__nodes[key]
 
+    def get_index(self) -> TopologyIndex:
+        """ :returns: The integer identifiers of the actual nodes, hardwares, base stations and links """
+        if self.__index is None:
+            self.__index = TopologyIndex(self.__nodes, self.__links or {})
+        return self.__index
+
+    def get_node_by_index(self, node_id: int) -> Node:
+        return self.__nodes[self.get_index().nodes.keys[node_id]]
+
+    def get_link_by_index(self, link_id: int) -> Link:
+        return self.__links[self.get_index().links.keys[link_id]]
+
+    def get_hardware_by_index(self, hardware_id: int) -> Hardware:
+        return self.__hardwares[int(self.get_index().hardware_types[hardware_id])]
+
     def get_hardware_keys(self) -> list:
-        if self.__hardware_keys is None:
-            self.__hardware_keys = [hw for node in self.__nodes.values() for hw in node.get_hardware_keys()]
-        return self.__hardware_keys
+        return self.get_index().hardwares.keys
 
     def get_hardware_by_id(self, identifier: int) -> Hardware:
         return self.__hardwares[identifier]
 
     def get_hardware_by_key(self, key: str) -> Hardware:
-        result = re.search('(?:(?!_).)*', key)
-        node = self.get_node(result.group())
-        hw_id = node.get_hardware_identifier(key)
-        return self.__hardwares[hw_id]
+        return self.__hardwares[self.get_index().get_hardware_type(key)]
 
     def get_base_station(self, key: int) -> BaseStation:
         return self.__base_stations[key]
@@ -424,147 +559,169 @@ class Topology:
         return self.__nodes.keys()
 
     def get_base_station_keys(self) -> list:
-        if self.__base_station_keys is None:
-            self.__base_station_keys = [key for node in self.__nodes.values() for key in node.get_base_station_keys()]
-        return self.__base_station_keys
+        return self.get_index().base_stations.keys
 
     def generate_routes(self, origin_node) -> None:
 
         route_gen_start = time.time()
         self.__construct_graph()
 
-        destinations = []
-        for key in self.__nodes.keys():
-            node = self.__nodes[key]
-            if node.has_base_station():
-                for bs in node.get_base_station_keys():
-                    destinations.append(bs)
+        destinations = self.__get_destinations()
 
         for destination in destinations:
             self.__graph.find_all_paths(origin_node, destination)
 
-        self.__routes = []
-        idx = 1
-        for path in self.__graph.paths:
-            routes_aux = self.__find_crosshaul_routes(path)
-            for route in self.__process_crosshaul_routes(routes_aux):
-
-                delay_backhaul = sum([self.__links[str(link)].delay for link in route[0]])
-                delay_midhaul = sum([self.__links[str(link)].delay for link in route[1]])
-                delay_fronthaul = sum([self.__links[str(link)].delay for link in route[2]])
-
-                sequence = [xhaul[-1][-1] if len(xhaul) > 0 else origin_node for xhaul in route]
-                self.__routes += [Route(idx, path[0], path[-1], sequence, route[2], route[1],
-                                        route[0], delay_fronthaul, delay_midhaul, delay_backhaul)]
-                idx += 1
+        self.__build_routes(self.__graph.paths, origin_node)
 
         route_gen_end = time.time()
         logging.info('Routes Generated: {}s'.format(route_gen_end - route_gen_start))
 
-    def generate_routes_nx(self, origin_node, k=3, append_to_end=[]) -> None:
+    def generate_routes_nx(self, origin_node, k=3, append_to_end=[], num_processes: int = 1) -> None:
+        """
+        Generates the routes of the (up to k) shortest paths from the origin node to each base station.
 
+        With num_processes > 1 the destinations are split across a process pool. Paths are merged in
+        destination order, so route identifiers match the serial run.
+        """
         route_gen_start = time.time()
         self.__construct_graph_nx()
 
-        destinations = []
-        for key in self.__nodes.keys():
-            node = self.__nodes[key]
-            if node.has_base_station():
-                for bs in node.get_base_station_keys():
-                    destinations.append(bs)
+        destinations = self.__get_destinations()
 
-        paths = []
-        for destination in destinations:
-            paths_found = []
-            path_lim = 0
-            counter = 0
-            # w = "weight"
-            w = None
-            for path in networkx.shortest_simple_paths(self.__graph, origin_node, destination, weight=w):
-                if len(paths_found) == 0:
-                    path_lim = len(path)
-                elif len(path) > path_lim:
-                    break
-
-                paths_found.append(path)
-                counter += 1
-                if counter == k:
-                    break
-
-            paths += paths_found
+        # w = "weight"
+        w = None
+        paths = self.__find_paths_to_destinations(origin_node, destinations, k, w, num_processes)
 
         if (len(append_to_end) > 0):
             print("---------------------- appending ----------------------")
             paths.append(append_to_end)
 
-        self.__routes = []
-        idx = 1
-        for path in paths:
-            routes_aux = self.__find_crosshaul_routes(path)
-            if path[-1] == "node44_bs1":
-                print(f"\n\nRoutes Aux: {routes_aux}\n\n")
-            for route in self.__process_crosshaul_routes(routes_aux):
-                if path[-1] == "node44_bs1":
-                    print(f"\n\nRoute: {route}\n\n")
-                delay_backhaul = sum([self.__links[str(link)].delay for link in route[0]])
-                delay_midhaul = sum([self.__links[str(link)].delay for link in route[1]])
-                delay_fronthaul = sum([self.__links[str(link)].delay for link in route[2]])
+        self.__build_routes(paths, origin_node)
+
+        route_gen_end = time.time()
+        logging.info('{} Routes Generated: {}s'.format(len(self.__routes), route_gen_end - route_gen_start))
 
-                sequence = [xhaul[-1][-1] if len(xhaul) > 0 else origin_node for xhaul in route]
-                self.__routes += [Route(idx, path[0], path[-1], sequence, route[2], route[1],
-                                        route[0], delay_fronthaul, delay_midhaul, delay_backhaul)]
+    def get_routes_nx(self, origin_node, k=3, num_processes: int = 1) -> list:
 
-                idx += 1
+        route_gen_start = time.time()
+        self.__construct_graph_nx()
+
+        destinations = self.__get_destinations()
+
+        paths = [tuple(path) for path in self.__find_paths_to_destinations(origin_node, destinations, k,
+                                                                           "weight", num_processes)]
+
+        self.__build_routes(paths, origin_node)
 
         route_gen_end = time.time()
         logging.info('{} Routes Generated: {}s'.format(len(self.__routes), route_gen_end - route_gen_start))
+        return paths
+
+    def generate_routes_dag(self, origin_node, k=3, drcs: list[Drc] = None) -> None:
+        """
+        Generates the routes of (up to k) minimum-hop paths from the origin node to each base station.
 
-    def get_routes_nx(self, origin_node, k=3) -> list:
+        Same path set as generate_routes_nx() whenever a base station has at most k minimum-hop paths, but the
+        paths of every base station are enumerated from a single BFS shortest-path DAG (see ShortestPathDag)
+        instead of running Yen's algorithm once per destination.
 
+        When DRCs are given, paths that cannot meet the delay requirements of any of them are pruned during
+        the enumeration (see CrosshaulDelayBound) and do not count towards k, and so are the routes.
+        """
         route_gen_start = time.time()
         self.__construct_graph_nx()
 
-        destinations = []
-        for key in self.__nodes.keys():
-            node = self.__nodes[key]
-            if node.has_base_station():
-                for bs in node.get_base_station_keys():
-                    destinations.append(bs)
+        delay_bound = None
+        if drcs is not None:
+            delay_bound = CrosshaulDelayBound(drcs, self.get_link)
 
+        dag = ShortestPathDag(self.__graph.adj, origin_node)
         paths = []
-        for destination in destinations:
-            paths_found = []
-            path_lim = 0
-            counter = 0
-            for path in networkx.shortest_simple_paths(self.__graph, origin_node, destination, weight="weight"):
-                if len(paths_found) == 0:
-                    path_lim = len(path)
-                elif len(path) > path_lim:
-                    break
-
-                paths_found.append(tuple(path))
-                counter += 1
-                if counter == k:
-                    break
-
-            paths += paths_found
-
-        self.__routes = []
+        for destination in self.__get_destinations():
+            paths += dag.find_paths(destination, k, delay_bound)
+
+        self.__build_routes(paths, origin_node, delay_bound)
+
+        route_gen_end = time.time()
+        logging.info('{} Routes Generated: {}s'.format(len(self.__routes), route_gen_end - route_gen_start))
+
+    def __get_destinations(self) -> list:
+        """ :returns: The base station keys of every node, which are the destinations of the routes """
+        return list(self.get_base_station_keys())
+
+    def __build_routes(self, paths: list, origin_node: str, delay_bound: CrosshaulDelayBound = None) -> None:
+        """
+        Replaces the actual routes by the routes of every crosshaul split of the given paths.
+
+        With a delay bound, routes that cannot meet the delay requirements of any of its DRCs are discarded.
+        """
+        self.__routes = RouteTable()
+        self.__delay_table = None
         idx = 1
         for path in paths:
             routes_aux = self.__find_crosshaul_routes(path)
             for route in self.__process_crosshaul_routes(routes_aux):
-                delay_backhaul = sum([self.__links[str(link)].delay for link in route[0]])
-                delay_midhaul = sum([self.__links[str(link)].delay for link in route[1]])
-                delay_fronthaul = sum([self.__links[str(link)].delay for link in route[2]])
-                sequence = [xhaul[-1][-1] if len(xhaul) > 0 else origin_node for xhaul in route]
-                self.__routes += [Route(idx, path[0], path[-1], sequence, route[2], route[1],
-                                        route[0], delay_fronthaul, delay_midhaul, delay_backhaul)]
+                new_route = self.__make_route(idx, path[0], path[-1], route, origin_node)
+                if delay_bound is not None and not delay_bound.meets_delays(new_route):
+                    continue
+                self.__routes.append(new_route)
                 idx += 1
 
-        route_gen_end = time.time()
-        logging.info('{} Routes Generated: {}s'.format(len(self.__routes), route_gen_end - route_gen_start))
-        return paths
+    def __make_route(self, identifier: int, source: str, target: str, route: list, origin_node: str) -> Route:
+        """ :returns: The route of the [backhaul, midhaul, fronthaul] links (see __process_crosshaul_routes()) """
+        delay_backhaul = sum([self.__links[str(link)].delay for link in route[0]])
+        delay_midhaul = sum([self.__links[str(link)].delay for link in route[1]])
+        delay_fronthaul = sum([self.__links[str(link)].delay for link in route[2]])
+
+        sequence = [xhaul[-1][-1] if len(xhaul) > 0 else origin_node for xhaul in route]
+        return Route(identifier, source, target, sequence, route[2], route[1],
+                     route[0], delay_fronthaul, delay_midhaul, delay_backhaul)
+
+    def add_route(self, source: str, target: str, route: list) -> Route:
+        """
+        Appends a route to the actual routes, with the next free identifier.
+
+        Parameters
+        ----------
+
+        source : str
+            The origin node of the route.
+        target : str
+            The base station key of the route.
+        route : list
+            The [backhaul, midhaul, fronthaul] links of the route, each non-empty crosshaul ending in the
+            (endpoint node, hardware) link and suppressed crosshauls as empty lists.
+
+        Returns
+        -------
+
+        The new route.
+        """
+        if not isinstance(self.__routes, RouteTable):
+            # routes of a route store are materialized to be extended
+            self.__routes = RouteTable(list(self.__routes))
+        identifier = max((existing.identifier for existing in self.__routes), default=0) + 1
+        new_route = self.__make_route(identifier, source, target, route, source)
+        self.__routes.append(new_route)
+        self.__delay_table = None
+        return new_route
+
+    def __find_paths_to_destinations(self, origin_node: str, destinations: list, k: int, weight: str,
+                                     num_processes: int) -> list:
+        """ :returns: The shortest paths (see find_shortest_paths) to every destination, in destination order """
+        if num_processes <= 1 or len(destinations) <= 1:
+            paths_by_destination = [find_shortest_paths(self.__graph, origin_node, destination, k, weight)
+                                    for destination in destinations]
+        else:
+            tasks = [(origin_node, destination, k, weight) for destination in destinations]
+            # forked workers do not re-import the (unguarded) experiment scripts
+            start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+            with multiprocessing.get_context(start_method).Pool(num_processes, initializer=_init_path_worker,
+                                                                initargs=(self.__graph,)) as pool:
+                paths_by_destination = pool.map(_find_worker_shortest_paths, tasks,
+                                                chunksize=max(1, len(tasks) // (4 * num_processes)))
+
+        return [path for paths_found in paths_by_destination for path in paths_found]
 
     def print_routes(self) -> None:
         for route in self.__routes:
@@ -573,7 +730,7 @@ class Topology:
     def export_routes(self, path: str) -> None:
         json_output = '[\n'
         for idx, route in enumerate(self.__routes):
-            json_output += json.dumps(route.__dict__, indent=4)
+            json_output += json.dumps(route.to_dict(), indent=4)
             if idx < len(self.__routes) - 1:
                 json_output += ','
         json_output += '\n]'
@@ -587,52 +744,145 @@ class Topology:
             json_input = route_file.read()
 
         routes = json.loads(json_input)
-        self.__routes = []
+        self.__routes = RouteTable()
+        self.__delay_table = None
         for route in routes:
             fronthaul = [(link[0], link[1]) for link in route['fronthaul']]
             midhaul = [(link[0], link[1]) for link in route['midhaul']]
             backhaul = [(link[0], link[1]) for link in route['backhaul']]
-            self.__routes += [Route(route['identifier'], route['source'], route['target'],
-                                    route['sequence'], fronthaul, midhaul,
-                                    backhaul, route['delay_fronthaul'],
-                                    route['delay_midhaul'], route['delay_backhaul'])]
+            self.__routes.append(Route(route['identifier'], route['source'], route['target'],
+                                       route['sequence'], fronthaul, midhaul,
+                                       backhaul, route['delay_fronthaul'],
+                                       route['delay_midhaul'], route['delay_backhaul']))
+
+    def export_route_store(self, path: str) -> None:
+        """ Saves the routes as a columnar route store directory (see RouteStore) """
+        route_store = self.__routes if isinstance(self.__routes, RouteStore) else RouteStore.from_routes(self.__routes)
+        route_store.save(path)
+
+    def import_route_store(self, path: str, mmap: bool = True) -> None:
+        """
+        Replaces the routes with the ones of a route store directory (see export_route_store()).
+
+        The columns are memory-mapped unless mmap is False and routes are only materialized when accessed.
+        """
+        self.__routes = RouteStore.load(path, mmap)
+        self.__delay_table = None
 
 
 class Deployment:
+    """
+    Placement of the VNFs of each base station, as selected by a solution.
+
+    Only placed functions are stored: each (base station, hardware) pair holds a bitmask of its deployed VNFs
+    (bit i is VNF fi) in an integer matrix indexed by base station position and interned hardware position,
+    so creating a deployment does not depend on the amount of routes or hardwares.
+    """
+
     def __init__(self, baseStationKeys: list[str], drcs: list[Drc], routes: list[Route]) -> None:
         self._baseStationKeys = baseStationKeys
+        self._bsPositions = {bs_key: position for position, bs_key in enumerate(baseStationKeys)}
         self._drcs = drcs
         self._drcsDict = {drc.identifier: drc for drc in drcs}
         self._routes = routes
-        self._routesDict = {route.identifier: route for route in routes}
-        self._hardwares = []
+        self._routesDict = None
         self._vnfs = ['f0', 'f1', 'f2', 'f3', 'f4', 'f5', 'f6', 'f7', 'f8']
-        self._deploy = {}
-        self._deployKey = namedtuple('_deployKey', ['bs_key', 'vnf', 'hw_key'])
+        self._vnfBits = {vnf: 1 << position for position, vnf in enumerate(self._vnfs)}
+        self._hardwares = KeyInterner()
+        self._deploy = numpy.zeros((len(baseStationKeys), 0), dtype=numpy.uint16)
+        self._selection = {}
+
+    def _GetRoute(self, route_id: int) -> Route:
+        if isinstance(self._routes, (RouteTable, RouteStore)):
+            return self._routes.get_route(route_id)
+        if self._routesDict is None:
+            self._routesDict = {route.identifier: route for route in self._routes}
+        return self._routesDict[route_id]
+
+    def _GetHardwarePositions(self, hw_keys: list) -> numpy.ndarray:
+        """ :returns: The interned position of each hardware, -1 for hardwares without any deployed VNF """
+        return numpy.array([self._hardwares.ids.get(hw_key, -1) for hw_key in hw_keys], dtype=numpy.int64)
+
+    def _Place(self, bs_position: int, vnfs: list, hw_key: str) -> None:
+        hw_position = self._hardwares.intern(hw_key)
+        if hw_position == self._deploy.shape[1]:
+            # grow the hardware columns geometrically
+            grown = numpy.zeros((self._deploy.shape[0], max(8, 2 * self._deploy.shape[1])), dtype=numpy.uint16)
+            grown[:, :hw_position] = self._deploy[:, :hw_position]
+            self._deploy = grown
+        for vnf in vnfs:
+            self._deploy[bs_position, hw_position] |= self._vnfBits[vnf]
 
-        for route in self._routes:
-            for hw in route.sequence:
-                if hw not in self._hardwares:
-                    self._hardwares.append(hw)
+    def IsDeployedIn(self, bs_key: str, vnf: str, hw: str) -> int:
+        hw_position = self._hardwares.ids.get(hw)
+        if hw_position is None:
+            return 0
+        return int(self._deploy[self._bsPositions[bs_key], hw_position] >> self._vnfs.index(vnf)) & 1
+
+    def AreDeployedIn(self, placements: list[tuple[str, str, str]]) -> numpy.ndarray:
+        """ :returns: IsDeployedIn() of each (bs_key, vnf, hw) placement, as a 0/1 array """
+        if len(placements) == 0:
+            return numpy.zeros(0, dtype=numpy.int64)
+        bs_keys, vnfs, hw_keys = zip(*placements)
+        bs_positions = numpy.array([self._bsPositions[bs_key] for bs_key in bs_keys], dtype=numpy.int64)
+        vnf_bits = numpy.array([self._vnfBits[vnf] for vnf in vnfs], dtype=numpy.uint16)
+        hw_positions = self._GetHardwarePositions(hw_keys)
+
+        # hardwares without deployed VNFs read the (all zero) padding column of a one column wider matrix
+        deploy = numpy.pad(self._deploy, ((0, 0), (0, 1)))
+        return ((deploy[bs_positions, hw_positions] & vnf_bits) != 0).astype(numpy.int64)
+
+    def GetPlacements(self) -> list[tuple[str, str, str]]:
+        """ :returns: The (bs_key, vnf, hw) of every deployed VNF """
+        placements = []
+        for bs_position, hw_position in zip(*numpy.nonzero(self._deploy)):
+            vnf_bits = int(self._deploy[bs_position, hw_position])
+            placements += [(self._baseStationKeys[bs_position], vnf, self._hardwares.keys[hw_position])
+                           for vnf, bit in self._vnfBits.items() if vnf_bits & bit]
+        return placements
+
+    def GetMigrationCosts(self, bs_keys: list[str], migrations: list[list[tuple[str, str]]],
+                          vnf_mig_cost: dict[str, float]) -> numpy.ndarray:
+        """
+        Computes the migration cost of many candidates at once.
 
-        for bsKey in self._baseStationKeys:
-            for vnf in self._vnfs:
-                for hw in self._hardwares:
-                    self._deploy[self._deployKey(bsKey, vnf, hw)] = 0
+        Parameters
+        ----------
 
-    def IsDeployedIn(self, bs_key: str, vnf: str, hw: str) -> int:
-        return self._deploy[self._deployKey(bs_key, vnf, hw)]
+        bs_keys : list
+            The base station of each candidate.
+        migrations : list
+            The (vnf, hw) placements of each candidate (e.g. EEPRANStructure.keyMigrations).
+        vnf_mig_cost : dict
+            The migration cost of each VNF.
+
+        Returns
+        -------
+
+        The cost of the placements of each candidate that are not deployed yet, summed in placement order.
+        """
+        candidates = numpy.repeat(numpy.arange(len(bs_keys)), [len(placements) for placements in migrations])
+        placements = [(bs_key, vnf, hw) for bs_key, placements in zip(bs_keys, migrations)
+                      for vnf, hw in placements]
+        costs = numpy.array([vnf_mig_cost[vnf] for _, vnf, _ in placements], dtype=float)
+        return numpy.bincount(candidates, weights=(1 - self.AreDeployedIn(placements)) * costs,
+                              minlength=len(bs_keys))
 
     def SetDeploy(self, bs_key: str, drc_id: int, route_id: int) -> None:
-        route = self._routesDict[route_id]
-        for vnf in self._drcsDict[drc_id].fs_cu:
-            self._deploy[self._deployKey(bs_key, vnf, route.sequence[0])] = 1
-        for vnf in self._drcsDict[drc_id].fs_du:
-            self._deploy[self._deployKey(bs_key, vnf, route.sequence[1])] = 1
-        for vnf in self._drcsDict[drc_id].fs_ru:
-            self._deploy[self._deployKey(bs_key, vnf, route.sequence[2])] = 1
+        route = self._GetRoute(route_id)
+        bs_position = self._bsPositions[bs_key]
+        self._selection[bs_key] = (drc_id, route_id)
+        self._Place(bs_position, self._drcsDict[drc_id].fs_cu, route.sequence[0])
+        self._Place(bs_position, self._drcsDict[drc_id].fs_du, route.sequence[1])
+        self._Place(bs_position, self._drcsDict[drc_id].fs_ru, route.sequence[2])
+
+    def GetSelection(self) -> dict[str, tuple[int, int]]:
+        """ :returns: The (drc_id, route_id) deployed for each base station """
+        return self._selection
 
     def Print(self):
-        for key, value in self._deploy.items():
-            if value > 0:
-                print(f" {key} deployed")
\ No newline at end of file
+        for bs_position, hw_position in zip(*numpy.nonzero(self._deploy)):
+            for vnf in self._vnfs:
+                if self._deploy[bs_position, hw_position] & self._vnfBits[vnf]:
+                    print(f" ({self._baseStationKeys[bs_position]}, {vnf}, "
+                          f"{self._hardwares.keys[hw_position]}) deployed")
@@ -0,0 +1,69 @@
+import os
+
+import numpy
+import pandas
+
+# binary copy of a usage CSV, saved next to it (e.g. T2_48_BS_usage.csv.npy)
+USAGE_SIDECAR_SUFFIX = '.npy'
+
+
+class UsageTrace:
+    """
+    Amount of users of each base station (columns) at each timestamp (rows) of a usage trace.
+
+    The trace is kept as a single contiguous integer matrix, so load vectors and time windows are views
+    of it. The header of the usage CSV holds the identifiers of the base stations (cells) of the trace,
+    the first timestamp is the row after it.
+    """
+
+    def __init__(self, usage: numpy.ndarray, base_station_ids: list) -> None:
+        self.usage = usage
+        self.base_station_ids = base_station_ids
+
+    @staticmethod
+    def from_csv(usage_csv: str, mmap: bool = False) -> 'UsageTrace':
+        """
+        Loads a usage CSV.
+
+        Parameters
+        ----------
+
+        usage_csv : str
+            The path to the usage CSV (e.g. data/T2_48_BS_usage.csv).
+        mmap : bool
+            Whether to memory-map the matrix from a binary sidecar of the CSV (usage_csv + '.npy'), for long
+            traces. The sidecar is (re)written when missing or older than the CSV.
+        """
+        with open(usage_csv, 'r') as usage_file:
+            base_station_ids = usage_file.readline().strip().split(',')
+
+        if not mmap:
+            return UsageTrace(UsageTrace.__read_csv(usage_csv), base_station_ids)
+
+        sidecar_path = usage_csv + USAGE_SIDECAR_SUFFIX
+        if not os.path.exists(sidecar_path) or os.path.getmtime(sidecar_path) < os.path.getmtime(usage_csv):
+            # write to a temporary file first, so an interrupted run never leaves a truncated sidecar
+            temporary_path = '{}.{}.tmp'.format(sidecar_path, os.getpid())
+            with open(temporary_path, 'wb') as sidecar_file:
+                numpy.save(sidecar_file, UsageTrace.__read_csv(usage_csv))
+            os.replace(temporary_path, sidecar_path)
+
+        return UsageTrace(numpy.load(sidecar_path, mmap_mode='r'), base_station_ids)
+
+    @staticmethod
+    def __read_csv(usage_csv: str) -> numpy.ndarray:
+        return numpy.ascontiguousarray(pandas.read_csv(usage_csv).to_numpy(dtype=numpy.int64))
+
+    def get_num_timestamps(self) -> int:
+        return self.usage.shape[0]
+
+    def get_loads(self, timestamp: int, num_base_stations: int = None) -> numpy.ndarray:
+        """ :returns: The amount of users of the first num_base_stations (default: all) base stations """
+        return self.usage[timestamp, :num_base_stations]
+
+    def get_window(self, start: int, end: int, num_base_stations: int = None) -> numpy.ndarray:
+        """ :returns: A (timestamp x base station) view of the timestamps in [start, end) """
+        return self.usage[start:end, :num_base_stations]
+
+    def get_max_load(self) -> int:
+        return int(self.usage.max())
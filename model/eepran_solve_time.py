@@ -4,8 +4,12 @@ import sys
 import time
 from collections import defaultdict
 
+import core.cache
 import core.drc
+import core.heuristic
 import core.model
+import core.solution
+import core.sparse_model
 import core.topology
 
 # ---- Logging Configuration -----
@@ -16,6 +20,26 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+# when True, every warm started timestamp is also solved from scratch to report the warm start speedup
+benchmark_warm_start = False
+# when True, the MIP start of every solve is the greedy placement (core.heuristic) instead of the previous deployment
+greedy_warm_start = False
+# when True, the model constraints are assembled as sparse matrices (core.sparse_model)
+sparse_backend = False
+# when True, the link capacity constraints are only added by a lazy constraint callback when an incumbent violates
+# them, how many times each link needed its constraint is reported per timestamp
+lazy_link_capacity = False
+# processes used to search the paths of each base station (1 searches them serially)
+route_generation_processes = 1
+# when True, chains of pure-switch nodes are merged into logical links before generating the routes
+reduce_switch_chains = False
+# when True, the minimum-hop paths of every base station come from a single BFS (Topology.generate_routes_dag),
+# pruning the paths and routes that cannot meet the DRC delay requirements
+shortest_path_dag = False
+# when True, fully loaded topologies (with their routes) are cached on disk, keyed by a hash of their inputs
+use_topology_cache = True
+topology_cache = core.cache.TopologyCache('cache')
+
 # ----- Topology Definition -----
 topos_high = [50, 100, 150, 200, 250, 300, 350, 400, 450]
 topos_low = [50, 60, 70, 80, 90, 100]
@@ -31,23 +55,38 @@ for case in [0,1,2]:
         multiplier = 1.0
         topos = topos_low
     for toposize in topos:
-        topo = core.topology.Topology("data/T2_{}_BS_usage.csv".format(toposize))
-
-        topo.add_hardware(identifier=1, cpu=1, power_consumption=94.8, gops_capacity=180)
-        topo.add_hardware(identifier=2, cpu=1, power_consumption=94.8, gops_capacity=180)
-        topo.add_base_station(identifier=1, num_antennas=4, num_subcarriers=2048, num_used_subcarriers=1200,
-                            sampling_frequency=(30.72 * 10 ** 6), ofdm_symbol_duration=(71.4 * 10 ** (-6)),
-                            tau_c=192, tau_p=8, bit_quantization=12, spectral_efficiency=1.0)
-
-        topo.load_nodes_for_eepran('data/EEPRAN_T2_{}_nodes.json'.format(toposize))
-        topo.load_links_for_eepran('data/EEPRAN_T2_{}_links.json'.format(toposize), numLinksMultiplier=1, linkCapacityMultiplier=multiplier)
-
-        topo.generate_routes_nx(origin_node="node0", k=50)
-        # topo.export_routes('data/routes_T1_50.json')
-        # topo.import_routes_from_json('data/routes_150.json')
-
-        drcsDict = {drc.identifier: drc for drc in core.drc.get_drc_list_embb()}
-        routesDict = {route.identifier: route for route in topo.get_routes()}
+        def build_topology() -> core.topology.Topology:
+            topo = core.topology.Topology("data/T2_{}_BS_usage.csv".format(toposize))
+
+            topo.add_hardware(identifier=1, cpu=1, power_consumption=94.8, gops_capacity=180)
+            topo.add_hardware(identifier=2, cpu=1, power_consumption=94.8, gops_capacity=180)
+            topo.add_base_station(identifier=1, num_antennas=4, num_subcarriers=2048, num_used_subcarriers=1200,
+                                sampling_frequency=(30.72 * 10 ** 6), ofdm_symbol_duration=(71.4 * 10 ** (-6)),
+                                tau_c=192, tau_p=8, bit_quantization=12, spectral_efficiency=1.0)
+
+            topo.load_nodes_for_eepran('data/EEPRAN_T2_{}_nodes.json'.format(toposize))
+            topo.load_links_for_eepran('data/EEPRAN_T2_{}_links.json'.format(toposize), numLinksMultiplier=1, linkCapacityMultiplier=multiplier)
+            if reduce_switch_chains:
+                topo.reduce_switch_chains(keep_nodes=["node0"])
+
+            if shortest_path_dag:
+                topo.generate_routes_dag(origin_node="node0", k=50, drcs=core.drc.get_drc_list_embb())
+            else:
+                topo.generate_routes_nx(origin_node="node0", k=50, num_processes=route_generation_processes)
+            return topo
+
+        if use_topology_cache:
+            topo = topology_cache.get_or_build(
+                ["data/T2_{}_BS_usage.csv".format(toposize), "data/EEPRAN_T2_{}_nodes.json".format(toposize),
+                 "data/EEPRAN_T2_{}_links.json".format(toposize)],
+                {"toposize": toposize, "linkCapacityMultiplier": multiplier, "reduce_switch_chains": reduce_switch_chains,
+                 "shortest_path_dag": shortest_path_dag},
+                build_topology)
+        else:
+            topo = build_topology()
+
+        # topo.export_route_store('data/routes_T1_50')
+        # topo.import_route_store('data/routes_150')
 
         current_deployment = core.topology.Deployment(topo.get_base_station_keys(), core.drc.get_drc_list_embb(),
                                                     topo.get_routes())
@@ -59,19 +98,67 @@ for case in [0,1,2]:
         #     file.write('timestamp,solveTime,ranEnergy,netEnergy,migEnergy,centralization,migrations,usedMachines,drc0,drc6,drc62,drc9\n')
 
         eepran_model = None
+        greedy_placement = None
+        first_incumbent_listener = None
         # for i in range(0, 48):
         for i in range(9, 14):
             print('--------------------------------------------------------------------------------')
             print('                         solving for Timestamp {}'.format(i))
             print('--------------------------------------------------------------------------------')
             start_time = time.time()
-            eepran_model = core.model.build_eepran_model(topo, timestamp=i, centralization_cap=0,
-                                                        service=core.model.SERVICE_1080P,
-                                                        cr_mode=core.model.CR_MODE_CALC,
-                                                        actual_deployment=current_deployment)
+            # the model is built once per topology and only its load dependent terms change per timestamp
+            if eepran_model is None:
+                build_model = (core.sparse_model.build_eepran_model_sparse if sparse_backend
+                               else core.model.build_eepran_model)
+                eepran_model = build_model(topo, timestamp=i, centralization_cap=0,
+                                           service=core.model.SERVICE_1080P,
+                                           cr_mode=core.model.CR_MODE_CALC,
+                                           actual_deployment=current_deployment,
+                                           lazy_link_capacity=lazy_link_capacity)
+            else:
+                eepran_model.update_load(timestamp=i, actual_deployment=current_deployment)
 
             eepran_model.model.parameters.timelimit = 1800
-            solution = eepran_model.model.solve()
+            if first_incumbent_listener is None:
+                first_incumbent_listener = core.model.FirstIncumbentListener()
+                eepran_model.model.add_progress_listener(first_incumbent_listener)
+
+            # the previous deployment (repaired for the actual load) is the MIP start of the solve, the
+            # solver state left by the previous timestamp is discarded so both solves are comparable
+            warm_start = greedy_warm_start or len(current_deployment.GetSelection()) > 0
+            cold_solve_time = None
+            cold_first_incumbent_time = None
+            if warm_start and benchmark_warm_start:
+                eepran_model.model.clear_mip_starts()
+                eepran_model.model.solve(clean_before_solve=True)
+                cold_solve_time = eepran_model.model.solve_details.time
+                cold_first_incumbent_time = first_incumbent_listener.first_incumbent_time
+            if greedy_warm_start:
+                if greedy_placement is None:
+                    greedy_placement = core.heuristic.GreedyPlacement(topo, service=core.model.SERVICE_1080P,
+                                                                      cr_mode=core.model.CR_MODE_CALC)
+                greedy_solution = greedy_placement.solve(timestamp=i, actual_deployment=current_deployment)
+                eepran_model.add_warm_start(greedy_solution.get_x_values())
+            elif warm_start:
+                eepran_model.add_warm_start(current_deployment)
+            solution = eepran_model.model.solve(clean_before_solve=True)
+            warm_solve_time = eepran_model.model.solve_details.time
+            print('Solve Time: {:.3f}s (first incumbent: {}s, warm start: {})'.format(
+                warm_solve_time, first_incumbent_listener.first_incumbent_time, warm_start))
+
+            if cold_solve_time is not None:
+                print('Cold Solve Time: {:.3f}s (first incumbent: {}s) -> speedup: {:.2f}x'.format(
+                    cold_solve_time, cold_first_incumbent_time,
+                    cold_solve_time / warm_solve_time if warm_solve_time > 0 else float('inf')))
+                filename = "solutions/warm_start_speedup.csv"
+                with open(filename, "a+") as file:
+                    # file.write('case,toposize,timestamp,coldSolveTime,warmSolveTime,coldFirstIncumbent,warmFirstIncumbent\n')
+                    file.write("{},{},{},{},{},{},{}\n".format(
+                        case, toposize, i,
+                        cold_solve_time,
+                        warm_solve_time,
+                        cold_first_incumbent_time,
+                        first_incumbent_listener.first_incumbent_time))
 
             filename = "solutions/solve_status.csv"
             with open(filename, "a+") as file:
@@ -82,6 +169,17 @@ for case in [0,1,2]:
                     i,
                     eepran_model.model.solve_details.status))
 
+            if eepran_model.lazyLinkCallback is not None:
+                link_counts = eepran_model.lazyLinkCallback.linkCounts
+                print('Lazy Link Constraints: {} added over {} links'.format(sum(link_counts.values()),
+                                                                             len(link_counts)))
+                filename = "solutions/lazy_link_counts.csv"
+                with open(filename, "a+") as file:
+                    # file.write('case,toposize,timestamp,link,count\n')
+                    for link_key, count in link_counts.items():
+                        file.write('{},{},{},"{}",{}\n'.format(case, toposize, i, link_key, count))
+                link_counts.clear()
+
             if solution is None:
                 print('==========================')
                 print('!!! SOLUTION NOT FOUND !!!')
@@ -98,29 +196,31 @@ for case in [0,1,2]:
             num_machines_per_time = []
             drcs_per_time = defaultdict(int)
 
+            # every variable value is read at once, usages are computed from the model load matrices
+            solution_view = core.solution.SolutionView(eepran_model, solution)
+
             print('----------------------------------------')
-            total_energy_consumed += eepran_model.model.solution.get_objective_value()
-            print('Objective Value: {} [w]'.format(eepran_model.model.solution.get_objective_value()))
-            print('Centralization: {}'.format(
-                eepran_model.model.solution.get_value(eepran_model.centralizationContraint.left_expr)))
-            print('Ran Power Consumption: {}'.format(eepran_model.model.solution.get_value(eepran_model.ranPowerExpr)))
-            print('Net Power Consumption: {}'.format(eepran_model.model.solution.get_value(eepran_model.netPowerExpr)))
-            print('Mig Power Consumption: {}'.format(eepran_model.model.solution.get_value(eepran_model.migPowerExpr)))
+            total_energy_consumed += solution_view.objectiveValue
+            print('Objective Value: {} [w]'.format(solution_view.objectiveValue))
+            print('Centralization: {}'.format(solution_view.centralization))
+            print('Ran Power Consumption: {}'.format(solution_view.ranPower))
+            print('Net Power Consumption: {}'.format(solution_view.netPower))
+            print('Mig Power Consumption: {}'.format(solution_view.migPower))
 
             print('----------------------------------------')
             print('                Solution                ')
             solution_keys = []
             drcs_per_bs = {}
-            for key in eepran_model.model.x:
-                if eepran_model.model.x[key].solution_value > 10 ** (-3):
-                    # print("route={}, drc={}, bs={} -> {}".format(topo.get_route(key.route_id).sequence, key.drc_id, key.bs_key, eepran_model.model.x[key].solution_value))
-                    print("route={}, drc={}, bs={} -> {}".format(key.route_id, key.drc_id, key.bs_key,
-                                                                eepran_model.model.x[key].solution_value))
-                    print("  |-route={} -> {}".format(key.route_id, topo.get_route(key.route_id).sequence))
-                    drcs_per_time[key.drc_id] += 1
-                    bs_id = re.findall(r'\d+', key.bs_key)
-                    drcs_per_bs[bs_id[0]] = key.drc_id
-                    solution_keys.append(key)
+            for position in solution_view.selected.tolist():
+                key = solution_view.keys[position]
+                # print("route={}, drc={}, bs={} -> {}".format(topo.get_route(key.route_id).sequence, key.drc_id, key.bs_key, solution_view.x[position]))
+                print("route={}, drc={}, bs={} -> {}".format(key.route_id, key.drc_id, key.bs_key,
+                                                            solution_view.x[position]))
+                print("  |-route={} -> {}".format(key.route_id, topo.get_route(key.route_id).sequence))
+                drcs_per_time[key.drc_id] += 1
+                bs_id = re.findall(r'\d+', key.bs_key)
+                drcs_per_bs[bs_id[0]] = key.drc_id
+                solution_keys.append(key)
 
             # bs_filename = "solutions/{}/topo_{}_time_{}_drc_per_bs.csv".format(prefix, toposize, i)
             # with open(bs_filename, "w+") as file:
@@ -128,10 +228,9 @@ for case in [0,1,2]:
             #     for key, value in drcs_per_bs.items():
             #         file.write("{},{}\n".format(key, value))
 
-            for key in eepran_model.model.y:
-                if eepran_model.model.y[key].solution_value > 10 ** (-3):
-                    print("HW: {} -> Turned On Units: {}".format(key, eepran_model.model.y[key].solution_value))
-                    num_turned_on_machines += eepran_model.model.y[key].solution_value
+            for key, units in solution_view.get_turned_on_units().items():
+                print("HW: {} -> Turned On Units: {}".format(key, units))
+                num_turned_on_machines += units
 
             # print('----------------------------------------')
             # print('        Centralization Locations        ')
@@ -161,8 +260,7 @@ for case in [0,1,2]:
             switch_off = []
             hw_usage = defaultdict(float)
             hw_capacity = defaultdict(int)
-            for key, expr in eepran_model.hwUsageExprs.items():
-                usg = eepran_model.model.solution.get_value(expr)
+            for key, usg in zip(solution_view.usageHwKeys, solution_view.hwUsage.tolist()):
                 if usg > 0.01:
                     print('{} USAGE IS {:.2f} GOPS ({:.2f}%)'.format(key, usg, usg / eepran_model.hwCapacities[key] * 100))
                     hw_id = re.findall(r'\d+', key)
@@ -216,19 +314,7 @@ for case in [0,1,2]:
             print('----------------------------------------')
             print('               Migrations               ')
 
-            mig_count = 0
-            for key in eepran_model.model.x:
-                if eepran_model.model.x[key].solution_value > 10 ** (-3):
-                    for vnf in drcsDict[key.drc_id].fs_cu:
-                        cu = routesDict[key.route_id].sequence[0]
-                        if current_deployment.IsDeployedIn(key.bs_key, vnf, cu) == 0:
-                            mig_count += 1
-                            # print("{} of {} changed to {}".format(vnf, key.bs_key, cu))
-                    for vnf in drcsDict[key.drc_id].fs_du:
-                        du = routesDict[key.route_id].sequence[1]
-                        if current_deployment.IsDeployedIn(key.bs_key, vnf, du) == 0:
-                            mig_count += 1
-                            # print("{} of {} changed to {}".format(vnf, key.bs_key, du))
+            mig_count = len(solution_view.get_migrations(current_deployment))
 
             if mig_count > 0:
                 print('{} migrations ocurred'.format(mig_count))
@@ -245,10 +331,10 @@ for case in [0,1,2]:
                     i,
                     eepran_model.model.solve_details.time,
                     eepran_model.model.solve_details.mip_relative_gap,
-                    eepran_model.model.solution.get_value(eepran_model.ranPowerExpr),
-                    eepran_model.model.solution.get_value(eepran_model.netPowerExpr),
-                    eepran_model.model.solution.get_value(eepran_model.migPowerExpr),
-                    eepran_model.model.solution.get_value(eepran_model.centralizationContraint.left_expr),
+                    solution_view.ranPower,
+                    solution_view.netPower,
+                    solution_view.migPower,
+                    solution_view.centralization,
                     mig_count,
                     num_turned_on_machines,
                     drcs_per_time[0], drcs_per_time[6], drcs_per_time[62], drcs_per_time[9],))
@@ -258,11 +344,7 @@ for case in [0,1,2]:
             # -------------------- Deployment Definition --------------------
             # ---------------------------------------------------------------
 
-            current_deployment = core.topology.Deployment(topo.get_base_station_keys(), core.drc.get_drc_list_embb(),
-                                                        topo.get_routes())
-            for key in eepran_model.model.x:
-                if eepran_model.model.x[key].solution_value > 10 ** (-3):
-                    current_deployment.SetDeploy(key.bs_key, key.drc_id, key.route_id)
+            current_deployment = solution_view.get_deployment(core.drc.get_drc_list_embb())
 
             print('--------------------------------------------------------------------------------')
 